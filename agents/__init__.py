@@ -1,5 +1,6 @@
 """RTL Agent - Writer and Reviewer."""
-from .writer import generate_rtl
+from .writer import generate_rtl, optimize_rtl
 from .reviewer import repair_rtl
+from llm import StructuredOutputError, generate_structured
 
-__all__ = ["generate_rtl", "repair_rtl"]
+__all__ = ["generate_rtl", "optimize_rtl", "repair_rtl", "generate_structured", "StructuredOutputError"]
@@ -1,9 +1,9 @@
 """Reviewer Agent - targeted repair based on action type (no LLM for is_expected when spec-derived)."""
-import json
-import re
-
 from spec.schema import spec_ir_to_summary
 from controller import get_repair_focus
+from llm import generate_structured, string_schema
+
+REVIEWER_SCHEMA = string_schema("module_name", "rtl_code", "testbench_code", "changes_made")
 
 
 def repair_rtl(
@@ -16,10 +16,19 @@ def repair_rtl(
     attempt: int,
     max_retries: int,
     model,
+    formal_result: dict | None = None,
+    equiv_result: dict | None = None,
+    on_field=None,
+    minimized: dict | None = None,
+    structural_result: dict | None = None,
 ) -> dict:
     """
     Ask LLM to fix RTL/TB based on failure. Uses action-specific focus.
-    Returns dict with module_name, rtl_code, testbench_code, changes_made.
+    minimized: delta-debugged failing stimulus (tools.minimizer) - shown as the counterexample
+    in place of the full simulation log.
+    structural_result: Yosys structural findings (tools.structural), listed by net.
+    on_field: streaming callback (key, value, fields), see generate_structured.
+    Returns dict with module_name, rtl_code, testbench_code, changes_made, usage.
     """
     summary = spec_ir_to_summary(spec_ir)
     focus = get_repair_focus(action_type)
@@ -29,11 +38,26 @@ def repair_rtl(
         f"STDERR:\n{compile_result['stderr']}\n"
         f"STDOUT:\n{compile_result['stdout']}"
     )
-    sim_summary = (
-        f"Return code: {run_result['returncode']}\n"
-        f"STDOUT:\n{run_result['stdout']}\n"
-        f"STDERR:\n{run_result['stderr']}"
-    ) if run_result else "Simulation did not run (compile failed)."
+    if run_result and minimized:
+        sim_summary = (
+            _check_summary(run_result.get("check"))
+            + f"Return code: {run_result['returncode']}\n"
+            + _minimized_summary(minimized)
+        )
+    elif run_result:
+        sim_summary = (
+            _check_summary(run_result.get("check"))
+            + f"Return code: {run_result['returncode']}\n"
+            f"STDOUT:\n{run_result['stdout']}\n"
+            f"STDERR:\n{run_result['stderr']}"
+        )
+    elif compile_result.get("skipped"):
+        sim_summary = "Simulation did not run (structural check failed)."
+    else:
+        sim_summary = "Simulation did not run (compile failed)."
+    formal_summary = (
+        _structural_summary(structural_result) + _formal_summary(formal_result) + _equiv_summary(equiv_result)
+    )
 
     prompt = f"""You are an expert RTL debug engineer.
 
@@ -56,8 +80,8 @@ COMPILE RESULT:
 
 SIMULATION RESULT:
 {sim_summary}
-
-Respond ONLY in this JSON format:
+{formal_summary}
+Respond ONLY in this JSON format (keys in this order):
 {{
   "module_name": "<top module name>",
   "rtl_code": "<fixed Verilog/SV code for DUT>",
@@ -67,8 +91,71 @@ Respond ONLY in this JSON format:
 
 Output ONLY the JSON. No markdown."""
 
-    response = model.generate_content(prompt)
-    raw = response.text.strip()
-    raw = re.sub(r"^```[a-z]*\n?", "", raw, flags=re.MULTILINE)
-    raw = re.sub(r"```$", "", raw, flags=re.MULTILINE)
-    return json.loads(raw)
+    return generate_structured(model, prompt, REVIEWER_SCHEMA, on_field=on_field)
+
+
+def _check_summary(check: dict | None) -> str:
+    """Spec TB comparison: mismatch count and first failing vectors."""
+    if not check or check.get("passed"):
+        return ""
+    lines = [f"MISMATCHES: {check['mismatches'] + check['explicit_mismatches']} of {check['samples']} samples"]
+    for f in check.get("first_failures", []):
+        lines.append(f"  - {f['line']}" if "line" in f else f"  - in={f['in']} out={f['out']} exp={f['exp']}")
+    return "\n".join(lines) + "\n"
+
+
+def _minimized_summary(minimized: dict) -> str:
+    """Minimal failing stimulus and the simulation output of just that subset."""
+    if minimized["kind"] == "truth_table":
+        what = "truth-table rows"
+    else:
+        what = "stimulus vectors (applied in order after reset)"
+    lines = [
+        f"MINIMAL FAILING STIMULUS: {minimized['size']} of {minimized['total']} {what} still fail"
+        + ("" if minimized.get("complete") else " (minimization incomplete)") + ":"
+    ]
+    for i, item in zip(minimized["indices"], minimized["stimulus"]):
+        shown = " ".join(f"{k}={v}" for k, v in item.items()) if isinstance(item, dict) else item
+        lines.append(f"  - #{i}: {shown}")
+    lines.append(f"STDOUT (this subset only):\n{minimized['stdout']}")
+    return "\n".join(lines) + "\n"
+
+
+def _structural_summary(structural_result: dict | None) -> str:
+    """Yosys check findings section for the repair prompt (empty if the design was clean)."""
+    findings = (structural_result or {}).get("findings")
+    if not findings:
+        return ""
+    lines = ["", "STRUCTURAL CHECK (Yosys proc; check) - rejected before simulation:"]
+    for f in findings:
+        net = " -> ".join(f["loop"]) if f.get("loop") else f["net"]
+        lines.append(f"  - {f['kind']}: {net}")
+    return "\n".join(lines) + "\n"
+
+
+def _formal_summary(formal_result: dict | None) -> str:
+    """Counterexample section for the repair prompt (empty unless formal failed)."""
+    if not formal_result or formal_result.get("passed") is not False:
+        return ""
+    cex = formal_result.get("counterexample") or {}
+    lines = [
+        "",
+        f"FORMAL COUNTEREXAMPLE ({formal_result.get('mode')}, depth {formal_result.get('depth')}):",
+        f"Failed at step: {cex.get('step')}",
+    ]
+    lines += [f"  - {a}" for a in cex.get("assertions", [])]
+    if cex.get("trace"):
+        lines.append(f"Trace: {cex['trace']}")
+    return "\n".join(lines) + "\n"
+
+
+def _equiv_summary(equiv_result: dict | None) -> str:
+    """SAT counterexample section for the repair prompt (empty unless equivalence failed)."""
+    if not equiv_result or equiv_result.get("equivalent") is not False:
+        return ""
+    cex = equiv_result.get("counterexample") or {}
+    lines = ["", "EQUIVALENCE COUNTEREXAMPLE (DUT differs from truth table):"]
+    lines.append("  inputs:   " + ", ".join(f"{k}={v}" for k, v in cex.get("inputs", {}).items()))
+    lines.append("  expected: " + ", ".join(f"{k}={v}" for k, v in cex.get("expected", {}).items()))
+    lines.append("  actual:   " + ", ".join(f"{k}={v}" for k, v in cex.get("actual", {}).items()))
+    return "\n".join(lines) + "\n"
@@ -1,16 +1,21 @@
 """Code Writer Agent - generates RTL + auxiliary testbench from Spec IR."""
-import json
-import re
-
 from spec.schema import spec_ir_to_summary
+from llm import generate_structured, string_schema
+
+MAX_EXAMPLE_RTL_CHARS = 3000
+WRITER_SCHEMA = string_schema("module_name", "rtl_code", "testbench_code", "explanation")
 
 
-def generate_rtl(spec_ir: dict, model) -> dict:
+def generate_rtl(spec_ir: dict, model, examples: list[dict] | None = None, on_field=None) -> dict:
     """
     Ask LLM to generate RTL + auxiliary testbench from Spec IR.
-    Returns dict with module_name, rtl_code, testbench_code, explanation.
+    examples: verified designs for similar specs ({spec, rtl_code}) used as few-shot references.
+    on_field: streaming callback (key, value, fields) - fires when rtl_code is complete,
+    before the testbench has arrived.
+    Returns dict with module_name, rtl_code, testbench_code, explanation, usage.
     """
     summary = spec_ir_to_summary(spec_ir)
+    reference = _format_examples(examples)
     prompt = f"""You are an expert RTL design engineer using SystemVerilog/Verilog.
 
 Given this structured hardware specification, generate:
@@ -24,8 +29,8 @@ Given this structured hardware specification, generate:
 
 SPECIFICATION:
 {summary}
-
-Respond ONLY in this exact JSON format:
+{reference}
+Respond ONLY in this exact JSON format (keys in this order):
 {{
   "module_name": "<top module name>",
   "rtl_code": "<full Verilog/SV code for DUT>",
@@ -35,13 +40,66 @@ Respond ONLY in this exact JSON format:
 
 Output ONLY the JSON. No markdown, no backticks."""
 
-    response = model.generate_content(prompt)
-    raw = response.text.strip()
-    raw = _strip_markdown(raw)
-    return json.loads(raw)
+    return generate_structured(model, prompt, WRITER_SCHEMA, on_field=on_field)
+
+
+OPTIMIZER_SCHEMA = string_schema("module_name", "rtl_code", "changes_made")
+OPTIMIZE_GOALS = {
+    "area": "minimum area: fewer cells / transistors. Share operators, narrow datapaths, drop redundant logic.",
+    "delay": "minimum logic depth: fewer gate levels on the longest combinational path. Flatten priority "
+    "chains, balance trees, precompute in parallel (area may grow).",
+}
+
+
+def optimize_rtl(
+    spec_ir: dict,
+    rtl_code: str,
+    module_name: str,
+    goal: str,
+    metrics: dict,
+    model,
+    on_field=None,
+) -> dict:
+    """
+    Ask LLM for a PPA-optimized rewrite of verified RTL (goal: "area" | "delay").
+    metrics: current Yosys numbers (num_cells, transistors, logic_depth from `ltp -noff`) shown as the target to beat.
+    Returns dict with module_name, rtl_code, changes_made, usage.
+    """
+    summary = spec_ir_to_summary(spec_ir)
+    numbers = ", ".join(f"{k}={v}" for k, v in metrics.items()) or "unknown"
+    prompt = f"""You are an expert RTL design engineer optimizing a verified design for PPA.
+
+SPECIFICATION:
+{summary}
+
+VERIFIED RTL (module {module_name}):
+{rtl_code}
+
+CURRENT SYNTHESIS (Yosys): {numbers}
+GOAL: {OPTIMIZE_GOALS[goal]}
+Keep the module name, ports, reset and cycle-level behavior exactly as they are; the rewrite is
+re-verified against the same spec testbench. Synthesizable, Icarus-compatible (-g2012) constructs only.
+
+Respond ONLY in this JSON format (keys in this order):
+{{
+  "module_name": "{module_name}",
+  "rtl_code": "<optimized Verilog/SV code>",
+  "changes_made": "<bullet list of the optimizations>"
+}}
+
+Output ONLY the JSON. No markdown."""
+
+    return generate_structured(model, prompt, OPTIMIZER_SCHEMA, on_field=on_field)
 
 
-def _strip_markdown(raw: str) -> str:
-    raw = re.sub(r"^```[a-z]*\n?", "", raw, flags=re.MULTILINE)
-    raw = re.sub(r"```$", "", raw, flags=re.MULTILINE)
-    return raw.strip()
+def _format_examples(examples: list[dict] | None) -> str:
+    """Few-shot block of previously verified designs (empty if none)."""
+    if not examples:
+        return ""
+    parts = ["", "REFERENCE DESIGNS (verified on similar specs - adapt them, do not copy module names):"]
+    for i, ex in enumerate(examples, 1):
+        rtl = ex["rtl_code"]
+        if len(rtl) > MAX_EXAMPLE_RTL_CHARS:
+            rtl = rtl[:MAX_EXAMPLE_RTL_CHARS] + "\n// ... (truncated)"
+        parts.append(f"--- Example {i} ---\n{spec_ir_to_summary(ex['spec'])}\nRTL:\n{rtl}")
+    return "\n".join(parts) + "\n"
@@ -0,0 +1,111 @@
+"""
+Run budgets - wall-clock deadline + token cap per pipeline run.
+Tracks spend per stage and decides which optional stages still fit before the deadline.
+"""
+import time
+from contextlib import contextmanager
+
+from config import BUDGET_STAGE_ESTIMATES
+
+
+class RunBudget:
+    """
+    time_s: wall-clock budget from construction (None = unlimited).
+    tokens: LLM token budget (None = unlimited).
+    Optional stages run only if their estimated cost (mean observed duration, else the
+    default in config.BUDGET_STAGE_ESTIMATES) fits in the remaining time with `reserve_s` kept back
+    for mandatory work. Every skip/run decision is recorded for the feedback.
+    """
+
+    def __init__(self, time_s: float | None = None, tokens: int | None = None, reserve_s: float = 5.0):
+        self.time_s = time_s
+        self.tokens = tokens
+        self.reserve_s = reserve_s
+        self.start = time.monotonic()
+        self.tokens_used = 0
+        self.spend: dict[str, list[float]] = {}
+        self.decisions: list[dict] = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def remaining_time(self) -> float | None:
+        return None if self.time_s is None else self.time_s - self.elapsed()
+
+    def remaining_tokens(self) -> int | None:
+        return None if self.tokens is None else self.tokens - self.tokens_used
+
+    @property
+    def exhausted(self) -> bool:
+        t, k = self.remaining_time(), self.remaining_tokens()
+        return (t is not None and t <= 0) or (k is not None and k <= 0)
+
+    def charge_tokens(self, n: int) -> None:
+        self.tokens_used += n or 0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage: `with budget.stage("sim"): ...`."""
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - t0)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.spend.setdefault(name, []).append(seconds)
+
+    def estimate(self, name: str) -> float:
+        observed = self.spend.get(name)
+        if observed:
+            return sum(observed) / len(observed)
+        return BUDGET_STAGE_ESTIMATES.get(name, 0.0)
+
+    def allow(self, name: str, attempt: int | None = None) -> bool:
+        """Whether an optional stage still fits. Records the decision."""
+        remaining = self.remaining_time()
+        estimate = self.estimate(name)
+        ok = not self.exhausted and (remaining is None or remaining - self.reserve_s >= estimate)
+        if remaining is not None or not ok:
+            self.decisions.append({
+                "stage": name,
+                "attempt": attempt,
+                "decision": "run" if ok else "skip",
+                "estimate_s": round(estimate, 2),
+                "remaining_s": None if remaining is None else round(remaining, 2),
+            })
+        return ok
+
+    def can_iterate(self, attempt: int) -> bool:
+        """Whether another generate/repair iteration fits (mean iteration cost so far)."""
+        remaining = self.remaining_time()
+        ok = not self.exhausted and (remaining is None or remaining >= self.estimate("iteration"))
+        if not ok:
+            self.decisions.append({
+                "stage": "iteration",
+                "attempt": attempt,
+                "decision": "stop",
+                "estimate_s": round(self.estimate("iteration"), 2),
+                "remaining_s": None if remaining is None else round(remaining, 2),
+                "tokens_left": self.remaining_tokens(),
+            })
+        return ok
+
+    def deadline(self) -> float | None:
+        """The run deadline as a time.monotonic() value (None without a time budget)."""
+        return None if self.time_s is None else self.start + self.time_s
+
+    def cap_timeout(self, timeout: float) -> float:
+        """Clamp a tool timeout to the time left (at least 1s)."""
+        remaining = self.remaining_time()
+        return timeout if remaining is None else max(1.0, min(timeout, remaining))
+
+    def report(self) -> dict:
+        return {
+            "time_s": self.time_s,
+            "tokens": self.tokens,
+            "elapsed_s": round(self.elapsed(), 2),
+            "tokens_used": self.tokens_used,
+            "spend_s": {name: round(sum(v), 2) for name, v in self.spend.items()},
+            "decisions": self.decisions,
+        }
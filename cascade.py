@@ -0,0 +1,127 @@
+"""
+Cost-aware model cascade - start each spec on the cheapest model its complexity allows and
+escalate to a stronger one when the same failure keeps coming back.
+Per-model latency, tokens and outcomes are kept for the run feedback (threshold tuning).
+"""
+from config import CASCADE_COMPLEXITY_THRESHOLDS, CASCADE_ESCALATE_AFTER
+from spec.schema import port_list
+
+
+def spec_complexity(spec: dict) -> dict:
+    """Features the starting tier is chosen from."""
+    return {
+        "ports": len(port_list(spec.get("inputs"))) + len(port_list(spec.get("outputs"))),
+        "truth_table_rows": len(spec.get("truth_table") or []),
+        "fsm_states": len(spec.get("fsm_states") or []),
+    }
+
+
+class ModelCascade:
+    """
+    models: [(name, model)] cheapest first; each model has generate_content like a Gemini model.
+    thresholds: feature → ascending limits; a spec whose feature reaches the i-th limit starts at
+    tier i+1 at least (default config.CASCADE_COMPLEXITY_THRESHOLDS).
+    escalate_after: move one tier up when this many consecutive failed attempts share a signature.
+    """
+
+    def __init__(
+        self,
+        models: list[tuple[str, object]],
+        thresholds: dict[str, tuple] | None = None,
+        escalate_after: int = CASCADE_ESCALATE_AFTER,
+    ):
+        if not models:
+            raise ValueError("ModelCascade needs at least one model")
+        self.models = list(models)
+        self.thresholds = CASCADE_COMPLEXITY_THRESHOLDS if thresholds is None else thresholds
+        self.escalate_after = escalate_after
+        self.tier = 0
+        self.start_tier = 0
+        self.complexity: dict = {}
+        self.start_reason = ""
+        self.escalations: list[dict] = []
+        self.calls: list[dict] = []
+        self._signatures: list[str] = []
+
+    @property
+    def name(self) -> str:
+        return self.models[self.tier][0]
+
+    @property
+    def model(self):
+        return self.models[self.tier][1]
+
+    def start(self, spec: dict) -> int:
+        """Pick the starting tier for a spec (resets per-run state)."""
+        self.complexity = spec_complexity(spec)
+        self.escalations, self.calls, self._signatures = [], [], []
+        tier, reasons = 0, []
+        for feature, limits in self.thresholds.items():
+            level = sum(self.complexity.get(feature, 0) >= limit for limit in limits)
+            if level:
+                reasons.append(f"{feature}={self.complexity[feature]}")
+            tier = max(tier, level)
+        self.tier = self.start_tier = min(tier, len(self.models) - 1)
+        self.start_reason = ", ".join(reasons) or "simple spec"
+        return self.tier
+
+    def record(self, attempt: int, kind: str, latency_s: float, tokens: int, status: str) -> None:
+        """One LLM call (generate / repair / regenerate / optimize) and the verdict on its output."""
+        self.calls.append({
+            "attempt": attempt,
+            "model": self.name,
+            "kind": kind,
+            "latency_s": round(latency_s, 3),
+            "tokens": tokens or 0,
+            "status": status,
+        })
+
+    def observe(self, attempt: int, status: str, signature: str | None) -> dict | None:
+        """Track failure signatures; escalate on a repeat streak. Returns the escalation, if any."""
+        if status != "FAIL":
+            self._signatures = []
+            return None
+        self._signatures.append(signature or "unknown")
+        streak = self._signatures[-self.escalate_after:]
+        if len(streak) < self.escalate_after or len(set(streak)) != 1:
+            return None
+        return self.escalate(attempt, f"{streak[0]} x{len(streak)}")
+
+    def escalate(self, attempt: int, reason: str) -> dict | None:
+        if self.tier + 1 >= len(self.models):
+            return None
+        event = {"attempt": attempt, "from": self.name, "to": self.models[self.tier + 1][0], "reason": reason}
+        self.tier += 1
+        self._signatures = []
+        self.escalations.append(event)
+        return event
+
+    def stats(self) -> dict[str, dict]:
+        """Per model: calls, passed, failed, errors, success_rate, tokens, mean_latency_s."""
+        table = {}
+        for name, _ in self.models:
+            calls = [c for c in self.calls if c["model"] == name]
+            if not calls:
+                continue
+            passed = sum(c["status"] == "PASS" for c in calls)
+            table[name] = {
+                "calls": len(calls),
+                "passed": passed,
+                "failed": sum(c["status"] == "FAIL" for c in calls),
+                "errors": sum(c["status"] == "ERROR" for c in calls),
+                "success_rate": round(passed / len(calls), 3),
+                "tokens": sum(c["tokens"] for c in calls),
+                "mean_latency_s": round(sum(c["latency_s"] for c in calls) / len(calls), 3),
+            }
+        return table
+
+    def report(self) -> dict:
+        return {
+            "models": [name for name, _ in self.models],
+            "complexity": self.complexity,
+            "start": {"model": self.models[self.start_tier][0], "reason": self.start_reason},
+            "final_model": self.name,
+            "escalations": self.escalations,
+            "per_model": self.stats(),
+            "calls": self.calls,
+        }
@@ -13,6 +13,17 @@ API_KEY = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 TEXT_MODEL = "gemini-2.5-flash-lite"
 VISION_MODEL = "gemini-2.5-flash-lite"
 
+# Model cascade (cheapest first): starting tier from spec complexity, one tier up after
+# CASCADE_ESCALATE_AFTER consecutive failures with the same signature
+USE_MODEL_CASCADE = os.environ.get("RTL_MODEL_CASCADE") == "1"
+CASCADE_MODELS = ["gemini-2.5-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"]
+CASCADE_COMPLEXITY_THRESHOLDS = {
+    "ports": (12, 32),
+    "truth_table_rows": (64, 256),
+    "fsm_states": (5, 12),
+}
+CASCADE_ESCALATE_AFTER = 2
+
 # Paths - override via RTL_WORK_DIR env; default: ./work (local) or set /content/rtl_agent in Colab
 WORK_DIR = Path(os.environ.get("RTL_WORK_DIR", Path(__file__).parent / "work"))
 WORK_DIR.mkdir(parents=True, exist_ok=True)
@@ -20,4 +31,52 @@ WORK_DIR.mkdir(parents=True, exist_ok=True)
 # Agent limits (minimize API calls for billing)
 MAX_RETRIES = 3
 
+# Batched text → Spec IR: description chars per prompt, specs per response
+CANONICALIZE_BATCH_CHARS = 12000
+CANONICALIZE_BATCH_MAX = 8
+
+# Simulation runner limits (vvp output is streamed, not buffered)
+SIM_TIMEOUT = 60
+SIM_STALL_TIMEOUT = 10
+SIM_MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+
+# Failing-stimulus minimization (ddmin): max subset simulations per failure
+MINIMIZE_MAX_TESTS = 32
+
+# Run budgets: default cost estimates (s) for stages not yet observed in the run
+BUDGET_STAGE_ESTIMATES = {
+    "iteration": 20.0,
+    "verilator": 3.0,
+    "formal": 30.0,
+    "synthesis": 10.0,
+    "svg": 10.0,
+    "minimize": 15.0,
+    "optimize": 30.0,
+}
+
+# Per-attempt history: tool logs kept in memory up to this many chars, full copies spilled to disk
+HISTORY_EXCERPT_CHARS = 2000
+
+# Local retrieval index of passing designs (few-shot seeding)
+DESIGN_INDEX_PATH = WORK_DIR / "design_index.jsonl"
+RETRIEVAL_TOP_K = 2
+
+# Repair-outcome statistics for the adaptive controller policy
+REPAIR_STATS_PATH = WORK_DIR / "repair_stats.jsonl"
+ADAPTIVE_MIN_SAMPLES = 5
+ADAPTIVE_EXPLORATION = 0.5  # UCB bonus weight; 0 = greedy (never tries regenerate/alternatives)
+
+# Job queue mode (store/broker.py + worker.py)
+BROKER_DB_PATH = WORK_DIR / "queue.sqlite"
+BROKER_LEASE_SECONDS = 120
+BROKER_MAX_ATTEMPTS = 3
+
+# Circuit diagrams (rendered on request): above this many cells, draw per module / summary
+DIAGRAM_MAX_CELLS = 300
+DIAGRAM_DOT_TIMEOUT = 20
+
+# Persistent Yosys workers (post-pass synthesis / visualization)
+YOSYS_POOL_SIZE = int(os.environ.get("RTL_YOSYS_WORKERS", 2))
+YOSYS_TIMEOUT = 60
+
 # Action types for controller (import from spec.schema for full list)
@@ -1,15 +1,29 @@
 """Controller - failure classification and action routing (no LLM)."""
+import math
+
 from spec.schema import ACTION_TYPES
 
+# Yosys structural finding kind → action (ordered by precedence)
+STRUCTURAL_ACTIONS = {
+    "comb_loop": "FIX_LOOP",
+    "latch": "FIX_LATCH",
+    "multi_driver": "FIX_DRIVERS",
+    "undriven": "FIX_DRIVERS",
+}
+
 
 def classify_failure(
     verilator_result: dict | None,
     icarus_compile: dict,
     icarus_sim: dict | None,
+    formal_result: dict | None = None,
+    equiv_result: dict | None = None,
+    structural_result: dict | None = None,
 ) -> str:
     """
     Classify failure from tool outputs.
-    Returns action type: FIX_PARSE | FIX_PORTS | FIX_WIDTH | FIX_FUNCTION | FIX_RESET | FIX_TIMING | ASK_CLARIFICATION
+    Returns action type: FIX_PARSE | FIX_PORTS | FIX_WIDTH | FIX_FUNCTION | FIX_RESET | FIX_TIMING |
+    FIX_LOOP | FIX_LATCH | FIX_DRIVERS | ASK_CLARIFICATION
     """
     # Verilator catches syntax/semantic early
     if verilator_result and verilator_result.get("returncode", 0) != 0:
@@ -24,6 +38,12 @@ def classify_failure(
             return "FIX_TYPE"
         return "FIX_PARSE"
 
+    # Yosys structural check: first finding decides (loops before latches before drivers)
+    findings = (structural_result or {}).get("findings")
+    if findings:
+        order = list(STRUCTURAL_ACTIONS.values())
+        return min((STRUCTURAL_ACTIONS[f["kind"]] for f in findings), key=order.index)
+
     # Icarus compile failure
     if icarus_compile.get("returncode", 0) != 0:
         stderr = (icarus_compile.get("stderr") or "").lower()
@@ -37,14 +57,118 @@ def classify_failure(
             return "FIX_TYPE"
         return "FIX_PARSE"
 
-    # Icarus sim failure (runtime)
+    # Streaming runner aborts: silent hang (comb loop / missing $finish) vs runaway output
+    abort = (icarus_sim or {}).get("abort_reason")
+    if abort in ("stall", "timeout"):
+        return "FIX_TIMING"
+    if abort in ("output_cap", "mismatch"):
+        return "FIX_FUNCTION"
+
+    # Icarus sim failure (runtime) or spec TB mismatches
     if icarus_sim and icarus_sim.get("returncode", 0) != 0:
         return "FIX_FUNCTION"
+    if icarus_sim and (icarus_sim.get("check") or {}).get("passed") is False:
+        return "FIX_FUNCTION"
+
+    # SAT miter found an input vector where DUT and truth table disagree
+    if equiv_result and equiv_result.get("equivalent") is False:
+        return "FIX_FUNCTION"
+
+    # Formal counterexample: latency assertions point at timing, invariants at logic
+    if formal_result and formal_result.get("passed") is False:
+        cex = formal_result.get("counterexample") or {}
+        if any("latency" in a for a in cex.get("assertions", [])):
+            return "FIX_TIMING"
+        return "FIX_FUNCTION"
 
     # Sim passed but wrong output - would need spec comparison
     return "FIX_FUNCTION"
 
 
+def failure_signature(
+    verilator_result: dict | None,
+    icarus_compile: dict,
+    icarus_sim: dict | None,
+    formal_result: dict | None = None,
+    equiv_result: dict | None = None,
+    structural_result: dict | None = None,
+) -> str:
+    """
+    Coarse, stable key for a failure ("<stage>:<kind>"), used to look up repair statistics.
+    Mirrors the checks in classify_failure, one level finer than the action type.
+    """
+    if verilator_result and verilator_result.get("returncode", 0) != 0:
+        return f"lint:{classify_failure(verilator_result, {}, None).lower()}"
+    if (structural_result or {}).get("findings"):
+        return f"struct:{classify_failure(None, {}, None, structural_result=structural_result).lower()}"
+    if icarus_compile.get("returncode", 0) != 0:
+        return f"compile:{classify_failure(None, icarus_compile, None).lower()}"
+    sim = icarus_sim or {}
+    if sim.get("abort_reason"):
+        return f"sim:{sim['abort_reason']}"
+    if sim and sim.get("returncode", 0) != 0:
+        return "sim:runtime"
+    if (sim.get("check") or {}).get("passed") is False:
+        return "sim:mismatch"
+    if equiv_result and equiv_result.get("equivalent") is False:
+        return "equiv:counterexample"
+    if formal_result and formal_result.get("passed") is False:
+        cex = formal_result.get("counterexample") or {}
+        return "formal:latency" if any("latency" in a for a in cex.get("assertions", [])) else "formal:invariant"
+    return "unknown"
+
+
+def fix_rate(cell: dict | None) -> float:
+    """Laplace-smoothed probability that one LLM call fixes the failure."""
+    if not cell:
+        return 0.5
+    return (cell["passed"] + 1) / (cell["n"] + 2)
+
+
+def choose_action(
+    rule_action: str,
+    signature: str,
+    stats: dict | None,
+    min_samples: int = 5,
+    exploration: float = 0.0,
+) -> dict:
+    """
+    Pick action and mode ("repair" | "regenerate") for a failure from recorded outcomes.
+    stats: RepairStats.table() - signature -> (action, mode) -> {n, passed, tokens}.
+    The rule-based action is kept unless another (action, mode) with at least min_samples
+    records has a higher fix rate. With exploration > 0, once a signature has min_samples
+    records overall, arms are ranked UCB-style (fix rate + exploration * sqrt(ln N / (n + 1))),
+    so regenerate and alternative actions get tried instead of the rule arm collecting every
+    sample. Returns {action, mode, reason, expected_calls}.
+    """
+    cells = (stats or {}).get(signature, {})
+    rule_p = fix_rate(cells.get((rule_action, "repair")))
+    choice = {"action": rule_action, "mode": "repair", "reason": "rule", "expected_calls": round(1 / rule_p, 2)}
+    total = sum(cell["n"] for cell in cells.values())
+    explore = exploration > 0 and total >= min_samples
+    arms = dict(cells)
+    if explore:
+        arms.setdefault((rule_action, "repair"), None)
+        arms.setdefault((rule_action, "regenerate"), None)
+        arms.setdefault(("FIX_FUNCTION", "repair"), None)  # generic alternative to a specific rule action
+
+    def bonus(cell: dict | None) -> float:
+        return exploration * math.sqrt(math.log(total + 1) / ((cell["n"] if cell else 0) + 1)) if explore else 0.0
+
+    best = rule_p + bonus(cells.get((rule_action, "repair")))
+    for (action, mode), cell in sorted(arms.items()):
+        n = cell["n"] if cell else 0
+        if (action not in ACTION_TYPES and mode == "repair") or (n < min_samples and not explore):
+            continue
+        p = fix_rate(cell)
+        score = p + bonus(cell)
+        if score > best:
+            best = score
+            reason = f"history ({cell['passed']}/{n} fixed)" if n >= min_samples else f"explore ({n} tried)"
+            choice = {"action": action, "mode": mode, "reason": reason, "expected_calls": round(1 / p, 2)}
+    return choice
+
+
 def get_repair_focus(action_type: str) -> str:
     """Return short focus hint for repair prompt."""
     focus = {
@@ -54,7 +178,10 @@ def get_repair_focus(action_type: str) -> str:
         "FIX_TYPE": "Fix type mismatches. Check reg vs wire, signed vs unsigned.",
         "FIX_FUNCTION": "Fix functional/logic errors. Verify behavior matches specification.",
         "FIX_RESET": "Fix reset behavior. Check reset polarity and initial state.",
-        "FIX_TIMING": "Fix timing. Check clock edges, delays, sequencing.",
+        "FIX_TIMING": "Fix timing. Check clock edges, delays, sequencing, combinational loops and missing $finish.",
+        "FIX_LOOP": "Break the combinational loop on the listed nets. Register the feedback path or restructure the logic.",
+        "FIX_LATCH": "Remove inferred latches. Assign every listed signal on all paths of combinational always blocks (defaults / full case).",
+        "FIX_DRIVERS": "Fix net drivers. Each listed net needs exactly one driver: remove duplicate assigns/always blocks, drive undriven outputs.",
         "ASK_CLARIFICATION": "Spec may be ambiguous. Proceed with best interpretation.",
     }
     return focus.get(action_type, "Fix the reported errors.")
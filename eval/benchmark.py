@@ -2,18 +2,115 @@
 from pathlib import Path
 
 
-def run_benchmark(specs_dir: Path, output_dir: Path, text_model, max_per_spec: int = 3) -> dict:
+def run_benchmark(
+    specs_dir: Path,
+    output_dir: Path,
+    text_model,
+    max_per_spec: int = 3,
+    **pipeline_kwargs,
+) -> dict:
     """
     Run pipeline on each Spec IR in specs_dir.
     specs_dir: folder of JSON Spec IR files
+    pipeline_kwargs: forwarded to run_pipeline (e.g. use_retrieval=False).
     Returns aggregate results.
     """
     from pipeline import run_pipeline
     import json
 
     results = []
-    for spec_file in Path(specs_dir).glob("*.json"):
+    for spec_file in sorted(Path(specs_dir).glob("*.json")):
         spec = json.loads(spec_file.read_text())
-        state = run_pipeline(spec, text_model, work_dir=output_dir / spec_file.stem, max_retries=max_per_spec)
-        results.append({"spec": spec_file.name, "status": state["status"], "iterations": state["iteration"]})
-    return {"total": len(results), "passed": sum(1 for r in results if r["status"] == "PASS"), "results": results}
+        state = run_pipeline(
+            spec, text_model, work_dir=output_dir / spec_file.stem, max_retries=max_per_spec, **pipeline_kwargs
+        )
+        results.append({
+            "spec": spec_file.name,
+            "status": state["status"],
+            "iterations": state["iteration"],
+            "tokens": state["tokens"].get("total_tokens", 0),
+            "retrieved": [r["module_name"] for r in state["retrieved"]],
+        })
+    return {
+        "total": len(results),
+        "passed": sum(1 for r in results if r["status"] == "PASS"),
+        "mean_iterations": sum(r["iterations"] for r in results) / max(len(results), 1),
+        "mean_tokens": sum(r["tokens"] for r in results) / max(len(results), 1),
+        "results": results,
+    }
+
+
+def compare_retrieval(
+    specs_dir: Path,
+    output_dir: Path,
+    text_model,
+    index_path: Path | None = None,
+    max_per_spec: int = 3,
+) -> dict:
+    """
+    Measure few-shot retrieval: run the benchmark without retrieval, then with it.
+    Passing baseline designs seed the index (default output_dir/design_index.jsonl); each
+    spec is excluded from its own neighbours, so results measure transfer between specs.
+    """
+    import json
+    from store.design_index import DesignIndex
+
+    index = DesignIndex(index_path or output_dir / "design_index.jsonl", exclude_same_spec=True)
+    baseline = run_benchmark(
+        specs_dir, output_dir / "baseline", text_model, max_per_spec, use_retrieval=False
+    )
+    for r in baseline["results"]:
+        final_dut = output_dir / "baseline" / Path(r["spec"]).stem / "final_dut.sv"
+        if r["status"] == "PASS" and final_dut.exists():
+            spec = json.loads((Path(specs_dir) / r["spec"]).read_text())
+            index.add(spec, final_dut.read_text(), {"source": "baseline"})
+    retrieval = run_benchmark(
+        specs_dir, output_dir / "retrieval", text_model, max_per_spec, design_index=index
+    )
+    return {
+        "baseline": baseline,
+        "retrieval": retrieval,
+        "delta_iterations": retrieval["mean_iterations"] - baseline["mean_iterations"],
+        "delta_tokens": retrieval["mean_tokens"] - baseline["mean_tokens"],
+        "delta_passed": retrieval["passed"] - baseline["passed"],
+    }
+
+
+def submit_benchmark(specs_dir: Path, db_path: Path, max_per_spec: int = 3, **pipeline_kwargs) -> list[str]:
+    """Queue every Spec IR in specs_dir on the broker; run `python worker.py --db ...` to execute."""
+    import json
+    from store.broker import JobBroker
+
+    broker = JobBroker(db_path)
+    options = {"max_retries": max_per_spec, **pipeline_kwargs}
+    return [
+        broker.submit(json.loads(spec_file.read_text()), name=spec_file.stem, options=options)
+        for spec_file in sorted(Path(specs_dir).glob("*.json"))
+    ]
+
+
+def collect_benchmark(db_path: Path, output_dir: Path | None = None) -> dict:
+    """Aggregate finished queue jobs; unpack artifact bundles to output_dir/<name> if given."""
+    from store.broker import JobBroker, unpack_bundle
+
+    results = []
+    for job in JobBroker(db_path).results(with_artifacts=output_dir is not None):
+        result = job["result"] or {}
+        if output_dir is not None and job.get("artifacts"):
+            unpack_bundle(job["artifacts"], Path(output_dir) / job["name"])
+        results.append({
+            "spec": job["name"],
+            "status": result.get("status", "ERROR" if job["status"] == "failed" else job["status"]),
+            "iterations": result.get("iterations", 0),
+            "tokens": (result.get("tokens") or {}).get("total_tokens", 0),
+            "worker": result.get("worker"),
+            "job_attempts": job["attempts"],
+            "error": job["error"] if job["status"] == "failed" else None,
+        })
+    return {
+        "total": len(results),
+        "passed": sum(1 for r in results if r["status"] == "PASS"),
+        "mean_iterations": sum(r["iterations"] for r in results) / max(len(results), 1),
+        "mean_tokens": sum(r["tokens"] for r in results) / max(len(results), 1),
+        "results": results,
+    }
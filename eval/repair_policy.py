@@ -0,0 +1,64 @@
+"""Offline evaluation of the adaptive repair policy over recorded repair steps."""
+from collections import defaultdict
+from pathlib import Path
+
+from config import ADAPTIVE_MIN_SAMPLES, REPAIR_STATS_PATH
+from controller import choose_action, fix_rate
+from store.repair_stats import RepairStats, aggregate
+
+
+def evaluate_policy(path: Path = REPAIR_STATS_PATH, min_samples: int = ADAPTIVE_MIN_SAMPLES) -> dict:
+    """
+    Replay every recorded repair step: the policy decides from statistics of all *other* runs
+    (leave-one-run-out), and both the rule choice and the policy choice are valued by their
+    expected LLM calls until the failure is fixed (1 / smoothed fix rate, estimated on all runs).
+    The replayed policy is greedy (no exploration): it values what the explored arms learned.
+    Returns per-design expected calls for rule vs policy and the calls saved per design.
+    """
+    records = RepairStats(path).records
+    full = aggregate(records)
+    runs = defaultdict(list)
+    for r in records:
+        runs[r["run_id"]].append(r)
+
+    per_design = []
+    switched = 0
+    for run_id, steps in runs.items():
+        held_out = aggregate(r for r in records if r["run_id"] != run_id)
+        rule_calls = policy_calls = 0.0
+        for step in steps:
+            cells = full.get(step["signature"], {})
+            choice = choose_action(step["rule_action"], step["signature"], held_out, min_samples)
+            rule_calls += 1 / fix_rate(cells.get((step["rule_action"], "repair")))
+            policy_calls += 1 / fix_rate(cells.get((choice["action"], choice["mode"])))
+            switched += (choice["action"], choice["mode"]) != (step["rule_action"], "repair")
+        per_design.append({
+            "run_id": run_id,
+            "steps": len(steps),
+            "rule_calls": round(rule_calls, 2),
+            "policy_calls": round(policy_calls, 2),
+        })
+
+    n = max(len(per_design), 1)
+    rule_mean = sum(d["rule_calls"] for d in per_design) / n
+    policy_mean = sum(d["policy_calls"] for d in per_design) / n
+    return {
+        "runs": len(per_design),
+        "steps": len(records),
+        "switched_steps": switched,
+        "expected_calls_rule": round(rule_mean, 2),
+        "expected_calls_policy": round(policy_mean, 2),
+        "calls_saved_per_design": round(rule_mean - policy_mean, 2),
+        "signatures": {
+            sig: {f"{a}/{m}": f"{c['passed']}/{c['n']}" for (a, m), c in sorted(cells.items())}
+            for sig, cells in sorted(full.items())
+        },
+        "per_design": per_design,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    print(json.dumps(evaluate_policy(Path(sys.argv[1]) if len(sys.argv) > 1 else REPAIR_STATS_PATH), indent=2))
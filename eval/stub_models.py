@@ -0,0 +1,151 @@
+"""
+Offline stub models for the model cascade - no API calls. Each stub answers Writer/Reviewer
+prompts for one truth-table spec with the correct RTL (reference netlist) at its success rate,
+else with a plausible wrong design, after a fixed latency.
+"""
+import json
+import random
+import time
+from pathlib import Path
+
+from cascade import ModelCascade
+from spec.reference_netlist import generate_reference_rtl
+from spec.schema import split_truth_row
+from store.design_index import rename_module
+
+# name, latency (s), success rate, price per 1k tokens - cheapest first
+STUB_TIERS = [
+    ("stub-lite", 0.05, 0.35, 0.1),
+    ("stub-flash", 0.2, 0.7, 0.4),
+    ("stub-pro", 0.6, 0.95, 2.0),
+]
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubResponse:
+    """Quacks like a Gemini response: .text, .usage_metadata, and iterable as stream chunks."""
+
+    def __init__(self, text: str, prompt_tokens: int, output_tokens: int):
+        self.text = text
+        self.usage_metadata = type("Usage", (), {
+            "prompt_token_count": prompt_tokens,
+            "candidates_token_count": output_tokens,
+        })()
+
+    def __iter__(self):
+        half = len(self.text) // 2
+        return iter([_Chunk(self.text[:half]), _Chunk(self.text[half:])])
+
+
+class StubModel:
+    """Answers with the spec's reference RTL with probability success_rate (seeded)."""
+
+    def __init__(self, name: str, spec_ir: dict, latency_s: float, success_rate: float, seed: int = 0):
+        reference = generate_reference_rtl(spec_ir)
+        if reference is None:
+            raise ValueError("StubModel needs a combinational truth-table spec")
+        self.name = name
+        self.latency_s = latency_s
+        self.success_rate = success_rate
+        self.module_name = spec_ir.get("module_name", "dut")
+        self.good_rtl = _as_module(reference, self.module_name)
+        zeroed = [[split_truth_row(row)[0], 0] for row in spec_ir["truth_table"]]
+        self.bad_rtl = _as_module(generate_reference_rtl({**spec_ir, "truth_table": zeroed}), self.module_name)
+        self._rng = random.Random(f"{name}:{self.module_name}:{seed}")
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, stream: bool = False):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        ok = self._rng.random() < self.success_rate
+        text = json.dumps({
+            "module_name": self.module_name,
+            "rtl_code": self.good_rtl if ok else self.bad_rtl,
+            "testbench_code": f"module tb_{self.module_name}; initial $finish; endmodule",
+            "explanation": f"{self.name} answer",
+            "changes_made": f"{self.name} answer",
+        })
+        prompt_text = prompt if isinstance(prompt, str) else " ".join(str(p) for p in prompt)
+        return StubResponse(text, len(prompt_text) // 4, len(text) // 4)
+
+
+def _as_module(ref_rtl: str, module_name: str) -> str:
+    return rename_module(ref_rtl, f"{module_name}_ref", module_name)
+
+
+def stub_cascade(spec_ir: dict, tiers: list[tuple] = STUB_TIERS, seed: int = 0, **cascade_kwargs) -> ModelCascade:
+    """ModelCascade over fresh stubs for one spec."""
+    return ModelCascade(
+        [(name, StubModel(name, spec_ir, latency, rate, seed)) for name, latency, rate, _ in tiers],
+        **cascade_kwargs,
+    )
+
+
+def compare_cascade(
+    specs_dir: Path,
+    output_dir: Path,
+    tiers: list[tuple] = STUB_TIERS,
+    max_retries: int = 4,
+    seeds: int = 3,
+) -> dict:
+    """
+    Run every combinational truth-table spec in specs_dir with each single stub model and with
+    the cascade (seeds repetitions each). Reports pass rate, LLM calls, latency, tokens and
+    cost (tier price per 1k tokens) per strategy.
+    """
+    from pipeline import run_pipeline
+
+    prices = {name: price for name, _, _, price in tiers}
+    specs = [json.loads(p.read_text()) for p in sorted(Path(specs_dir).glob("*.json"))]
+    specs = [s for s in specs if generate_reference_rtl(s) is not None]
+    strategies = {tier[0]: [tier] for tier in tiers}
+    strategies["cascade"] = tiers
+    options = dict(
+        max_retries=max_retries,
+        run_post_pass=False,
+        use_retrieval=False,
+        use_fingerprint=False,
+        adaptive_repair=False,
+        use_equivalence=False,
+    )
+
+    summary = {}
+    for strategy, strategy_tiers in strategies.items():
+        runs = []
+        for seed in range(seeds):
+            for spec in specs:
+                cascade = stub_cascade(spec, strategy_tiers, seed=seed)
+                start = time.monotonic()
+                state = run_pipeline(
+                    spec, None, work_dir=output_dir / strategy / f"{spec['module_name']}_{seed}",
+                    cascade=cascade, **options,
+                )
+                report = cascade.report()
+                runs.append({
+                    "status": state["status"],
+                    "calls": len(report["calls"]),
+                    "wall_s": time.monotonic() - start,
+                    "llm_s": sum(c["latency_s"] for c in report["calls"]),
+                    "tokens": sum(c["tokens"] for c in report["calls"]),
+                    "cost": sum(c["tokens"] / 1000 * prices[c["model"]] for c in report["calls"]),
+                })
+        n = max(len(runs), 1)
+        summary[strategy] = {
+            "runs": len(runs),
+            "pass_rate": round(sum(r["status"] == "PASS" for r in runs) / n, 3),
+            "mean_calls": round(sum(r["calls"] for r in runs) / n, 2),
+            "mean_llm_s": round(sum(r["llm_s"] for r in runs) / n, 3),
+            "mean_tokens": round(sum(r["tokens"] for r in runs) / n, 1),
+            "mean_cost": round(sum(r["cost"] for r in runs) / n, 4),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(json.dumps(compare_cascade(Path(sys.argv[1]), Path(sys.argv[2] if len(sys.argv) > 2 else "work/cascade_eval")), indent=2))
@@ -0,0 +1,204 @@
+"""
+Hierarchical mode - generate and verify leaf submodules in parallel, then integrate.
+Each (sub-)spec is cached by content hash, so only failing modules are regenerated.
+"""
+import json
+import shutil
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from config import MAX_RETRIES, WORK_DIR
+from spec.hierarchy import children, spec_hash
+from pipeline import run_pipeline
+from store.design_index import DesignIndex
+from store.repair_stats import RepairStats
+
+
+def _cache_lookup(cache_dir: Path, key: str) -> Path | None:
+    """Return cached verified RTL for a sub-spec hash, if any."""
+    entry = cache_dir / key
+    meta = entry / "result.json"
+    rtl = entry / "final_dut.sv"
+    if meta.exists() and rtl.exists() and json.loads(meta.read_text()).get("status") == "PASS":
+        return rtl
+    return None
+
+
+def _cache_store(cache_dir: Path, key: str, spec: dict, rtl_path: Path, state: dict) -> Path:
+    entry = cache_dir / key
+    entry.mkdir(parents=True, exist_ok=True)
+    cached = entry / "final_dut.sv"
+    shutil.copyfile(rtl_path, cached)
+    (entry / "spec.json").write_text(json.dumps(spec, indent=2))
+    (entry / "result.json").write_text(json.dumps({
+        "status": state["status"],
+        "iterations": state["iteration"],
+        "metrics": state["metrics"],
+    }, indent=2))
+    return cached
+
+
+def _run_module(
+    spec: dict,
+    text_model,
+    work_dir: Path,
+    cache_dir: Path,
+    child_rtl: list[Path],
+    max_retries: int,
+    pipeline_kwargs: dict,
+) -> dict:
+    """Verify one module against its own spec-derived tests (or reuse the cache)."""
+    name = spec.get("module_name", "dut")
+    key = spec_hash(spec)
+    cached = _cache_lookup(cache_dir, key)
+    if cached:
+        print(f"♻️  {name}: cached ({key})")
+        return {"module": name, "hash": key, "status": "PASS", "cached": True, "iterations": 0, "rtl_path": cached}
+
+    state = run_pipeline(
+        spec,
+        text_model,
+        work_dir=work_dir / f"{name}_{key}",
+        max_retries=max_retries,
+        run_post_pass=False,
+        extra_sources=child_rtl,
+        **pipeline_kwargs,
+    )
+    result = {"module": name, "hash": key, "status": state["status"], "cached": False, "iterations": state["iteration"]}
+    final_dut = work_dir / f"{name}_{key}" / "final_dut.sv"
+    if state["status"] == "PASS" and final_dut.exists():
+        result["rtl_path"] = _cache_store(cache_dir, key, spec, final_dut, state)
+    return result
+
+
+def _nodes(spec: dict, path: str | None = None) -> list[tuple[str, dict, list[str]]]:
+    """
+    (path, spec, child paths) for every module instance, children before parents. Paths are
+    module names joined by "/" (siblings sharing a name get "#<i>"), so the same leaf under
+    different parents, or with different parameters, keeps its own result.
+    """
+    path = path or spec.get("module_name", "dut")
+    nodes, kid_paths, seen = [], [], {}
+    for kid in children(spec):
+        name = kid.get("module_name", "dut")
+        seen[name] = seen.get(name, 0) + 1
+        kid_path = f"{path}/{name}" + (f"#{seen[name] - 1}" if seen[name] > 1 else "")
+        nodes += _nodes(kid, kid_path)
+        kid_paths.append(kid_path)
+    return nodes + [(path, spec, kid_paths)]
+
+
+def _check_module_names(nodes: list[tuple[str, dict, list[str]]]) -> None:
+    """
+    Raise ValueError if two different sub-specs share a module_name: the integrated design
+    would define that module twice, and parents refer to children by name.
+    """
+    first: dict[str, tuple[str, str]] = {}
+    for path, spec, _ in nodes:
+        name, key = spec.get("module_name", "dut"), spec_hash(spec)
+        seen_path, seen_key = first.setdefault(name, (path, key))
+        if seen_key != key:
+            raise ValueError(
+                f"module '{name}' has two different specs ({seen_path} vs {path}); give one a distinct module_name"
+            )
+
+
+def run_hierarchical(
+    spec_ir: dict,
+    text_model,
+    work_dir: Path | None = None,
+    cache_dir: Path | None = None,
+    max_workers: int = 4,
+    max_retries: int = MAX_RETRIES,
+    **pipeline_kwargs,
+) -> dict:
+    """
+    Verify a hierarchical Spec IR bottom-up. Siblings run in parallel on one shared pool, each
+    with its own spec-derived TB; a parent is only submitted once all its children pass, and
+    compiles against their verified RTL. Returns {status, modules (keyed by instance path),
+    final_rtl}. All modules share one DesignIndex and RepairStats; raises ValueError if one
+    module_name is used for two different sub-specs.
+    """
+    work_dir = work_dir or WORK_DIR
+    cache_dir = cache_dir or work_dir / "module_cache"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    nodes = _nodes(spec_ir)
+    _check_module_names(nodes)
+    # one instance each for all threads, so their JSONL appends and in-memory views stay consistent
+    pipeline_kwargs.setdefault("design_index", DesignIndex())
+    pipeline_kwargs.setdefault("repair_stats", RepairStats())
+    top_path = nodes[-1][0]
+    results: dict[str, dict] = {}
+    waiting = {path: (spec, kids) for path, spec, kids in nodes}  # children-first order
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running: dict = {}  # future -> instance paths (identical sub-specs share one run)
+        by_hash: dict = {}
+
+        def submit_ready() -> None:
+            for path, (spec, kids) in list(waiting.items()):
+                if any(k not in results for k in kids):
+                    continue
+                del waiting[path]
+                failed = [k for k in kids if results[k]["status"] != "PASS"]
+                if failed:
+                    results[path] = {
+                        "module": spec.get("module_name", "dut"),
+                        "path": path,
+                        "hash": spec_hash(spec),
+                        "status": "BLOCKED",
+                        "blocked_by": failed,
+                    }
+                    continue
+                key = spec_hash(spec)
+                if key in by_hash and by_hash[key] in running:
+                    running[by_hash[key]].append(path)
+                    continue
+                child_rtl = _ordered_sources(path, nodes, results)
+                future = pool.submit(
+                    _run_module, spec, text_model, work_dir, cache_dir, child_rtl, max_retries, pipeline_kwargs
+                )
+                by_hash[key] = future
+                running[future] = [path]
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                for path in running.pop(future):
+                    results[path] = {**future.result(), "path": path}
+            submit_ready()
+
+    top = results[top_path]
+    final_rtl = None
+    if top["status"] == "PASS":
+        final_rtl = work_dir / "final_design.sv"
+        sources = _ordered_sources(top_path, nodes, results) + [top["rtl_path"]]
+        final_rtl.write_text("\n\n".join(Path(p).read_text() for p in sources))
+
+    print("\n--- Hierarchy ---")
+    for path, _, _ in nodes:
+        r = results[path]
+        tag = "cached" if r.get("cached") else f"{r.get('iterations', 0)} iter"
+        print(f"  {path:32s} {r['status']:8s} ({tag})")
+    return {
+        "status": top["status"],
+        "modules": {
+            path: {k: (str(v) if isinstance(v, Path) else v) for k, v in results[path].items()}
+            for path, _, _ in nodes
+        },
+        "final_rtl": str(final_rtl) if final_rtl else None,
+    }
+
+
+def _ordered_sources(path: str, nodes: list[tuple[str, dict, list[str]]], results: dict[str, dict]) -> list[Path]:
+    """Verified RTL of every descendant of `path`, leaves first (deduplicated)."""
+    paths = []
+    for node_path, _, _ in nodes:
+        if not node_path.startswith(path + "/"):
+            continue
+        rtl = results[node_path].get("rtl_path")
+        if rtl and rtl not in paths:
+            paths.append(rtl)
+    return paths
@@ -5,7 +5,7 @@ from pathlib import Path
 import fitz  # PyMuPDF
 from PIL import Image
 
-from spec.canonicalizer import canonicalize_from_pdf, canonicalize_from_text
+from spec.canonicalizer import canonicalize_batch, canonicalize_from_pdf, canonicalize_from_text
 from spec.schema import validate_spec_ir, spec_ir_to_summary
 
 
@@ -70,3 +70,8 @@ def extract_from_text(raw_text: str, text_model) -> tuple[dict, str]:
     spec_ir, _ = canonicalize_from_text(raw_text, text_model)
     validate_spec_ir(spec_ir)
     return spec_ir, spec_ir_to_summary(spec_ir)
+
+
+def extract_from_texts(raw_texts: list[str], text_model) -> list[tuple[dict, str]]:
+    """Canonicalize many short descriptions, several per LLM call. Returns [(spec_ir, summary)]."""
+    return [(spec_ir, spec_ir_to_summary(spec_ir)) for spec_ir, _ in canonicalize_batch(raw_texts, text_model)]
@@ -0,0 +1,205 @@
+"""Shared LLM helpers - token accounting and streamed, schema-constrained JSON output."""
+import json
+import re
+from typing import Any, Callable
+
+_BAD_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])|\\u(?![0-9a-fA-F]{4})')
+
+
+class StructuredOutputError(ValueError):
+    """The model did not return a JSON object with the required keys (after one re-request)."""
+
+
+def response_usage(response) -> dict:
+    """Prompt/output token counts from a Gemini response (zeros if unavailable)."""
+    meta = getattr(response, "usage_metadata", None)
+    prompt = getattr(meta, "prompt_token_count", 0) or 0
+    output = getattr(meta, "candidates_token_count", 0) or 0
+    return {"prompt_tokens": prompt, "output_tokens": output, "total_tokens": prompt + output}
+
+
+def string_schema(*keys: str) -> dict:
+    """Response schema for a flat object of required string fields (in prompt order)."""
+    return {
+        "type": "object",
+        "properties": {k: {"type": "string"} for k in keys},
+        "required": list(keys),
+    }
+
+
+def _loads_lenient(text: str) -> Any:
+    """json.loads allowing raw control chars; on failure, escape stray backslashes (e.g. `\\d` in RTL)."""
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(_BAD_ESCAPE.sub(r"\\\\", text), strict=False)
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for one top-level JSON object. feed() returns the members whose value
+    closed in that chunk, so large string fields can be acted on before the response ends.
+    Text before the opening brace (e.g. a markdown fence) and after the closing brace is ignored.
+    """
+
+    def __init__(self):
+        self.fields: dict[str, Any] = {}
+        self.errors: list[str] = []
+        self.done = False
+        self._state = "start"
+        self._buf: list[str] = []
+        self._key = ""
+        self._escape = False
+        self._depth = 0
+        self._in_str = False
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        completed = []
+        for ch in text:
+            if self.done:
+                break
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_wait"
+            elif state == "key_wait":
+                if ch == '"':
+                    self._state, self._buf = "key", []
+                elif ch == "}":
+                    self.done = True
+            elif state in ("key", "string"):
+                if self._escape:
+                    self._escape = False
+                    self._buf.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._buf.append(ch)
+                elif ch == '"':
+                    raw = "".join(self._buf)
+                    if state == "key":
+                        self._key, self._state = _loads_lenient(f'"{raw}"'), "colon"
+                    else:
+                        completed.append(self._finish('"' + raw + '"'))
+                        self._state = "key_wait"
+                else:
+                    self._buf.append(ch)
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value_wait"
+            elif state == "value_wait":
+                if ch == '"':
+                    self._state, self._buf = "string", []
+                elif not ch.isspace():
+                    self._state, self._buf, self._depth, self._in_str = "scalar", [], 0, False
+                    self._scalar(ch, completed)
+            elif state == "scalar":
+                self._scalar(ch, completed)
+        return completed
+
+    def _scalar(self, ch: str, completed: list) -> None:
+        """Numbers, literals and nested objects/arrays: close at the first top-level , or }."""
+        if self._in_str:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_str = False
+        elif ch == '"':
+            self._in_str = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]" and self._depth > 0:
+            self._depth -= 1
+        elif ch in ",}" and self._depth == 0:
+            completed.append(self._finish("".join(self._buf).strip()))
+            if ch == "}":
+                self.done = True
+            self._state = "key_wait"
+            return
+        self._buf.append(ch)
+
+    def _finish(self, raw: str) -> tuple[str, Any]:
+        try:
+            value = _loads_lenient(raw)
+        except json.JSONDecodeError:
+            self.errors.append(self._key)
+            value = raw
+        self.fields[self._key] = value
+        return self._key, value
+
+
+def _parse_whole(text: str) -> dict | None:
+    """Fallback for a finished response: strip fences / surrounding prose, parse leniently."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        value = _loads_lenient(text[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text or ""
+    except ValueError:  # chunk without text parts (e.g. finish/safety metadata only)
+        return ""
+
+
+def generate_structured(
+    model,
+    prompt,
+    schema: dict | None = None,
+    on_field: Callable[[str, Any, dict], None] | None = None,
+    stream: bool = True,
+    max_attempts: int = 2,
+) -> dict:
+    """
+    Request JSON (response_mime_type + optional response_schema) and parse it as it streams.
+    on_field(key, value, fields_so_far) is called as soon as each top-level member is complete.
+    Invalid escapes are repaired in place; the request is repeated only if the object is still
+    unparseable or misses required keys. Returns the object with "usage" summed over attempts.
+    Models that do not accept generation_config/stream (e.g. offline stubs) are called plainly.
+    """
+    config = {"response_mime_type": "application/json"}
+    if schema:
+        config["response_schema"] = schema
+    required = (schema or {}).get("required", [])
+    usage = {"prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    text = ""
+
+    for _ in range(max_attempts):
+        try:
+            response = model.generate_content(prompt, generation_config=config, stream=stream)
+            chunks = response if stream else [response]
+        except TypeError:
+            response = model.generate_content(prompt)
+            chunks = [response]
+
+        parser = IncrementalJSONParser()
+        parts = []
+        for chunk in chunks:
+            piece = _chunk_text(chunk)
+            parts.append(piece)
+            for key, value in parser.feed(piece):
+                if on_field:
+                    on_field(key, value, parser.fields)
+        for key, value in response_usage(response).items():
+            usage[key] += value
+
+        text = "".join(parts)
+        result = parser.fields if parser.done and not parser.errors else _parse_whole(text)
+        if result is not None and all(k in result for k in required):
+            result["usage"] = usage
+            return result
+
+        note = (
+            "\n\nYour previous response was not a valid JSON object"
+            + (f" with keys {', '.join(required)}" if required else "")
+            + ". Respond again with ONLY the JSON object; escape backslashes and quotes inside strings."
+        )
+        prompt = prompt + [note] if isinstance(prompt, list) else prompt + note
+
+    raise StructuredOutputError(f"Unparseable JSON response: {text[:200]!r}")
@@ -0,0 +1,256 @@
+"""
+PPA optimization - area/delay rewrites of a verified design, each re-verified against the
+spec-derived oracle, proven equivalent to the verified baseline (Yosys miter) and measured with
+Yosys; the Pareto front over (area, logic depth) is kept.
+"""
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+from agents.writer import optimize_rtl
+from budget import RunBudget
+from spec.reference_netlist import is_combinational_table
+from spec.test_generator import generate_spec_tb
+from store.design_index import rename_module
+from tools.equivalence import run_design_equivalence, run_equivalence_check
+from tools.metrics import parse_yosys_stat
+from tools.sim_parser import SimOutputChecker
+from tools.simulator import run_simulation, write_and_compile
+from tools.structural import run_structural_check
+from tools.synthesis import run_synthesis
+from tools.yosys_worker import yosys_available
+
+
+def area_of(metrics: dict) -> float | None:
+    """Area proxy: liberty chip area, else CMOS transistor estimate, else cell count."""
+    for key in ("chip_area", "transistors", "num_cells"):
+        if metrics.get(key) is not None:
+            return metrics[key]
+    return None
+
+
+def _point(metrics: dict) -> tuple[float, float]:
+    inf = float("inf")
+    area, depth = area_of(metrics), metrics.get("logic_depth")
+    return (inf if area is None else area, inf if depth is None else depth)
+
+
+def dominates(a: dict, b: dict) -> bool:
+    """a is no worse than b in area and depth, and better in at least one."""
+    pa, pb = _point(a), _point(b)
+    return all(x <= y for x, y in zip(pa, pb)) and pa != pb
+
+
+def pareto_front(candidates: list[dict]) -> list[dict]:
+    """Non-dominated candidates (by their "metrics"); identical points keep the earliest."""
+    front = []
+    for c in candidates:
+        if any(dominates(o["metrics"], c["metrics"]) for o in candidates):
+            continue
+        if any(_point(o["metrics"]) == _point(c["metrics"]) for o in front):
+            continue
+        front.append(c)
+    return front
+
+
+def _improvement(base: float | None, new: float | None) -> float | None:
+    if not base or new is None:
+        return None
+    return round(100.0 * (base - new) / base, 1)
+
+
+def _verify(
+    rtl_code: str,
+    module_name: str,
+    spec_ir: dict,
+    spec_tb: str | None,
+    work_dir: Path,
+    dut_prefix: str,
+    use_equivalence: bool,
+    baseline_path: Path,
+) -> tuple[bool, str]:
+    """
+    Same oracle as run_pipeline (structural check, then SAT equivalence or the spec TB), plus a
+    proof that the rewrite matches the verified baseline: the random spec TB only checks X/Z and
+    invariants, so e.g. outputs tied to constants would pass it.
+    """
+    dut_code = dut_prefix + rtl_code
+    dut_path = work_dir / f"{module_name}.sv"
+    dut_path.write_text(dut_code)
+    structural = run_structural_check(dut_path, work_dir, top_module=module_name)
+    if structural["findings"]:
+        return False, "structural: " + ", ".join(f"{f['kind']}:{f['net']}" for f in structural["findings"])
+    passed, reason = _spec_oracle(dut_path, dut_code, module_name, spec_ir, spec_tb, work_dir, use_equivalence)
+    if not passed:
+        return False, reason
+
+    gate_path = work_dir / f"{module_name}_gate.sv"
+    gate_path.write_text(rtl_code)  # submodules come from the baseline file
+    equiv = run_design_equivalence(
+        baseline_path, f"{module_name}_gold", gate_path, module_name, work_dir,
+        sequential=not is_combinational_table(spec_ir),
+    )
+    if equiv["equivalent"] is not True:
+        return False, "not proven equivalent to baseline" if equiv["equivalent"] is None else "differs from baseline"
+    return True, f"{reason}, equivalent to baseline"
+
+
+def _spec_oracle(
+    dut_path: Path,
+    dut_code: str,
+    module_name: str,
+    spec_ir: dict,
+    spec_tb: str | None,
+    work_dir: Path,
+    use_equivalence: bool,
+) -> tuple[bool, str]:
+    if use_equivalence:
+        equiv = run_equivalence_check(dut_path, spec_ir, work_dir, top_module=module_name)
+        if equiv["equivalent"] is not None:
+            return equiv["equivalent"], "equivalent" if equiv["equivalent"] else "not equivalent"
+    if spec_tb is None:
+        return False, "no spec-derived oracle"
+    compile_result, sim_out = write_and_compile(dut_code, spec_tb, module_name, work_dir)
+    if compile_result["returncode"] != 0:
+        return False, "compile: " + compile_result["stderr"][:200]
+    run_result = run_simulation(sim_out, work_dir, checker=SimOutputChecker(chunk_size=256), stop_on_mismatch=True)
+    check = run_result.get("check") or {}
+    if run_result["returncode"] != 0 or not check.get("passed", False):
+        return False, run_result.get("abort_reason") or f"{check.get('mismatches', 0)} mismatches"
+    return True, "spec TB passed"
+
+
+def _measure(rtl_code: str, module_name: str, work_dir: Path, dut_prefix: str) -> dict:
+    dut_path = work_dir / f"{module_name}.sv"
+    dut_path.write_text(dut_prefix + rtl_code)
+    result = run_synthesis(dut_path, work_dir, top_module=module_name, logic_depth=True)
+    return parse_yosys_stat(result["stdout"]) if result["returncode"] == 0 else {}
+
+
+def optimize_design(
+    spec_ir: dict,
+    rtl_code: str,
+    module_name: str,
+    text_model,
+    work_dir: Path,
+    iterations: int = 4,
+    goals: tuple[str, ...] = ("area", "delay"),
+    stimulus_seed: int = 0,
+    extra_sources: list[Path] | None = None,
+    use_equivalence: bool = True,
+    budget: RunBudget | None = None,
+    on_call: Callable[[float, int, str], None] | None = None,
+) -> dict:
+    """
+    Optimization mode for a verified design (the baseline). Each iteration asks for a rewrite
+    toward the next goal (cycling through `goals`), starting from the front member that is best
+    for that goal, then re-verifies and measures it (cells, area, logic depth from Yosys `ltp -noff`).
+    Returns {baseline, front, best: {goal: candidate}, improvement: {area_pct, depth_pct},
+    candidates, tokens, skipped}; skipped is the reason no rewrite was tried (else None). Candidate RTL is under work_dir/<n>/ and summarized in ppa.json.
+    on_call(latency_s, tokens, status) is told about every optimize_rtl call (e.g. ModelCascade.record).
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    budget = budget or RunBudget()
+    spec_tb = generate_spec_tb(spec_ir, seed=stimulus_seed)
+    dut_prefix = "".join(Path(p).read_text() + "\n\n" for p in extra_sources or [])
+    use_equivalence = use_equivalence and yosys_available()
+    tokens = {}
+
+    base_dir = work_dir / "0"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    baseline_path = base_dir / f"{module_name}_gold.sv"
+    gold_rtl = rename_module(rtl_code, module_name, f"{module_name}_gold")
+    skipped = None
+    if gold_rtl is None:
+        # no gold copy to prove rewrites against - never verify against an empty file
+        skipped = f"module {module_name} not found in the verified RTL"
+        iterations = 0
+    else:
+        baseline_path.write_text(dut_prefix + gold_rtl)
+    baseline = {
+        "iteration": 0,
+        "goal": "baseline",
+        "status": "PASS",
+        "metrics": _measure(rtl_code, module_name, base_dir, dut_prefix),
+        "rtl_path": str(base_dir / f"{module_name}.sv"),
+    }
+    verified = [baseline]
+    candidates = [baseline]
+    sources = {0: rtl_code}
+    print(f"\n🎯 PPA optimization: baseline {baseline['metrics']}")
+    if skipped:
+        print(f"⚠️  PPA optimization skipped: {skipped}")
+
+    for i in range(1, iterations + 1):
+        if not budget.allow("optimize", i):
+            print("⏱️  Budget: optimization stopped")
+            break
+        goal = goals[(i - 1) % len(goals)]
+        key = 0 if goal == "area" else 1
+        start = min(pareto_front(verified), key=lambda c: _point(c["metrics"])[key])
+        cand_dir = work_dir / str(i)
+        cand_dir.mkdir(parents=True, exist_ok=True)
+        row = {"iteration": i, "goal": goal, "from": start["iteration"], "status": "FAIL", "metrics": {}}
+        candidates.append(row)
+        print(f"🤖 Optimizer: {goal} rewrite of candidate {start['iteration']}...")
+        t0 = time.monotonic()
+        try:
+            result = optimize_rtl(
+                spec_ir, sources[start["iteration"]], module_name, goal, start["metrics"], text_model
+            )
+        except Exception as e:
+            row["reason"] = f"generation failed: {e}"
+            budget.record("optimize", time.monotonic() - t0)
+            if on_call:
+                on_call(time.monotonic() - t0, 0, "ERROR")
+            continue
+        llm_s = time.monotonic() - t0
+        for k, v in (result.get("usage") or {}).items():
+            tokens[k] = tokens.get(k, 0) + (v or 0)
+        budget.charge_tokens((result.get("usage") or {}).get("total_tokens", 0))
+        new_rtl = result["rtl_code"]
+        row["changes"] = result.get("changes_made", "")[:300]
+
+        if result.get("module_name", module_name) != module_name:
+            row["reason"] = f"module renamed to {result.get('module_name')}"
+        else:
+            passed, reason = _verify(
+                new_rtl, module_name, spec_ir, spec_tb, cand_dir, dut_prefix, use_equivalence, baseline_path
+            )
+            row["reason"] = reason
+            if passed:
+                row["status"] = "PASS"
+                row["metrics"] = _measure(new_rtl, module_name, cand_dir, dut_prefix)
+                row["rtl_path"] = str(cand_dir / f"{module_name}.sv")
+                sources[i] = new_rtl
+                verified.append(row)
+        budget.record("optimize", time.monotonic() - t0)
+        if on_call:
+            on_call(llm_s, (result.get("usage") or {}).get("total_tokens", 0), row["status"])
+        print(f"   {row['status']} ({row['reason']}) {row['metrics']}")
+
+    front = pareto_front(verified)
+    best = {
+        "area": min(verified, key=lambda c: _point(c["metrics"])[0]),
+        "delay": min(verified, key=lambda c: _point(c["metrics"])[1]),
+    }
+    base_m = baseline["metrics"]
+    report = {
+        "baseline": baseline,
+        "front": front,
+        "best": best,
+        "improvement": {
+            "area_pct": _improvement(area_of(base_m), area_of(best["area"]["metrics"])),
+            "depth_pct": _improvement(base_m.get("logic_depth"), best["delay"]["metrics"].get("logic_depth")),
+        },
+        "candidates": candidates,
+        "tokens": tokens,
+        "skipped": skipped,
+    }
+    (work_dir / "ppa.json").write_text(json.dumps(report, indent=2))
+    print(
+        f"🎯 Pareto front: {len(front)} design(s); best area {report['improvement']['area_pct']}%, "
+        f"best depth {report['improvement']['depth_pct']}% vs baseline"
+    )
+    return report
@@ -3,20 +3,42 @@ RTL Agent Pipeline v3
 Two-Oracle: Spec-derived TB (primary) + Icarus | Action-constrained repair
 """
 import json
+import re
 import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from pathlib import Path
 
-from config import MAX_RETRIES, WORK_DIR
+from config import ADAPTIVE_EXPLORATION, ADAPTIVE_MIN_SAMPLES, MAX_RETRIES, RETRIEVAL_TOP_K, SIM_TIMEOUT, WORK_DIR
+from budget import RunBudget
+from cascade import ModelCascade
+from optimize import optimize_design
 from spec.schema import spec_ir_to_summary
 from spec.test_generator import generate_spec_tb
 from agents.writer import generate_rtl
 from agents.reviewer import repair_rtl
-from controller import classify_failure
+from controller import choose_action, classify_failure, failure_signature
 from tools.simulator import write_and_compile, run_simulation
 from tools.verilator import run_verilator
 from tools.synthesis import run_synthesis
 from tools.visualizer import run_visualize
 from tools.metrics import parse_yosys_stat
+from tools.formal import FORMAL_STEP_TIMEOUT, run_formal_oracle
+from tools.equivalence import run_equivalence_check
+from tools.sim_parser import SimOutputChecker
+from tools.minimizer import minimize_failure, run_stimulus, stimulus_failed
+from tools.structural import run_structural_check
+from tools.yosys_worker import yosys_available
+from spec.formal_props import generate_formal_wrapper
+from spec.reference_netlist import is_combinational_table
+from spec.prompt_encoding import encoding_stats
+from spec.hierarchy import spec_hash
+from spec.fingerprint import spec_fingerprint
+from store.design_index import DesignIndex
+from store.repair_stats import RepairStats
+from store.history import HistoryRecord
 
 
 def _banner(msg: str, char: str = "=") -> None:
@@ -29,6 +51,40 @@ def _verilator_available() -> bool:
     return shutil.which("verilator") is not None
 
 
+def _sby_available() -> bool:
+    return shutil.which("sby") is not None
+
+
+def _with_sources(rtl_code: str, extra_sources: list[Path] | None) -> str:
+    """DUT file content: submodule sources first, then the generated module."""
+    if not extra_sources:
+        return rtl_code
+    parts = [Path(p).read_text() for p in extra_sources]
+    return "\n\n".join(parts + [rtl_code])
+
+
+def _add_usage(total: dict, usage: dict | None) -> None:
+    for key, value in (usage or {}).items():
+        total[key] = total.get(key, 0) + (value or 0)
+
+
+def _best_so_far(history: list) -> "HistoryRecord | None":
+    """Latest attempt that at least compiled."""
+    for h in reversed(history):
+        if h.excerpt("compile_result")["returncode"] == 0:
+            return h
+    return None
+
+
+def _rtl_module_name(rtl_code: str) -> str | None:
+    m = re.search(r"^\s*module\s+(\w+)", rtl_code, re.MULTILINE)
+    return m.group(1) if m else None
+
+
+def _sim_check_passed(run_result: dict) -> bool:
+    return (run_result.get("check") or {}).get("passed", True)
+
+
 def run_pipeline(
     spec_ir: dict,
     text_model,
@@ -36,14 +92,66 @@ def run_pipeline(
     max_retries: int = MAX_RETRIES,
     run_post_pass: bool = True,
     use_verilator: bool = True,
+    use_formal: bool = True,
+    use_equivalence: bool = True,
+    stimulus_seed: int = 0,
+    stop_on_mismatch: bool = False,
+    extra_sources: list[Path] | None = None,
+    use_retrieval: bool = True,
+    retrieval_k: int = RETRIEVAL_TOP_K,
+    design_index: DesignIndex | None = None,
+    adaptive_repair: bool = True,
+    repair_stats: RepairStats | None = None,
+    budget: RunBudget | None = None,
+    render_diagram: bool = False,
+    minimize_failures: bool = True,
+    use_structural: bool = True,
+    optimize_iterations: int = 0,
+    optimize_goals: tuple[str, ...] = ("area", "delay"),
+    use_fingerprint: bool = True,
+    cascade: ModelCascade | None = None,
 ) -> dict:
     """
     Main agent loop. Two-Oracle: spec-derived TB (primary) or LLM TB (fallback).
-    Returns state dict with best_candidate, history, metrics, svg_path.
+    use_formal: run SymbiYosys on Spec IR invariants/latency alongside simulation.
+    use_equivalence: prove combinational truth-table specs with one SAT call instead of simulating rows.
+    stimulus_seed: seed for constrained-random spec TB when there is no truth table.
+    stop_on_mismatch: kill vvp at the first spec TB mismatch instead of running all vectors.
+    extra_sources: already-verified submodule RTL files, prepended to the DUT for every tool.
+    use_retrieval: seed the writer with the top-k nearest passing designs from the local index
+    (design_index, default config.DESIGN_INDEX_PATH); passing designs are added back to it.
+    adaptive_repair: let recorded outcomes (repair_stats, default config.REPAIR_STATS_PATH) pick
+    the repair action and whether to repair or regenerate. Outcomes are recorded either way.
+    budget: time/token RunBudget. Near the deadline optional stages (Verilator, formal, synthesis,
+    SVG) are skipped and the loop stops with status BUDGET_EXHAUSTED and the best candidate so far.
+    render_diagram: draw the circuit after PASS (size-capped, see tools.visualizer). Off by default;
+    diagrams can be rendered later from final_dut.sv with run_visualize.
+    minimize_failures: on a spec TB mismatch, delta-debug the stimulus down to a minimal failing
+    subset for the Reviewer; the next candidate runs that subset first and skips the full
+    simulation if it still fails.
+    use_structural: Yosys `proc; check` before compiling - combinational loops, latches,
+    multiple/missing drivers reject the candidate (FIX_LOOP/FIX_LATCH/FIX_DRIVERS) without simulating.
+    optimize_iterations: after PASS, spend this many LLM calls on area/delay rewrites (optimize_goals),
+    each re-verified by the same oracle; the Pareto front is reported in state["ppa"].
+    final_dut.sv stays the verified baseline; front members are under work_dir/optimize/<n>/.
+    use_fingerprint: if design_index holds a verified design with the same canonical Spec IR
+    fingerprint (spec.fingerprint), attempt 1 re-verifies it (renamed to this module) instead of
+    calling the Writer. Needs a functional confirming oracle: SAT equivalence or the truth-table TB.
+    cascade: ModelCascade used instead of text_model - starts on the cheapest model the spec's
+    complexity allows, escalates on repeated failure signatures; per-model stats go to feedback.
+    Returns state dict with best_candidate, history, metrics, svg_path and oracle: "truth-table"
+    (spec TB with expected rows), "random-smoke" (spec TB with random vectors - X/Z and invariants
+    only, so a PASS is weak and never indexed) or "llm-tb". History entries are
+    HistoryRecords: bounded excerpts in memory, full RTL/TB/tool logs under work_dir/attempts/<run_id>/<n>.
     """
     work_dir = work_dir or WORK_DIR
     work_dir.mkdir(parents=True, exist_ok=True)
     use_verilator = use_verilator and _verilator_available()
+    use_formal = use_formal and _sby_available() and generate_formal_wrapper(spec_ir) is not None
+    formal_pool = ThreadPoolExecutor(max_workers=1) if use_formal else None
+    lint_pool = ThreadPoolExecutor(max_workers=1) if use_verilator else None
+    use_equivalence = use_equivalence and is_combinational_table(spec_ir) and yosys_available()
+    use_structural = use_structural and yosys_available()
 
     state = {
         "best_candidate": None,
@@ -53,27 +161,116 @@ def run_pipeline(
         "metrics": {},
         "svg_path": None,
         "spec_ir": spec_ir,
+        "tokens": {},
+        "retrieved": [],
+        "repair_steps": [],
+        "ppa": None,
+        "fingerprint": {"fingerprint": spec_fingerprint(spec_ir), "hit": None},
+        "oracle": None,
     }
+    run_id = uuid.uuid4().hex[:12]
+    budget = budget or RunBudget()
+    repair_stats = repair_stats or RepairStats()
+    stats_table = repair_stats.table() if adaptive_repair else None
 
     summary = spec_ir_to_summary(spec_ir)
-    spec_tb = generate_spec_tb(spec_ir)
+    prompt_encoding = encoding_stats(spec_ir)
+    spec_tb = generate_spec_tb(spec_ir, seed=stimulus_seed)
+    # What a simulation PASS means: only the truth-table TB compares outputs against expected values
+    if spec_tb:
+        state["oracle"] = "truth-table" if spec_ir.get("truth_table") else "random-smoke"
+    else:
+        state["oracle"] = "llm-tb"
     rtl_code = tb_code = module_name = None
+    if (use_retrieval or use_fingerprint) and design_index is None:
+        design_index = DesignIndex()  # not `or`: an empty index is falsy
+    cached = None
+    # Reuse only behind a functional oracle: SAT equivalence or the truth-table TB (a random-smoke
+    # PASS cannot confirm a description-only match)
+    functional_oracle = use_equivalence or state["oracle"] == "truth-table"
+    if use_fingerprint and not extra_sources and functional_oracle:
+        cached = design_index.exact(spec_ir)
+        state["fingerprint"]["hit"] = cached["source_module"] if cached else None
+    if use_retrieval:
+        examples = design_index.query(spec_ir, k=retrieval_k)
+        state["retrieved"] = [{"module_name": ex["module_name"], "score": ex["score"]} for ex in examples]
+    else:
+        examples = []
 
     _banner("RTL AGENT PIPELINE v3 - Two-Oracle", "=")
-    if spec_tb:
+    if state["oracle"] == "random-smoke":
+        print("📋 Spec-derived random testbench (smoke only: no expected values, PASS is not indexed)")
+    elif spec_tb:
         print("📋 Spec-derived testbench available (primary oracle)")
     else:
         print("📋 Using LLM testbench (auxiliary oracle)")
+    if prompt_encoding["encoded"]:
+        print(
+            f"📋 Compact prompt encoding ({', '.join(prompt_encoding['encoded'])}): "
+            f"{prompt_encoding['raw_chars']} → {prompt_encoding['compact_chars']} chars"
+        )
+    if cascade:
+        cascade.start(spec_ir)
+        print(f"📋 Model cascade: starting on {cascade.name} ({cascade.start_reason})")
+    if cached:
+        print(f"📋 Fingerprint match: verified design '{cached['source_module']}' (confirmation run only)")
+    if examples:
+        print("📋 Few-shot references: " + ", ".join(f"{r['module_name']} ({r['score']})" for r in state["retrieved"]))
+    if use_equivalence:
+        print("📋 SAT equivalence against truth-table reference netlist")
+    if use_formal:
+        print("📋 Formal properties from Spec IR (third oracle)")
+
+    early_lint: dict = {}
+    smoke = None  # last minimized failing stimulus, replayed first on the next candidate
+
+    def lint_on_stream(key: str, value, fields: dict) -> None:
+        """Start Verilator as soon as rtl_code has streamed in (TB/explanation still arriving)."""
+        if key != "rtl_code" or not lint_pool or not isinstance(value, str):
+            return
+        name = fields.get("module_name") or _rtl_module_name(value)
+        if not name or not budget.allow("verilator", state["iteration"]):
+            return
+        dut_path = work_dir / f"{name}.sv"
+        dut_path.write_text(_with_sources(value, extra_sources))
+        print("\n⚙️  Tool: Verilator lint (started while response streams)...")
+        early_lint.update(
+            rtl=value, module=name, start=time.monotonic(),
+            future=lint_pool.submit(run_verilator, dut_path, work_dir, name),
+        )
 
     for attempt in range(1, max_retries + 1):
+        early_lint.clear()
+        if attempt > 1 and not budget.can_iterate(attempt):
+            print(f"⏱️  Budget exhausted after {budget.elapsed():.1f}s / {budget.tokens_used} tokens")
+            state["status"] = "BUDGET_EXHAUSTED"
+            state["best_candidate"] = _best_so_far(state["history"])
+            break
         state["iteration"] = attempt
+        iteration_start = time.monotonic()
+        model = cascade.model if cascade else text_model
+        call = None
         _banner(f"ITERATION {attempt} / {max_retries}", "-")
 
-        # Step 1: Generate or Repair
-        if attempt == 1:
+        # Step 1: Generate or Repair (or reuse a fingerprint-matched verified design)
+        if attempt == 1 and cached:
+            rtl_code = cached["rtl_code"]
+            tb_code = spec_tb or ""
+            module_name = cached["module_name"]
+            print(f"🗂️  Reusing verified RTL of '{cached['source_module']}' as {module_name}")
+        elif attempt == 1:
             print("🤖 Writer Agent: Generating RTL + Testbench...")
+            llm_start = time.monotonic()
             try:
-                result = generate_rtl(spec_ir, text_model)
+                with budget.stage("llm"):
+                    result = generate_rtl(spec_ir, model, examples=examples, on_field=lint_on_stream)
+                _add_usage(state["tokens"], result.get("usage"))
+                budget.charge_tokens((result.get("usage") or {}).get("total_tokens", 0))
+                call = {
+                    "kind": "generate",
+                    "latency_s": time.monotonic() - llm_start,
+                    "tokens": (result.get("usage") or {}).get("total_tokens", 0),
+                }
                 rtl_code = result["rtl_code"]
                 tb_code = result["testbench_code"]
                 module_name = result["module_name"]
@@ -81,110 +278,345 @@ def run_pipeline(
                 print(f"  → {result.get('explanation', '')[:200]}...")
             except Exception as e:
                 print(f"❌ Generation failed: {e}")
+                if cascade:
+                    cascade.record(attempt, "generate", time.monotonic() - llm_start, 0, "ERROR")
                 break
         else:
             prev = state["history"][-1]
-            action_type = prev.get("action_type", "FIX_FUNCTION")
-            print(f"🔧 Reviewer Agent: Repairing ({action_type})...")
-            try:
-                result = repair_rtl(
-                    spec_ir,
-                    rtl_code,
-                    tb_code,
-                    prev["compile_result"],
-                    prev["run_result"],
-                    action_type,
-                    attempt,
-                    max_retries,
-                    text_model,
+            rule_action = prev.get("action_type", "FIX_FUNCTION")
+            if adaptive_repair:
+                choice = choose_action(
+                    rule_action, prev["signature"], stats_table, ADAPTIVE_MIN_SAMPLES, ADAPTIVE_EXPLORATION
                 )
+            else:
+                choice = {"action": rule_action, "mode": "repair", "reason": "rule"}
+            action_type = choice["action"]
+            step = {
+                "run_id": run_id,
+                "spec_hash": spec_hash(spec_ir),
+                "attempt": attempt,
+                "signature": prev["signature"],
+                "rule_action": rule_action,
+                "action": action_type,
+                "mode": choice["mode"],
+                "tokens": 0,
+                "model": cascade.name if cascade else None,
+            }
+            state["repair_steps"].append(step)
+            llm_start = time.monotonic()
+            try:
+                with budget.stage("llm"):
+                    if choice["mode"] == "regenerate":
+                        print(f"🤖 Writer Agent: Regenerating from scratch ({choice['reason']})...")
+                        result = generate_rtl(spec_ir, model, examples=examples, on_field=lint_on_stream)
+                    else:
+                        print(f"🔧 Reviewer Agent: Repairing ({action_type}, {choice['reason']})...")
+                        result = repair_rtl(
+                            spec_ir,
+                            rtl_code,
+                            tb_code,
+                            prev["compile_result"],
+                            prev["run_result"],
+                            action_type,
+                            attempt,
+                            max_retries,
+                            model,
+                            formal_result=prev.get("formal_result"),
+                            equiv_result=prev.get("equiv_result"),
+                            on_field=lint_on_stream,
+                            minimized=prev.get("minimize_result"),
+                            structural_result=prev.get("structural_result"),
+                        )
+                step["tokens"] = (result.get("usage") or {}).get("total_tokens", 0)
+                call = {"kind": choice["mode"], "latency_s": time.monotonic() - llm_start, "tokens": step["tokens"]}
+                budget.charge_tokens(step["tokens"])
+                _add_usage(state["tokens"], result.get("usage"))
                 rtl_code = result["rtl_code"]
                 tb_code = result["testbench_code"]
                 module_name = result.get("module_name", module_name)
-                print(f"  → Changes: {result.get('changes_made', '')[:300]}...")
+                print(f"  → Changes: {result.get('changes_made', result.get('explanation', ''))[:300]}...")
             except Exception as e:
                 print(f"❌ Repair failed: {e}")
+                step["outcome"] = "ERROR"
+                if cascade:
+                    cascade.record(attempt, choice["mode"], time.monotonic() - llm_start, 0, "ERROR")
                 break
 
         # Use spec-derived TB if available, else LLM TB
         active_tb = spec_tb if spec_tb else tb_code
+        dut_code = _with_sources(rtl_code, extra_sources)
 
         # Step 2: Verilator (optional, fast lint)
         verilator_result = None
-        if use_verilator:
+        if early_lint.get("rtl") == rtl_code and early_lint.get("module") == module_name:
+            verilator_result = early_lint["future"].result()
+            budget.record("verilator", time.monotonic() - early_lint["start"])
+            if verilator_result["returncode"] != 0:
+                print(f"   Verilator: {verilator_result['stderr'][:300]}...")
+        elif use_verilator and budget.allow("verilator", attempt):
             dut_path = work_dir / f"{module_name}.sv"
-            dut_path.write_text(rtl_code)
+            dut_path.write_text(dut_code)
             print("\n⚙️  Tool: Verilator lint...")
-            verilator_result = run_verilator(dut_path, work_dir, module_name)
+            with budget.stage("verilator"):
+                verilator_result = run_verilator(dut_path, work_dir, module_name)
             if verilator_result["returncode"] != 0:
                 print(f"   Verilator: {verilator_result['stderr'][:300]}...")
 
-        # Step 3: Icarus compile + simulate
-        print("\n⚙️  Tool: Icarus compile...")
-        compile_result, sim_out = write_and_compile(
-            rtl_code, active_tb, module_name, work_dir
-        )
+        # Step 3: Yosys structural pre-check - loops/latches/drivers are rejected before compiling
+        structural_result = None
+        if use_structural:
+            dut_path = work_dir / f"{module_name}.sv"
+            dut_path.write_text(dut_code)
+            print("\n⚙️  Tool: Yosys structural check...")
+            with budget.stage("structural"):
+                structural_result = run_structural_check(dut_path, work_dir, top_module=module_name)
+            for finding in structural_result["findings"]:
+                print(f"   {finding['kind']}: {finding['net']}")
+
+        # Step 4: Icarus compile + simulate
+        if structural_result and structural_result["findings"]:
+            compile_result = {
+                "returncode": 1,
+                "stdout": "",
+                "stderr": "Not compiled: structural check failed (see STRUCTURAL CHECK)",
+                "skipped": True,
+            }
+        else:
+            print("\n⚙️  Tool: Icarus compile...")
+            with budget.stage("compile"):
+                compile_result, sim_out = write_and_compile(
+                    dut_code, active_tb, module_name, work_dir
+                )
         print(f"   Return code: {compile_result['returncode']}")
         if compile_result["stderr"]:
             print(f"   Stderr: {compile_result['stderr'][:400]}...")
 
         run_result = None
-        if compile_result["returncode"] == 0:
-            print("\n⚙️  Tool: vvp simulation...")
-            run_result = run_simulation(sim_out, work_dir)
-            print(f"   Return code: {run_result['returncode']}")
-            print(f"   Output: {run_result['stdout'][:600]}...")
-
-        # Step 4: Controller classifies failure
-        action_type = classify_failure(verilator_result, compile_result, run_result)
-        if compile_result["returncode"] == 0 and (not run_result or run_result["returncode"] == 0):
+        formal_result = None
+        equiv_result = None
+        minimize_result = None
+        if compile_result["returncode"] == 0 and use_equivalence:
+            print("\n⚙️  Tool: Yosys SAT equivalence...")
+            with budget.stage("equivalence"):
+                equiv_result = run_equivalence_check(
+                    work_dir / f"{module_name}.sv", spec_ir, work_dir, top_module=module_name
+                )
+            print(f"   Equivalent: {equiv_result['equivalent']}")
+            if equiv_result.get("counterexample"):
+                print(f"   Counterexample: {equiv_result['counterexample']}")
+        # A SAT verdict (either way) replaces row-by-row simulation
+        equiv_decided = equiv_result is not None and equiv_result["equivalent"] is not None
+
+        if compile_result["returncode"] == 0 and not (equiv_decided and not equiv_result["equivalent"]):
+            # Formal runs concurrently with vvp and is cancelled on a definitive sim failure
+            formal_future = cancel_formal = None
+            if use_formal and budget.allow("formal", attempt):
+                print("\n⚙️  Tool: SymbiYosys (background)...")
+                formal_start = time.monotonic()
+                cancel_formal = threading.Event()
+                formal_future = formal_pool.submit(
+                    run_formal_oracle,
+                    work_dir / f"{module_name}.sv",
+                    spec_ir,
+                    work_dir / "formal",
+                    module_name,
+                    cancel_formal,
+                    timeout=budget.cap_timeout(FORMAL_STEP_TIMEOUT),
+                    deadline=budget.deadline(),
+                )
+
+            if smoke and not equiv_decided:
+                print(f"\n⚙️  Tool: smoke test ({smoke['size']} minimized vectors from the last failure)...")
+                with budget.stage("sim"):
+                    smoke_result = run_stimulus(
+                        dut_code, spec_ir, smoke["stimulus"], work_dir / "minimize",
+                        module_name, stimulus_seed, timeout=budget.cap_timeout(SIM_TIMEOUT),
+                    )
+                if stimulus_failed(smoke_result):
+                    print("   Still fails - full simulation skipped")
+                    run_result = {**smoke_result, "smoke": True}
+                    minimize_result = {
+                        **smoke, "check": smoke_result["check"], "stdout": smoke_result["stdout"]
+                    }
+                else:
+                    print("   Passes - running full simulation")
+
+            if equiv_decided:
+                print("\n⚙️  Tool: vvp simulation skipped (proven equivalent)")
+            elif run_result is None:
+                print("\n⚙️  Tool: vvp simulation...")
+                with budget.stage("sim"):
+                    run_result = run_simulation(
+                        sim_out,
+                        work_dir,
+                        timeout=budget.cap_timeout(SIM_TIMEOUT),
+                        checker=SimOutputChecker(chunk_size=256) if spec_tb else None,
+                        stop_on_mismatch=stop_on_mismatch,
+                    )
+                print(f"   Return code: {run_result['returncode']}")
+                if run_result["abort_reason"]:
+                    print(f"   Aborted: {run_result['abort_reason']}")
+                print(f"   Output: {run_result['stdout'][:600]}...")
+                if run_result.get("check"):
+                    check = run_result["check"]
+                    check["oracle"] = state["oracle"]
+                    print(
+                        f"   Check: {check['samples']} samples, "
+                        f"{check['mismatches'] + check['explicit_mismatches']} mismatches"
+                    )
+
+            if formal_future:
+                if run_result and (run_result["returncode"] != 0 or not _sim_check_passed(run_result)):
+                    cancel_formal.set()
+                try:
+                    formal_result = formal_future.result(timeout=budget.remaining_time())
+                except FutureTimeout:
+                    print("⏱️  Budget: formal cancelled at the deadline")
+                    cancel_formal.set()
+                    formal_result = formal_future.result()
+                budget.record("formal", time.monotonic() - formal_start)
+                print(f"   Formal: {formal_result.get('status')}")
+
+            check = (run_result or {}).get("check") or {}
+            if (
+                minimize_failures
+                and spec_tb
+                and not minimize_result
+                and check.get("passed") is False
+                and run_result.get("abort_reason") in (None, "mismatch")
+                and budget.allow("minimize", attempt)
+            ):
+                print("\n⚙️  Tool: delta-debugging the failing stimulus...")
+                with budget.stage("minimize"):
+                    minimize_result = minimize_failure(
+                        dut_code, spec_ir, work_dir / "minimize", module_name, stimulus_seed,
+                        hint=[f["index"] for f in check.get("first_failures", []) if "index" in f],
+                        timeout=budget.cap_timeout(SIM_TIMEOUT),
+                        deadline=budget.deadline(),
+                    )
+                if minimize_result:
+                    print(
+                        f"   Minimal failing set: {minimize_result['size']} of {minimize_result['total']} "
+                        f"({minimize_result['tests']} runs)"
+                    )
+            smoke = minimize_result
+
+        # Step 5: Controller classifies failure
+        action_type = classify_failure(
+            verilator_result, compile_result, run_result, formal_result, equiv_result, structural_result
+        )
+        if (
+            compile_result["returncode"] == 0
+            and (not run_result or (run_result["returncode"] == 0 and _sim_check_passed(run_result)))
+            and not (formal_result and formal_result.get("passed") is False)
+            and not (equiv_result and equiv_result.get("equivalent") is False)
+        ):
             status = "PASS"
         else:
             status = "FAIL"
+        if attempt > 1:
+            step["outcome"] = status
 
         state["status"] = status
-        state["history"].append({
-            "attempt": attempt,
-            "status": status,
-            "action_type": action_type,
-            "verilator_result": verilator_result,
-            "compile_result": compile_result,
-            "run_result": run_result,
-            "rtl_code": rtl_code,
-            "tb_code": tb_code,
-            "module_name": module_name,
-        })
+        state["history"].append(HistoryRecord(
+            work_dir / "attempts" / run_id / str(attempt),
+            attempt=attempt,
+            status=status,
+            action_type=action_type,
+            signature=failure_signature(
+                verilator_result, compile_result, run_result, formal_result, equiv_result, structural_result
+            ) if status == "FAIL" else None,
+            repair=None if attempt == 1 else {k: step[k] for k in ("action", "mode", "rule_action")},
+            module_name=module_name,
+            rtl_code=rtl_code,
+            tb_code=tb_code,
+            verilator_result=verilator_result,
+            compile_result=compile_result,
+            run_result=run_result,
+            formal_result=formal_result,
+            equiv_result=equiv_result,
+            minimize_result=minimize_result,
+            structural_result=structural_result,
+        ))
 
+        budget.record("iteration", time.monotonic() - iteration_start)
         print(f"\n📊 Decision: {status} (action: {action_type})")
+        if cascade and call:
+            cascade.record(attempt, call["kind"], call["latency_s"], call["tokens"], status)
+            event = cascade.observe(attempt, status, state["history"][-1].signature)
+            if event:
+                print(f"⬆️  Model cascade: {event['from']} → {event['to']} ({event['reason']})")
 
         if status == "PASS":
             state["best_candidate"] = state["history"][-1]
             print("✅ Verification passed. Running post-pass...")
+            if use_retrieval and not extra_sources and not (cached and attempt == 1):
+                if state["oracle"] == "random-smoke":
+                    print("   Not indexed: random-smoke PASS (no expected values checked)")
+                elif design_index.add(spec_ir, rtl_code, {"iterations": attempt, "oracle": state["oracle"]}):
+                    print(f"   Indexed for retrieval ({len(design_index)} designs)")
 
             if run_post_pass:
                 dut_path = work_dir / f"{module_name}.sv"
-                if dut_path.exists():
+                if dut_path.exists() and budget.allow("synthesis", attempt):
                     print("\n⚙️  Tool: Yosys synthesis...")
-                    syn_result = run_synthesis(dut_path, work_dir, top_module=module_name)
+                    with budget.stage("synthesis"):
+                        syn_result = run_synthesis(dut_path, work_dir, top_module=module_name)
                     if syn_result["returncode"] == 0:
                         state["metrics"] = parse_yosys_stat(syn_result["stdout"])
                         print(f"   Metrics: {state['metrics']}")
 
+                if render_diagram and dut_path.exists() and budget.allow("svg", attempt):
                     print("\n⚙️  Tool: Yosys show (circuit diagram)...")
-                    vis_result = run_visualize(dut_path, work_dir, top_module=module_name)
+                    with budget.stage("svg"):
+                        vis_result = run_visualize(dut_path, work_dir, top_module=module_name)
                     if vis_result.get("svg_path"):
                         state["svg_path"] = vis_result["svg_path"]
-                        print(f"   SVG: {vis_result['svg_path']}")
+                        print(f"   SVG ({vis_result['mode']}, {vis_result['num_cells']} cells): {vis_result['svg_path']}")
+
+            if optimize_iterations and yosys_available() and (spec_tb or use_equivalence):
+                state["ppa"] = optimize_design(
+                    spec_ir,
+                    rtl_code,
+                    module_name,
+                    model,
+                    work_dir / "optimize",
+                    iterations=optimize_iterations,
+                    goals=optimize_goals,
+                    stimulus_seed=stimulus_seed,
+                    extra_sources=extra_sources,
+                    use_equivalence=use_equivalence,
+                    budget=budget,
+                    on_call=(
+                        (lambda latency_s, tokens, status: cascade.record(attempt, "optimize", latency_s, tokens, status))
+                        if cascade else None
+                    ),
+                )
+                _add_usage(state["tokens"], state["ppa"]["tokens"])
             break
         elif attempt == max_retries:
             print(f"⛔ Max retries ({max_retries}) reached.")
-            for h in reversed(state["history"]):
-                if h["compile_result"]["returncode"] == 0:
-                    state["best_candidate"] = h
-                    break
+            state["best_candidate"] = _best_so_far(state["history"])
         else:
             print(f"🔄 Sending to Reviewer ({action_type})...")
 
+    if state["status"] not in ("PASS", "BUDGET_EXHAUSTED") and budget.exhausted:
+        # ran out during the final attempt or a failed LLM call - not a plain FAIL
+        print(f"⏱️  Budget exhausted after {budget.elapsed():.1f}s / {budget.tokens_used} tokens")
+        state["status"] = "BUDGET_EXHAUSTED"
+        state["best_candidate"] = state["best_candidate"] or _best_so_far(state["history"])
+
+    if formal_pool:
+        formal_pool.shutdown()
+    if lint_pool:
+        lint_pool.shutdown()
+
+    for step in state["repair_steps"]:
+        step.setdefault("outcome", "ERROR")
+        step["run_status"] = state["status"]
+        step["run_iterations"] = state["iteration"]
+    repair_stats.record_run(state["repair_steps"])
+
     # Final report
     _banner("FINAL REPORT")
     print(f"Status:      {state['status']}")
@@ -196,7 +628,8 @@ def run_pipeline(
 
         final_dut = work_dir / "final_dut.sv"
         final_tb = work_dir / "final_tb.sv"
-        final_dut.write_text(best["rtl_code"])
+        best_rtl = best["rtl_code"]
+        final_dut.write_text(best_rtl)
         final_tb.write_text(best["tb_code"])
         print(f"\n💾 Saved: {final_dut}, {final_tb}")
 
@@ -206,27 +639,35 @@ def run_pipeline(
             print(f"🖼️  Diagram: {state['svg_path']}")
 
         print("\n--- RTL (excerpt) ---")
-        print(best["rtl_code"][:1200] + ("..." if len(best["rtl_code"]) > 1200 else ""))
+        print(best_rtl[:1200] + ("..." if len(best_rtl) > 1200 else ""))
     else:
         print("❌ No passing candidate found.")
 
     feedback = {
+        "run_id": run_id,
         "final_status": state["status"],
         "total_iterations": state["iteration"],
         "metrics": state["metrics"],
         "svg_path": state["svg_path"],
         "spec_derived_tb": spec_tb is not None,
-        "history": [
-            {
-                "attempt": h["attempt"],
-                "status": h["status"],
-                "action_type": h.get("action_type"),
-                "compile_rc": h["compile_result"]["returncode"],
-                "sim_rc": h["run_result"]["returncode"] if h["run_result"] else None,
-            }
-            for h in state["history"]
-        ],
+        "oracle": state["oracle"],
+        "sat_equivalence": use_equivalence,
+        "prompt_encoding": prompt_encoding,
+        "retrieval": state["retrieved"],
+        "fingerprint": state["fingerprint"],
+        "cascade": cascade.report() if cascade else None,
+        "tokens": state["tokens"],
+        "budget": budget.report(),
+        "history": [h.summary() for h in state["history"]],
+        "ppa": {
+            "improvement": state["ppa"]["improvement"],
+            "skipped": state["ppa"]["skipped"],
+            "front": [
+                {k: c.get(k) for k in ("iteration", "goal", "metrics", "rtl_path")} for c in state["ppa"]["front"]
+            ],
+        } if state["ppa"] else None,
     }
+    state["budget"] = feedback["budget"]
     print("\n--- Feedback ---")
     print(json.dumps(feedback, indent=2))
     return state
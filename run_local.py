@@ -6,6 +6,7 @@ Set GOOGLE_API_KEY or GEMINI_API_KEY in environment.
 Usage:
   export GOOGLE_API_KEY=your_key
   python run_local.py
+  RTL_MODEL_CASCADE=1 python run_local.py   # cost-aware model cascade (config.CASCADE_MODELS)
 """
 import os
 import sys
@@ -15,7 +16,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 import google.generativeai as genai
 
-from config import API_KEY, TEXT_MODEL, VISION_MODEL, WORK_DIR, MAX_RETRIES
+from cascade import ModelCascade
+from config import API_KEY, CASCADE_MODELS, MAX_RETRIES, TEXT_MODEL, USE_MODEL_CASCADE, VISION_MODEL, WORK_DIR
 from input_layer import extract_from_pdf, extract_from_pdf_bytes, extract_from_text
 from pipeline import run_pipeline
 
@@ -63,12 +65,18 @@ def main():
     print(summary[:500] + ("..." if len(summary) > 500 else ""))
     print("-" * 40)
 
+    cascade = None
+    if USE_MODEL_CASCADE:
+        cascade = ModelCascade([(name, genai.GenerativeModel(name)) for name in CASCADE_MODELS])
+
     state = run_pipeline(
         spec_ir,
         text_model,
         work_dir=work_dir,
         max_retries=MAX_RETRIES,
         run_post_pass=True,
+        render_diagram=True,
+        cascade=cascade,
     )
     return state
 
@@ -1,7 +1,19 @@
 """Spec IR - structured hardware specification for Two-Oracle agent."""
 from .schema import SPEC_IR_SCHEMA, validate_spec_ir, spec_ir_to_summary, ACTION_TYPES
-from .canonicalizer import canonicalize_from_text, canonicalize_from_pdf
+from .canonicalizer import (
+    canonicalize_batch,
+    canonicalize_from_pdf,
+    canonicalize_from_text,
+    decompose_spec_ir,
+)
 from .test_generator import generate_spec_tb
+from .formal_props import generate_formal_wrapper
+from .stimulus import generate_stimulus
+from .hierarchy import module_tree, spec_hash
+from .prompt_encoding import encoding_stats, expand_sop, minimize_sop
+from .reference_netlist import generate_reference_rtl
+from .parameters import instantiate, sweep_points
+from .fingerprint import canonical_spec, has_functional_spec, spec_fingerprint
 
 __all__ = [
     "SPEC_IR_SCHEMA",
@@ -10,5 +22,20 @@ __all__ = [
     "ACTION_TYPES",
     "canonicalize_from_text",
     "canonicalize_from_pdf",
+    "canonicalize_batch",
+    "decompose_spec_ir",
     "generate_spec_tb",
+    "generate_formal_wrapper",
+    "generate_stimulus",
+    "module_tree",
+    "spec_hash",
+    "encoding_stats",
+    "minimize_sop",
+    "expand_sop",
+    "generate_reference_rtl",
+    "instantiate",
+    "sweep_points",
+    "canonical_spec",
+    "has_functional_spec",
+    "spec_fingerprint",
 ]
@@ -1,13 +1,24 @@
-"""Spec Canonicalizer - raw text/images → Spec IR (single LLM call)."""
-import json
-import re
+"""Spec Canonicalizer - raw text/images → Spec IR (single LLM call, or one call per batch of texts)."""
 from typing import Any
 
+from config import CANONICALIZE_BATCH_CHARS, CANONICALIZE_BATCH_MAX
+from llm import StructuredOutputError, generate_structured
+from .schema import spec_ir_to_summary, validate_spec_ir
 
-def _strip_markdown(raw: str) -> str:
-    raw = re.sub(r"^```[a-z]*\n?", "", raw, flags=re.MULTILINE)
-    raw = re.sub(r"```$", "", raw, flags=re.MULTILINE)
-    return raw.strip()
+_TEXT_SPEC_FORMAT = """{
+  "module_name": "<module name>",
+  "description": "<what the circuit does>",
+  "inputs": [{"name": "<port>", "width": <bits>, "description": "<optional>"}],
+  "outputs": [{"name": "<port>", "width": <bits>, "description": "<optional>"}],
+  "clock": "<clk port or null>",
+  "reset": "<reset port or null>",
+  "truth_table": [[<in1>, <in2>, ...], <out>] or null,
+  "fsm_states": ["S0", "S1", ...] or null,
+  "fsm_transitions": [{"from": "S0", "to": "S1", "cond": "x"}] or null,
+  "invariants": ["<property>"] or null,
+  "latency": <cycles or null>,
+  "source": "text"
+}"""
 
 
 def canonicalize_from_text(raw_text: str, model) -> tuple[dict, str]:
@@ -22,32 +33,100 @@ TEXT:
 {raw_text}
 
 Output ONLY valid JSON in this exact format (no markdown, no backticks):
-{{
-  "module_name": "<module name>",
-  "description": "<what the circuit does>",
-  "inputs": [{{"name": "<port>", "width": <bits>, "description": "<optional>"}}],
-  "outputs": [{{"name": "<port>", "width": <bits>, "description": "<optional>"}}],
-  "clock": "<clk port or null>",
-  "reset": "<reset port or null>",
-  "truth_table": [[<in1>, <in2>, ...], <out>] or null,
-  "fsm_states": ["S0", "S1", ...] or null,
-  "fsm_transitions": [{{"from": "S0", "to": "S1", "cond": "x"}}] or null,
-  "invariants": ["<property>"] or null,
-  "latency": <cycles or null>,
-  "source": "text"
-}}
+{_TEXT_SPEC_FORMAT}
 
 If truth tables or FSM details are in the text, include them. Use null for missing optional fields."""
 
-    response = model.generate_content(prompt)
-    raw = _strip_markdown(response.text.strip())
     try:
-        spec = json.loads(raw)
-    except json.JSONDecodeError:
+        spec = generate_structured(model, prompt, stream=False)
+        spec.pop("usage", None)
+    except StructuredOutputError:
         spec = _fallback_spec(raw_text, "text")
     return spec, raw_text[:500]
 
 
+def plan_batches(
+    texts: list[str],
+    max_chars: int = CANONICALIZE_BATCH_CHARS,
+    max_specs: int = CANONICALIZE_BATCH_MAX,
+) -> list[list[int]]:
+    """
+    Pack consecutive descriptions into batches of at most max_specs items and max_chars of
+    description text (bounds prompt size; max_specs bounds the response). A description
+    longer than max_chars gets a batch of its own.
+    """
+    batches, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        if current and (len(current) >= max_specs or size + len(text) > max_chars):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def canonicalize_batch(
+    texts: list[str],
+    model,
+    max_chars: int = CANONICALIZE_BATCH_CHARS,
+    max_specs: int = CANONICALIZE_BATCH_MAX,
+) -> list[tuple[dict, str]]:
+    """
+    Canonicalize many short descriptions with one LLM call per batch (see plan_batches) -
+    for rate-limited models where request count, not tokens, is the bottleneck.
+    Each returned spec is checked with validate_spec_ir; items that are missing or invalid,
+    and whole batches whose response does not parse or has missing/duplicate "index" fields,
+    are re-run one by one with canonicalize_from_text. Returns [(spec_ir, summary)] in input order.
+    """
+    results: list[tuple[dict, str] | None] = [None] * len(texts)
+    for batch in plan_batches(texts, max_chars, max_specs):
+        specs = _canonicalize_group([texts[i] for i in batch], model) if len(batch) > 1 else {}
+        for pos, i in enumerate(batch):
+            spec = specs.get(pos)
+            if spec is not None and validate_spec_ir(spec)[0]:
+                results[i] = (spec, texts[i][:500])
+            else:
+                results[i] = canonicalize_from_text(texts[i], model)
+    return results
+
+
+def _canonicalize_group(texts: list[str], model) -> dict[int, dict]:
+    """
+    One call for several descriptions. Returns {index: spec} for the elements that came back,
+    or {} if any element lacks an integer index or repeats one (the caller re-runs them singly).
+    """
+    items = "\n\n".join(f"DESCRIPTION {i}:\n{text}" for i, text in enumerate(texts))
+    prompt = f"""You are an expert hardware design engineer. Extract a structured hardware specification from EACH of the {len(texts)} descriptions below, independently.
+
+{items}
+
+Output ONLY valid JSON (no markdown, no backticks): an object with one "specs" array holding exactly {len(texts)} objects, in description order. Each object has "index" (the DESCRIPTION number) plus this format:
+{_TEXT_SPEC_FORMAT}
+
+If truth tables or FSM details are in a description, include them. Use null for missing optional fields."""
+
+    try:
+        response = generate_structured(model, prompt, stream=False)
+    except StructuredOutputError:
+        return {}
+    specs = response.get("specs")
+    if not isinstance(specs, list):
+        return {}
+    # Positions are not trusted: one omitted element would shift every later spec onto the
+    # wrong description. Any element without a valid, unique index discards the whole batch.
+    by_index = {}
+    for spec in specs:
+        if not isinstance(spec, dict):
+            return {}
+        index = spec.pop("index", None)
+        if type(index) is not int or not 0 <= index < len(texts) or index in by_index:
+            return {}
+        by_index[index] = spec
+    return by_index
+
+
 def canonicalize_from_pdf(raw_text: str, images: list, vision_model) -> tuple[dict, str]:
     """
     Canonicalize PDF content (text + images) into Spec IR.
@@ -76,15 +155,63 @@ def canonicalize_from_pdf(raw_text: str, images: list, vision_model) -> tuple[di
         f"EXTRACTED TEXT:\n{raw_text}"
     )
     content_parts = [prompt] + (images if images else [])
-    response = vision_model.generate_content(content_parts)
-    raw = _strip_markdown(response.text.strip())
     try:
-        spec = json.loads(raw)
-    except json.JSONDecodeError:
+        spec = generate_structured(vision_model, content_parts, stream=False)
+        spec.pop("usage", None)
+    except StructuredOutputError:
         spec = _fallback_spec(raw_text, "paper")
     return spec, raw_text[:500]
 
 
+def decompose_spec_ir(spec_ir: dict, model, max_modules: int = 6) -> dict:
+    """
+    Split a flat Spec IR into leaf submodules (single LLM call).
+    Returns a copy of spec_ir with "submodules" filled in, or spec_ir unchanged
+    if the model declines or the response does not validate.
+    """
+    prompt = f"""You are an expert hardware architect. Decompose this design into at most {max_modules}
+independent leaf submodules that the top module will instantiate (e.g. datapath units, counters, FSMs).
+Only decompose if it clearly helps; otherwise return an empty list.
+
+SPECIFICATION:
+{spec_ir_to_summary(spec_ir)}
+
+Output ONLY valid JSON (no markdown, no backticks):
+{{
+  "top_description": "<how the top module connects the submodules>",
+  "submodules": [
+    {{
+      "module_name": "<name>",
+      "description": "<what it does>",
+      "inputs": [{{"name": "<port>", "width": <bits>}}],
+      "outputs": [{{"name": "<port>", "width": <bits>}}],
+      "clock": "<clk or null>",
+      "reset": "<reset or null>",
+      "truth_table": null,
+      "fsm_states": null,
+      "fsm_transitions": null,
+      "invariants": null,
+      "latency": null,
+      "source": "{spec_ir.get('source', 'text')}"
+    }}
+  ]
+}}"""
+
+    try:
+        plan = generate_structured(model, prompt, stream=False)
+    except StructuredOutputError:
+        return spec_ir
+    subs = plan.get("submodules") or []
+    if not subs or not all(validate_spec_ir(sub)[0] for sub in subs):
+        return spec_ir
+
+    result = dict(spec_ir)
+    result["submodules"] = subs[:max_modules]
+    if plan.get("top_description"):
+        result["description"] = f"{spec_ir.get('description', '')}\n{plan['top_description']}".strip()
+    return result
+
+
 def _fallback_spec(raw_text: str, source: str) -> dict:
     """Minimal Spec IR when JSON parse fails."""
     return {
@@ -99,6 +226,7 @@ def _fallback_spec(raw_text: str, source: str) -> dict:
         "fsm_transitions": None,
         "invariants": None,
         "latency": None,
+        "submodules": None,
         "source": source,
     }
 
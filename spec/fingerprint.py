@@ -0,0 +1,85 @@
+"""
+Canonical Spec IR fingerprint - a hash of the functionally relevant fields only.
+Module name, `source` and port order do not change it, so repeated requests for the same
+circuit map to the same verified design. Description wording is ignored only when a truth
+table, FSM transitions or invariants pin down the function; otherwise it is the function.
+"""
+import hashlib
+import json
+
+from .reference_netlist import is_combinational_table, truth_table_cubes
+from .schema import port_list
+
+
+def _text(value) -> str:
+    return " ".join(str(value).split())
+
+
+def _ports(ports: list) -> list:
+    exprs = {p.get("name"): p.get("width_expr") for p in ports or [] if isinstance(p, dict)}
+    return sorted([name, width, exprs.get(name)] for name, width in port_list(ports))
+
+
+def _permute(bits: str, ports: list[tuple[str, int]], order: list[int]) -> str:
+    offsets = [0]
+    for _, width in ports:
+        offsets.append(offsets[-1] + width)
+    return "".join(bits[offsets[i]:offsets[i + 1]] for i in order)
+
+
+def _truth_table(spec: dict) -> list | None:
+    """Rows as (input bits, output bits) with ports in name order; row order kept only if clocked."""
+    if not spec.get("truth_table"):
+        return None
+    ins, outs, rows = truth_table_cubes(spec)
+    in_order = sorted(range(len(ins)), key=lambda i: ins[i][0])
+    out_order = sorted(range(len(outs)), key=lambda i: outs[i][0])
+    table = [[_permute(i, ins, in_order), _permute(o, outs, out_order)] for i, o in rows]
+    return sorted(table) if is_combinational_table(spec) else table
+
+
+def _latency(value):
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value
+
+
+def has_functional_spec(spec: dict) -> bool:
+    """True when the function is given by a truth table, FSM transitions or invariants."""
+    return bool(spec.get("truth_table") or spec.get("fsm_transitions") or spec.get("invariants"))
+
+
+def canonical_spec(spec: dict) -> dict:
+    """
+    Functionally relevant Spec IR: ports (name, width) sorted by name, clock/reset, truth table
+    (columns permuted to match), FSM (reset state first, the rest sorted), invariants,
+    latency, parameters and submodule fingerprints; plus the normalized description when
+    has_functional_spec is False (an adder and a subtractor with the same ports must differ).
+    """
+    states = [str(s) for s in spec.get("fsm_states") or []]
+    transitions = [
+        {k: _text(v) for k, v in t.items()} if isinstance(t, dict) else _text(t)
+        for t in spec.get("fsm_transitions") or []
+    ]
+    canonical = {
+        "inputs": _ports(spec.get("inputs")),
+        "outputs": _ports(spec.get("outputs")),
+        "clock": spec.get("clock") or None,
+        "reset": spec.get("reset") or None,
+        "truth_table": _truth_table(spec),
+        "fsm_states": (states[:1] + sorted(states[1:])) or None,
+        "fsm_transitions": sorted(json.dumps(t, sort_keys=True) for t in transitions) or None,
+        "invariants": sorted(_text(i) for i in spec.get("invariants") or []) or None,
+        "latency": _latency(spec.get("latency")),
+        "parameters": dict(sorted((spec.get("parameters") or {}).items())) or None,
+        "submodules": sorted(spec_fingerprint(c) for c in spec.get("submodules") or []) or None,
+    }
+    if not has_functional_spec(spec):
+        canonical["description"] = _text(spec.get("description", "")).lower()
+    return canonical
+
+
+def spec_fingerprint(spec: dict) -> str:
+    """Stable hash of canonical_spec (unlike spec_hash, ignores wording, name and port order)."""
+    blob = json.dumps(canonical_spec(spec), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
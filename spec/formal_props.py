@@ -0,0 +1,174 @@
+"""Spec IR → formal checker wrapper (invariants, reset, latency) - deterministic, no LLM."""
+import re
+
+from .schema import port_list, split_truth_row, value_bits
+
+_TOKEN = re.compile(
+    r"\s*(\d+'[bdhoBDHO][0-9a-fA-F_]+|\d+|[A-Za-z_][A-Za-z0-9_]*"
+    r"|->|==|!=|<=|>=|&&|\|\||<<|>>|[=()~!&|^<>+\-*/%?:\[\]{},])"
+)
+_WORD_OPS = {"and": "&&", "or": "||", "not": "!", "implies": "->"}
+_MAX_LATENCY_ROWS = 64
+
+
+def is_active_low(reset: str) -> bool:
+    """Guess reset polarity from the port name (rst_n, resetn, nrst → active low)."""
+    name = reset.lower()
+    return name.endswith("n") or name.startswith("n")
+
+
+def invariant_to_expr(text: str, port_names: set[str]) -> str | None:
+    """
+    Translate a Spec IR invariant into a Verilog boolean expression.
+    Only port names, literals and operators are accepted; free-form prose returns None.
+    Supports a single top-level `->` / `implies` and `=` as equality.
+    """
+    text = text.strip().rstrip(";").strip()
+    tokens, pos = [], 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m:
+            return None
+        tok = m.group(1)
+        pos = m.end()
+        tok = _WORD_OPS.get(tok.lower(), tok)
+        if tok == "=":
+            tok = "=="
+        if re.match(r"[A-Za-z_]", tok) and tok not in port_names:
+            return None
+        tokens.append(tok)
+    if not tokens or not any(t in port_names for t in tokens):
+        return None
+
+    if tokens.count("->") > 1:
+        return None
+    if "->" in tokens:
+        i = tokens.index("->")
+        lhs, rhs = " ".join(tokens[:i]), " ".join(tokens[i + 1:])
+        if not lhs or not rhs:
+            return None
+        return f"!({lhs}) || ({rhs})"
+    return " ".join(tokens)
+
+
+def _as_int(value, width: int) -> int | None:
+    """Fully specified truth-table value → int (None for don't-cares)."""
+    bits = value_bits(value, width)
+    if bits is None or "?" in bits:
+        return None
+    return int(bits, 2)
+
+
+def _latency_checks(
+    spec: dict,
+    ins: list[tuple[str, int]],
+    outs: list[tuple[str, int]],
+    latency: int,
+) -> list[tuple[str, str]]:
+    """(condition, expectation) pairs: inputs seen `latency` cycles ago → outputs now."""
+    checks = []
+    for row in (spec.get("truth_table") or [])[:_MAX_LATENCY_ROWS]:
+        row_ins, row_out = split_truth_row(row)
+        if len(row_ins) != len(ins):
+            continue
+        values = [_as_int(v, w) for v, (_, w) in zip(row_ins, ins)]
+        if any(v is None for v in values):
+            continue
+        cond = " && ".join(f"{n} == {w}'d{v}" for (n, w), v in zip(ins, values))
+        if isinstance(row_out, (list, tuple)) and len(row_out) == len(outs):
+            exp_vals = [_as_int(v, w) for v, (_, w) in zip(row_out, outs)]
+            if any(v is None for v in exp_vals):
+                continue
+            expect = " && ".join(f"{n} == {w}'d{v}" for (n, w), v in zip(outs, exp_vals))
+        else:
+            total = sum(w for _, w in outs)
+            v = _as_int(row_out, total)
+            if v is None:
+                continue
+            expect = "{" + ", ".join(n for n, _ in outs) + "}" + f" == {total}'d{v}"
+        checks.append((f"$past({cond}, {latency})", expect))
+    return checks
+
+
+def generate_formal_wrapper(spec: dict, module_name: str | None = None) -> str | None:
+    """
+    Build a `formal_<module>` wrapper that instantiates the DUT and asserts
+    Spec IR invariants (and latency for clocked truth tables) under `ifdef FORMAL`.
+    Reset is assumed active in the first cycle. Returns None when nothing is checkable.
+    """
+    name = module_name or spec.get("module_name", "dut")
+    clock = spec.get("clock")
+    reset = spec.get("reset")
+    outs = port_list(spec.get("outputs", []))
+    ins = port_list(spec.get("inputs", []))
+    data_ins = [(n, w) for n, w in ins if n not in (clock, reset)]
+    port_names = {n for n, _ in ins + outs}
+
+    invariants = []
+    for text in spec.get("invariants") or []:
+        expr = invariant_to_expr(str(text), port_names)
+        if expr:
+            invariants.append((str(text), expr))
+
+    latency = spec.get("latency")
+    latency_checks = []
+    if clock and isinstance(latency, int) and latency > 0:
+        latency_checks = _latency_checks(spec, data_ins, outs, latency)
+
+    if not invariants and not latency_checks:
+        return None
+
+    all_ins = list(ins)
+    for sig in (clock, reset):
+        if sig and sig not in {n for n, _ in all_ins}:
+            all_ins.insert(0, (sig, 1))
+
+    def decl(kind: str, n: str, w: int) -> str:
+        return f"{kind} [{w - 1}:0] {n}" if w > 1 else f"{kind} {n}"
+
+    lines = [
+        f"module formal_{name} (",
+        ",\n".join(f"  {decl('input', n, w)}" for n, w in all_ins),
+        ");",
+    ]
+    lines += [f"  {decl('wire', n, w)};" for n, w in outs]
+    conns = ", ".join(f".{n}({n})" for n, _ in all_ins + outs)
+    lines += [f"  {name} dut ({conns});", "", "`ifdef FORMAL"]
+
+    if clock:
+        in_reset = "1'b0"
+        if reset:
+            in_reset = f"({reset} == 1'b{0 if is_active_low(reset) else 1})"
+        lines += [
+            "  reg [7:0] f_cycles = 8'd0;",
+            f"  always @(posedge {clock}) if (f_cycles != 8'hff) f_cycles <= f_cycles + 8'd1;",
+        ]
+        if reset:
+            lines.append(f"  always @(*) if (f_cycles == 8'd0) assume({in_reset});")
+        lines.append(f"  always @(posedge {clock}) begin")
+        for text, expr in invariants:
+            lines.append(f"    // invariant: {text}")
+            lines.append(f"    if (f_cycles != 8'd0 && !{in_reset}) assert({expr});")
+        for cond, expect in latency_checks:
+            lines.append(f"    // latency: {latency} cycle(s)")
+            lines.append(
+                f"    if (f_cycles > 8'd{latency} && !$past({in_reset}, {latency}) && {cond}) "
+                f"assert({expect});"
+            )
+        lines.append("  end")
+    else:
+        lines.append("  always @(*) begin")
+        for text, expr in invariants:
+            lines.append(f"    // invariant: {text}")
+            lines.append(f"    assert({expr});")
+        lines.append("  end")
+
+    lines += ["`endif", "endmodule"]
+    return "\n".join(lines)
+
+
+def formal_depth(spec: dict) -> int:
+    """Initial BMC / induction depth from latency and FSM size."""
+    latency = spec.get("latency") if isinstance(spec.get("latency"), int) else 0
+    states = len(spec.get("fsm_states") or [])
+    return max(8, latency + states + 4)
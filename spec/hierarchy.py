@@ -0,0 +1,34 @@
+"""Spec IR module trees - split hierarchical specs into per-module sub-specs and hash them."""
+import hashlib
+import json
+
+
+def spec_hash(spec: dict) -> str:
+    """Stable content hash of a (sub-)spec, used as the per-module cache key."""
+    blob = json.dumps(spec, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def children(spec: dict) -> list[dict]:
+    return list(spec.get("submodules") or [])
+
+
+def is_leaf(spec: dict) -> bool:
+    return not children(spec)
+
+
+def module_tree(spec: dict) -> dict:
+    """Nested {name, hash, spec, children} view of a hierarchical Spec IR."""
+    return {
+        "name": spec.get("module_name", "dut"),
+        "hash": spec_hash(spec),
+        "spec": spec,
+        "children": [module_tree(c) for c in children(spec)],
+    }
+
+
+def iter_postorder(spec: dict):
+    """Yield every (sub-)spec with children before parents."""
+    for child in children(spec):
+        yield from iter_postorder(child)
+    yield spec
@@ -0,0 +1,77 @@
+"""Parameterized Spec IR families - width expressions over `parameters`, sweep points, overrides."""
+import ast
+import copy
+import itertools
+import operator
+
+_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.FloorDiv: operator.floordiv,
+    ast.Div: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+
+
+def _clog2(n: int) -> int:
+    return max(0, (int(n) - 1).bit_length())
+
+
+def eval_width(expr, parameters: dict) -> int:
+    """
+    Evaluate a port width: int, or an expression over parameter names such as
+    "WIDTH", "WIDTH+1", "2*DEPTH", "$clog2(DEPTH)". Raises ValueError if it cannot.
+    """
+    if isinstance(expr, bool):
+        raise ValueError(f"bad width: {expr!r}")
+    if isinstance(expr, int):
+        return expr
+    text = str(expr).replace("$clog2", "clog2")
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in parameters:
+            return int(parameters[node.id])
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPS:
+            return _OPS[type(node.op)](ev(node.left), ev(node.right))
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "clog2" and len(node.args) == 1:
+            return _clog2(ev(node.args[0]))
+        raise ValueError(f"unsupported width expression: {expr!r}")
+
+    try:
+        return ev(ast.parse(text, mode="eval"))
+    except SyntaxError as e:
+        raise ValueError(f"unsupported width expression: {expr!r}") from e
+
+
+def instantiate(spec: dict, values: dict | None = None) -> dict:
+    """
+    Concrete Spec IR for one parameter point: parameters updated with `values`, port widths
+    evaluated to ints (the original expression is kept as `width_expr` for the prompt).
+    """
+    point = copy.deepcopy(spec)
+    params = {**(spec.get("parameters") or {}), **(values or {})}
+    point["parameters"] = params or None
+    for kind in ("inputs", "outputs"):
+        for port in point.get(kind) or []:
+            if isinstance(port, dict) and isinstance(port.get("width"), str):
+                port["width_expr"] = port["width"]
+                port["width"] = eval_width(port["width"], params)
+    return point
+
+
+def sweep_points(sweep: dict[str, list[int]]) -> list[dict]:
+    """Cartesian product of parameter values, e.g. {"WIDTH": [8, 16]} → [{"WIDTH": 8}, {"WIDTH": 16}]."""
+    names = list(sweep)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(sweep[n] for n in names))]
+
+
+def parameter_overrides(parameters: dict | None) -> str:
+    """Verilog instance override list: `#(.WIDTH(16), .DEPTH(4)) ` (empty string if none)."""
+    if not parameters:
+        return ""
+    return "#(" + ", ".join(f".{k}({v})" for k, v in parameters.items()) + ") "
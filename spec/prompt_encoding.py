@@ -0,0 +1,239 @@
+"""
+Compact prompt encoding - truth tables as minimized cubes (exact Quine-McCluskey up to
+MAX_QM_BITS inputs, Espresso-style expand/irredundant over the listed rows above that),
+FSMs as transition lists.
+"""
+import numpy as np
+
+from .reference_netlist import truth_table_cubes
+from .schema import spec_ir_to_summary
+
+MAX_QM_BITS = 10
+MAX_HEURISTIC_BITS = 64  # cubes are uint64 (value, dc_mask) pairs
+
+
+def _expand(cube: str) -> list[int]:
+    """All minterms covered by a cube ('?' or '-' = either)."""
+    terms = [0]
+    for c in cube:
+        if c in "?-":
+            terms = [t << 1 for t in terms] + [(t << 1) | 1 for t in terms]
+        else:
+            terms = [(t << 1) | int(c) for t in terms]
+    return terms
+
+
+def _prime_implicants(terms: set[int], n: int) -> set[tuple[int, int]]:
+    """Prime implicants as (value, dc_mask) pairs: a cube covers t iff t & ~dc_mask == value."""
+    current = {(t, 0) for t in terms}
+    primes = set()
+    while current:
+        merged, used = set(), set()
+        for value, mask in current:
+            for i in range(n):
+                bit = 1 << i
+                if mask & bit or value & bit:
+                    continue
+                partner = (value | bit, mask)
+                if partner in current:
+                    merged.add((value, mask | bit))
+                    used.update(((value, mask), partner))
+        primes |= current - used
+        current = merged
+    return primes
+
+
+def _cube_str(cube: tuple[int, int], n: int) -> str:
+    value, mask = cube
+    return "".join(
+        "-" if mask >> i & 1 else str(value >> i & 1) for i in reversed(range(n))
+    )
+
+
+def minimize_sop(on_set: set[int], dc_set: set[int], n: int) -> list[str]:
+    """
+    Quine-McCluskey primes + essential/greedy cover.
+    Returns cubes over n bits ('-' = don't care); [] means constant 0, ['-'*n] constant 1.
+    """
+    if not on_set:
+        return []
+    primes = sorted(_prime_implicants(on_set | dc_set, n))
+    covered_by = {p: {t for t in on_set if t & ~p[1] == p[0]} for p in primes}
+    uncovered = set(on_set)
+    cover = []
+    # Essential primes: sole cover of some minterm
+    for term in sorted(on_set):
+        hits = [p for p in primes if term in covered_by[p]]
+        if len(hits) == 1 and hits[0] not in cover:
+            cover.append(hits[0])
+            uncovered -= covered_by[hits[0]]
+    while uncovered:
+        best = max(primes, key=lambda p: (len(covered_by[p] & uncovered), bin(p[1]).count("1")))
+        cover.append(best)
+        uncovered -= covered_by[best]
+    return [_cube_str(c, n) for c in cover]
+
+
+def _cube_ints(bits: str) -> tuple[int, int]:
+    """'01?' → (value, dc_mask) with MSB first; '?' bits are 0 in value."""
+    value = mask = 0
+    for c in bits:
+        value, mask = value << 1, mask << 1
+        if c in "?-":
+            mask |= 1
+        else:
+            value |= int(c)
+    return value, mask
+
+
+def expand_sop(on_cubes: list[str], off_cubes: list[str], n: int) -> list[str] | None:
+    """
+    Espresso-style heuristic for wide tables; never enumerates the 2^n minterms.
+    EXPAND: grow each not-yet-covered on-cube one literal at a time while it stays disjoint
+    from every off-cube (everything not in the off-set is free). IRREDUNDANT: keep the cubes
+    that are the sole cover of some on-cube, then a greedy cover of the rest.
+    Returns cubes like minimize_sop, or None if an on-cube overlaps an off-cube (the row
+    order would matter, as in casez).
+    """
+    if not on_cubes:
+        return []
+    full = (1 << n) - 1
+    on = [_cube_ints(c) for c in dict.fromkeys(on_cubes)]
+    off = [_cube_ints(c) for c in dict.fromkeys(off_cubes)]
+    off_v = np.array([v for v, _ in off], dtype=np.uint64)
+    off_m = np.array([m for _, m in off], dtype=np.uint64)
+
+    def hits_off(value: int, mask: int) -> bool:
+        if not off:
+            return False
+        care = ~(off_m | np.uint64(mask)) & np.uint64(full)
+        return bool(np.any(((off_v ^ np.uint64(value)) & care) == 0))
+
+    def contains(big: tuple[int, int], small: tuple[int, int]) -> bool:
+        return small[1] & ~big[1] == 0 and (small[0] ^ big[0]) & ~big[1] == 0
+
+    if any(hits_off(v, m) for v, m in on):
+        return None
+
+    primes: list[tuple[int, int]] = []
+    for cube in sorted(on, key=lambda c: -bin(c[1]).count("1")):
+        if any(contains(p, cube) for p in primes):
+            continue
+        value, mask = cube
+        for i in reversed(range(n)):
+            bit = 1 << i
+            if mask & bit:
+                continue
+            if not hits_off(value & ~bit, mask | bit):
+                value, mask = value & ~bit, mask | bit
+        primes.append((value, mask))
+
+    covers = [[k for k, p in enumerate(primes) if contains(p, cube)] for cube in on]
+    keep = {c[0] for c in covers if len(c) == 1}
+    uncovered = [c for c in covers if not keep.intersection(c)]
+    while uncovered:
+        best = max(range(len(primes)), key=lambda k: sum(k in c for c in uncovered))
+        keep.add(best)
+        uncovered = [c for c in uncovered if best not in c]
+    return [_cube_str(primes[k], n) for k in sorted(keep)]
+
+
+def _bit_cubes(rows: list[tuple[str, str]], n: int) -> list[tuple]:
+    """Per output bit: exact (on, dc) minterm sets up to MAX_QM_BITS, else (on, off) cubes."""
+    n_out = len(rows[0][1])
+    if n <= MAX_QM_BITS:
+        specified: dict[int, str] = {}
+        for in_bits, o_bits in rows:
+            for term in _expand(in_bits):
+                specified.setdefault(term, o_bits)  # first matching row wins, as in casez
+        unlisted = set(range(1 << n)) - set(specified)
+        return [
+            ({t for t, o in specified.items() if o[j] == "1"},
+             unlisted | {t for t, o in specified.items() if o[j] == "?"})
+            for j in range(n_out)
+        ]
+    first: dict[str, str] = {}
+    for in_bits, o_bits in rows:
+        first.setdefault(in_bits, o_bits)  # duplicate rows: first wins
+    return [
+        ([i for i, o in first.items() if o[j] == "1"], [i for i, o in first.items() if o[j] == "0"])
+        for j in range(n_out)
+    ]
+
+
+def encode_truth_table(spec: dict) -> str | None:
+    """
+    Minimized per-output-bit SOP of the truth table. Input combinations not listed and 'x'
+    outputs are don't-cares (as in the reference netlist and the SAT oracle); the prompt header
+    says so. Returns None if the table is too wide, cannot be parsed, or has overlapping rows
+    with conflicting outputs above MAX_QM_BITS inputs.
+    """
+    ins, outs, rows = truth_table_cubes(spec)
+    n = sum(w for _, w in ins)
+    if not rows or n == 0 or n > MAX_HEURISTIC_BITS:
+        return None
+
+    out_bits = [f"{name}[{i}]" if w > 1 else name for name, w in outs for i in reversed(range(w))]
+    in_names = ", ".join(f"{name}[{w - 1}:0]" if w > 1 else name for name, w in ins)
+    lines = [
+        f"TRUTH TABLE as SOP cubes over {{{in_names}}} (MSB first, '-' = any). Input combinations "
+        "not listed in the spec are don't-cares: any output value is accepted for them."
+    ]
+    for bit, (on, other) in zip(out_bits, _bit_cubes(rows, n)):
+        cubes = minimize_sop(on, other, n) if n <= MAX_QM_BITS else expand_sop(on, other, n)
+        if cubes is None:
+            return None
+        if not cubes:
+            rhs = "0"
+        elif cubes == ["-" * n]:
+            rhs = "1"
+        else:
+            rhs = " | ".join(cubes)
+        lines.append(f"  {bit} = {rhs}")
+    return "\n".join(lines)
+
+
+def encode_fsm_transitions(spec: dict) -> str | None:
+    """FSM transitions grouped by source state: `S0: x -> S1; !x -> S0`."""
+    transitions = spec.get("fsm_transitions")
+    if not transitions:
+        return None
+    by_state: dict[str, list[str]] = {}
+    for t in transitions:
+        if not isinstance(t, dict):
+            return None
+        cond = t.get("cond")
+        arrow = f"{cond} -> {t.get('to')}" if cond not in (None, "", "1", 1, True) else f"-> {t.get('to')}"
+        by_state.setdefault(str(t.get("from")), []).append(arrow)
+    lines = ["FSM TRANSITIONS (state: condition -> next):"]
+    lines += [f"  {s}: " + "; ".join(arrows) for s, arrows in by_state.items()]
+    return "\n".join(lines)
+
+
+def compact_fields(spec: dict) -> dict[str, str]:
+    """
+    Compact encodings that are strictly smaller than the raw summary lines.
+    Keys: "truth_table", "fsm_transitions" (only present when they win).
+    """
+    result = {}
+    raw_tt = f"TRUTH TABLE: {spec.get('truth_table')}"
+    tt = encode_truth_table(spec) if spec.get("truth_table") else None
+    if tt and len(tt) < len(raw_tt):
+        result["truth_table"] = tt
+    raw_fsm = f"FSM TRANSITIONS: {spec.get('fsm_transitions')}"
+    fsm = encode_fsm_transitions(spec)
+    if fsm and len(fsm) < len(raw_fsm):
+        result["fsm_transitions"] = fsm
+    return result
+
+
+def encoding_stats(spec: dict) -> dict:
+    """Prompt summary size before/after compact encoding."""
+    raw = spec_ir_to_summary(spec, compact=False)
+    compact = spec_ir_to_summary(spec, compact=True)
+    return {
+        "raw_chars": len(raw),
+        "compact_chars": len(compact),
+        "saved_chars": len(raw) - len(compact),
+        "encoded": sorted(compact_fields(spec)),
+    }
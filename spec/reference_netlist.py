@@ -0,0 +1,73 @@
+"""Spec IR truth table → reference Verilog module (golden model for equivalence) - deterministic, no LLM."""
+from .schema import port_list, split_truth_row, value_bits
+
+
+def is_combinational_table(spec: dict) -> bool:
+    """True when the spec is a clockless truth table (eligible for SAT equivalence)."""
+    return bool(spec.get("truth_table")) and not spec.get("clock") and not spec.get("fsm_states")
+
+
+def truth_table_cubes(spec: dict) -> tuple[list[tuple[str, int]], list[tuple[str, int]], list[tuple[str, str]]]:
+    """
+    Normalize the truth table into (inputs, outputs, rows).
+    Each row is (input_bits, output_bits), MSB-first in port order, '?' = don't-care.
+    Rows whose values cannot be parsed are dropped.
+    """
+    clock, reset = spec.get("clock"), spec.get("reset")
+    ins = [(n, w) for n, w in port_list(spec.get("inputs", [])) if n not in (clock, reset)]
+    outs = port_list(spec.get("outputs", [])) or [("out", 1)]
+    out_width = sum(w for _, w in outs)
+
+    rows = []
+    for row in spec.get("truth_table") or []:
+        row_ins, row_out = split_truth_row(row)
+        if not ins:
+            ins = [(f"in{i}", 1) for i in range(len(row_ins))]
+        if len(row_ins) != len(ins):
+            continue
+        in_bits = [value_bits(v, w) for v, (_, w) in zip(row_ins, ins)]
+        if isinstance(row_out, (list, tuple)) and len(row_out) == len(outs):
+            out_bits = [value_bits(v, w) for v, (_, w) in zip(row_out, outs)]
+        else:
+            out_bits = [value_bits(row_out, out_width)]
+        if None in in_bits or None in out_bits:
+            continue
+        rows.append(("".join(in_bits), "".join(out_bits)))
+    return ins, outs, rows
+
+
+def generate_reference_rtl(spec: dict, module_name: str | None = None) -> str | None:
+    """
+    Build `<module>_ref`: a casez over the concatenated inputs, one item per truth-table row.
+    Input don't-cares become '?', output don't-cares and unlisted input combinations become 'x'.
+    Returns None if the spec has no usable combinational truth table.
+    """
+    if not is_combinational_table(spec):
+        return None
+    name = module_name or spec.get("module_name", "dut")
+    ins, outs, rows = truth_table_cubes(spec)
+    if not rows or not ins:
+        return None
+
+    in_width = sum(w for _, w in ins)
+    out_width = sum(w for _, w in outs)
+
+    def decl(kind: str, n: str, w: int) -> str:
+        return f"{kind} [{w - 1}:0] {n}" if w > 1 else f"{kind} {n}"
+
+    ports = [decl("input", n, w) for n, w in ins] + [decl("output reg", n, w) for n, w in outs]
+    in_cat = "{" + ", ".join(n for n, _ in ins) + "}"
+    out_cat = "{" + ", ".join(n for n, _ in outs) + "}"
+
+    lines = [f"module {name}_ref ("]
+    lines.append(",\n".join(f"  {p}" for p in ports))
+    lines += [");", "  always @(*) begin", f"    casez ({in_cat})"]
+    for in_bits, out_bits in rows:
+        lines.append(f"      {in_width}'b{in_bits}: {out_cat} = {out_width}'b{out_bits.replace('?', 'x')};")
+    lines += [
+        f"      default: {out_cat} = {{{out_width}{{1'bx}}}};",
+        "    endcase",
+        "  end",
+        "endmodule",
+    ]
+    return "\n".join(lines)
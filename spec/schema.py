@@ -13,6 +13,8 @@ SPEC_IR_SCHEMA = {
     "fsm_transitions": (list, type(None)),
     "invariants": (list, type(None)),
     "latency": (int, type(None)),
+    "submodules": (list, type(None)),
+    "parameters": (dict, type(None)),
     "source": str,
 }
 
@@ -24,6 +26,9 @@ ACTION_TYPES = [
     "FIX_FUNCTION",
     "FIX_RESET",
     "FIX_TIMING",
+    "FIX_LOOP",
+    "FIX_LATCH",
+    "FIX_DRIVERS",
     "ASK_CLARIFICATION",
 ]
 
@@ -62,28 +67,130 @@ def validate_spec_ir(spec: dict) -> tuple[bool, list[str]]:
         spec["invariants"] = None
     if "latency" not in spec:
         spec["latency"] = None
+    if "submodules" not in spec:
+        spec["submodules"] = None
+    if "parameters" not in spec:
+        spec["parameters"] = None
+    for i, sub in enumerate(spec.get("submodules") or []):
+        ok, sub_errors = validate_spec_ir(sub)
+        errors.extend(f"submodules[{i}]: {e}" for e in sub_errors)
 
     return len(errors) == 0, errors
 
 
-def spec_ir_to_summary(spec: dict) -> str:
-    """Convert Spec IR to human-readable summary for prompts."""
+def spec_ir_to_summary(spec: dict, compact: bool = True) -> str:
+    """
+    Convert Spec IR to human-readable summary for prompts.
+    compact: encode truth tables as minimized cubes and FSMs as transition lists
+    when that is shorter than the raw rows.
+    """
+    encoded = {}
+    if compact:
+        # Local import: prompt_encoding builds on schema helpers
+        from .prompt_encoding import compact_fields
+
+        encoded = compact_fields(spec)
     lines = [
         f"MODULE: {spec.get('module_name', 'unknown')}",
         f"DESCRIPTION: {spec.get('description', '')}",
         f"INPUTS: {spec.get('inputs', [])}",
         f"OUTPUTS: {spec.get('outputs', [])}",
     ]
+    if spec.get("parameters"):
+        params = ", ".join(f"{k} = {v}" for k, v in spec["parameters"].items())
+        lines.append(
+            f"PARAMETERS: {params} (declare as Verilog parameters with these defaults; "
+            "port widths given as width_expr must follow them)"
+        )
     if spec.get("clock"):
         lines.append(f"CLOCK: {spec['clock']}")
     if spec.get("reset"):
         lines.append(f"RESET: {spec['reset']}")
-    if spec.get("truth_table"):
+    if encoded.get("truth_table"):
+        lines.append(encoded["truth_table"])
+    elif spec.get("truth_table"):
         lines.append(f"TRUTH TABLE: {spec['truth_table']}")
     if spec.get("fsm_states"):
         lines.append(f"FSM STATES: {spec['fsm_states']}")
-    if spec.get("fsm_transitions"):
+    if encoded.get("fsm_transitions"):
+        lines.append(encoded["fsm_transitions"])
+    elif spec.get("fsm_transitions"):
         lines.append(f"FSM TRANSITIONS: {spec['fsm_transitions']}")
     if spec.get("invariants"):
         lines.append(f"INVARIANTS: {spec['invariants']}")
+    if spec.get("submodules"):
+        lines.append("SUBMODULES (already implemented - instantiate them, do NOT redefine them):")
+        lines.extend(f"  {port_signature(sub)}" for sub in spec["submodules"])
     return "\n".join(lines)
+
+
+def port_signature(spec: dict) -> str:
+    """One-line module header, e.g. `adder8(input [7:0] a, input [7:0] b, output [8:0] sum)`."""
+    def decl(kind: str, n: str, w: int) -> str:
+        return f"{kind} [{w - 1}:0] {n}" if w > 1 else f"{kind} {n}"
+
+    ports = [decl("input", n, w) for n, w in port_list(spec.get("inputs", []))]
+    ports += [decl("output", n, w) for n, w in port_list(spec.get("outputs", []))]
+    return f"{spec.get('module_name', 'unknown')}({', '.join(ports)})"
+
+
+def port_list(ports: list) -> list[tuple[str, int]]:
+    """Normalize Spec IR ports to [(name, width)] (width defaults to 1)."""
+    result = []
+    for p in ports or []:
+        if isinstance(p, dict):
+            width = p.get("width") or 1
+            try:
+                width = max(1, int(width))
+            except (TypeError, ValueError):
+                width = 1
+            result.append((str(p.get("name", f"p{len(result)}")), width))
+        else:
+            result.append((str(p), 1))
+    return result
+
+
+def split_truth_row(row: list) -> tuple[list, Any]:
+    """Split a truth-table row into (inputs, expected). Accepts [[ins...], out] or [in1, ..., out]."""
+    if isinstance(row[0], (list, tuple)):
+        return list(row[0]), (row[1] if len(row) > 1 else 0)
+    return list(row[:-1]), row[-1]
+
+
+def value_bits(value: Any, width: int) -> str | None:
+    """
+    Truth-table value → MSB-first bit string of `width` chars ('0', '1', '?' for don't-care).
+    Accepts ints, bools, "0b1x0", "0x1f", "101", "x"/"-" (all don't-care). Returns None if unparseable.
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        if value < 0:
+            value &= (1 << width) - 1
+        return format(value, "b").zfill(width)[-width:]
+    if not isinstance(value, str):
+        return None
+    v = value.strip().lower().replace("_", "")
+    if v in ("x", "-", "?", "z"):
+        return "?" * width
+    if v.startswith("0x"):
+        try:
+            return format(int(v[2:], 16), "b").zfill(width)[-width:]
+        except ValueError:
+            return None
+    if v.startswith("0b"):
+        v = v[2:]
+    elif "'" in v:
+        base, _, digits = v.partition("'")
+        if not digits.startswith("b"):
+            try:
+                return value_bits(int(digits[1:], {"d": 10, "h": 16, "o": 8}[digits[0]]), width)
+            except (KeyError, ValueError, IndexError):
+                return None
+        v = digits[1:]
+    elif set(v) <= set("0123456789") and not (len(v) > 1 and set(v) <= {"0", "1"}):
+        return format(int(v), "b").zfill(width)[-width:] if v else None
+    bits = "".join("?" if c in "x-?z" else c for c in v)
+    if not bits or set(bits) - {"0", "1", "?"}:
+        return None
+    return bits.rjust(width, "0")[-width:]
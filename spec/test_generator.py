@@ -1,13 +1,62 @@
 """Spec-derived testbench generator - deterministic, no LLM."""
 from typing import Any
 
+from .formal_props import invariant_to_expr, is_active_low
+from .parameters import parameter_overrides
+from .schema import port_list, split_truth_row, value_bits
+from .stimulus import generate_stimulus
 
-def generate_spec_tb(spec: dict, module_name: str | None = None) -> str | None:
+
+def generate_spec_tb(
+    spec: dict,
+    module_name: str | None = None,
+    seed: int = 0,
+    coverage_goal: float = 1.0,
+    parameters: dict | None = None,
+    stimulus: list | None = None,
+) -> str | None:
     """
     Generate deterministic Verilog testbench from Spec IR.
-    Returns TB string if derivable (truth_table or fsm_transitions), else None.
+    parameters: DUT parameter overrides (default: the spec's own `parameters`).
+    stimulus: replace the spec's stimulus (truth-table rows or random vectors, as returned
+    by spec_stimulus) - used to re-run a subset, e.g. a minimized failing set.
+    Returns TB string if derivable (truth_table, fsm_transitions, or port widths for
+    seeded constrained-random stimulus), else None.
     """
     name = module_name or spec.get("module_name", "dut")
+    tb = _generate_tb(spec, name, seed, coverage_goal, stimulus)
+    overrides = parameter_overrides(spec.get("parameters") if parameters is None else parameters)
+    if tb and overrides:
+        tb = tb.replace(f"  {name} dut (", f"  {name} {overrides}dut (", 1)
+    return tb
+
+
+def spec_stimulus(spec: dict, seed: int = 0, coverage_goal: float = 1.0) -> tuple[str, list] | None:
+    """The stimulus generate_spec_tb would apply: ("truth_table", rows) or ("vectors", [{port: value}])."""
+    if spec.get("truth_table"):
+        return "truth_table", list(spec["truth_table"])
+    if spec.get("fsm_transitions") and spec.get("fsm_states") and _gen_fsm_tb(
+        spec.get("module_name", "dut"), spec["fsm_states"], spec["fsm_transitions"],
+        spec.get("inputs", []), spec.get("outputs", []), spec.get("clock"), spec.get("reset"),
+    ):
+        return None  # directed FSM walk, not a vector list
+    ins = _random_inputs(spec.get("inputs", []), spec.get("clock"), spec.get("reset"))
+    if not ins or not port_list(spec.get("outputs", [])):
+        return None
+    vectors, _ = generate_stimulus(ins, seed=seed, coverage_goal=coverage_goal)
+    return "vectors", vectors
+
+
+def _random_inputs(inputs: list, clock: str | None, reset: str | None) -> list[tuple[str, int]]:
+    return [(n, w) for n, w in port_list(inputs) if n not in (clock, reset)]
+
+
+def _generate_tb(
+    spec: dict, name: str, seed: int, coverage_goal: float, stimulus: list | None = None
+) -> str | None:
+    if stimulus is not None and spec.get("truth_table"):
+        spec = {**spec, "truth_table": stimulus}
+        stimulus = None
     truth_table = spec.get("truth_table")
     fsm_transitions = spec.get("fsm_transitions")
     inputs = spec.get("inputs", [])
@@ -17,11 +66,13 @@ def generate_spec_tb(spec: dict, module_name: str | None = None) -> str | None:
 
     if truth_table and len(truth_table) > 0:
         return _gen_truth_table_tb(name, truth_table, inputs, outputs, clock, reset)
-    if fsm_transitions and spec.get("fsm_states"):
+    if fsm_transitions and spec.get("fsm_states") and stimulus is None:
         tb = _gen_fsm_tb(name, spec["fsm_states"], fsm_transitions, inputs, outputs, clock, reset)
         if tb:
             return tb
-    return None
+    return _gen_random_tb(
+        name, inputs, outputs, clock, reset, spec.get("invariants"), seed, coverage_goal, stimulus
+    )
 
 
 def _gen_truth_table_tb(
@@ -32,36 +83,52 @@ def _gen_truth_table_tb(
     clock: str | None,
     reset: str | None,
 ) -> str:
-    """Generate TB from truth table. Format: [[in1, in2, ...], out] per row."""
-    in_names = [p["name"] if isinstance(p, dict) else str(p) for p in inputs]
-    out_names = [p["name"] if isinstance(p, dict) else str(p) for p in outputs]
-    if not in_names and truth_table:
-        first = truth_table[0]
-        n_in = len(first[0]) if isinstance(first[0], (list, tuple)) else len(first) - 1
-        in_names = [f"in{i}" for i in range(n_in)]
-    if not out_names:
-        out_names = ["out"]
+    """
+    Generate TB from truth table. Format: [[in1, in2, ...], out] per row.
+    Prints one `in=%b out=%b exp=%b` line per row; exp uses x for don't-care bits.
+    """
+    ins = port_list(inputs)
+    outs = port_list(outputs) or [("out", 1)]
+    first_ins, _ = split_truth_row(truth_table[0])
+    data_ins = [(n, w) for n, w in ins if n not in (clock, reset)]
+    if len(data_ins) == len(first_ins):
+        ins = data_ins
+    if not ins:
+        ins = [(f"in{i}", 1) for i in range(len(first_ins))]
+    ctrl = [s for s in (clock, reset) if s and s not in {n for n, _ in ins}]
+    out_width = sum(w for _, w in outs)
 
-    lines = [
-        "`timescale 1ns/1ps",
-        f"module tb_{module_name};",
-        "  reg " + ", ".join(in_names) + ";",
-        "  wire " + ", ".join(out_names) + ";",
-        f"  {module_name} dut (" + ", ".join(f".{n}({n})" for n in in_names + out_names) + ");",
+    def decl(kind: str, n: str, w: int) -> str:
+        return f"  {kind} [{w - 1}:0] {n};" if w > 1 else f"  {kind} {n};"
+
+    in_cat = "{" + ", ".join(n for n, _ in ins) + "}"
+    out_cat = "{" + ", ".join(n for n, _ in outs) + "}"
+    conns = ", ".join(f".{n}({n})" for n in ctrl + [n for n, _ in ins + outs])
+    lines = ["`timescale 1ns/1ps", f"module tb_{module_name};"]
+    lines += [f"  reg {s} = 0;" for s in ctrl]
+    lines += [decl("reg", n, w) for n, w in ins]
+    lines += [decl("wire", n, w) for n, w in outs]
+    lines += [
+        f"  {module_name} dut ({conns});",
         "  initial begin",
         '    $display("Testing truth table");',
     ]
     for row in truth_table:
-        if isinstance(row[0], (list, tuple)):
-            ins = list(row[0])
-            out_exp = row[1] if len(row) > 1 else 0
+        row_ins, out_exp = split_truth_row(row)
+        n = min(len(ins), len(row_ins))
+        assigns = []
+        for (name, w), v in zip(ins[:n], row_ins[:n]):
+            bits = (value_bits(v, w) or "0" * w).replace("?", "0")
+            assigns.append(f"{name}={w}'b{bits};")
+        if isinstance(out_exp, (list, tuple)) and len(out_exp) == len(outs):
+            exp_bits = "".join(value_bits(v, w) or "?" * w for v, (_, w) in zip(out_exp, outs))
         else:
-            ins = list(row[:-1])
-            out_exp = row[-1]
-        n = min(len(in_names), len(ins))
-        assigns = " ".join(f"{in_names[i]}={ins[i]};" for i in range(n))
-        lines.append(f"    #1 {assigns}")
-        lines.append(f"    #1 $display(\"in=%b out=%b exp=%b\", {{{','.join(in_names)}}}, {{{','.join(out_names)}}}, {out_exp});")
+            exp_bits = value_bits(out_exp, out_width) or "?" * out_width
+        lines.append(f"    #1 {' '.join(assigns)}")
+        lines.append(
+            f"    #1 $display(\"in=%b out=%b exp=%b\", {in_cat}, {out_cat}, "
+            f"{out_width}'b{exp_bits.replace('?', 'x')});"
+        )
     lines.extend([
         '    $display("PASS");',
         "    $finish;",
@@ -82,3 +149,99 @@ def _gen_fsm_tb(
 ) -> str | None:
     """FSM TB generation is interface-dependent; return None for now."""
     return None
+
+
+def _gen_random_tb(
+    module_name: str,
+    inputs: list,
+    outputs: list,
+    clock: str | None,
+    reset: str | None,
+    invariants: list | None,
+    seed: int,
+    coverage_goal: float,
+    vectors: list[dict] | None = None,
+) -> str | None:
+    """
+    Constrained-random TB: seeded vectors with corner values until per-input coverage
+    goals are met. Checks outputs for X/Z and any invariants expressible over ports.
+    vectors: apply these instead of generating (header reports the subset size).
+    """
+    ins = _random_inputs(inputs, clock, reset)
+    outs = port_list(outputs)
+    if not ins or not outs:
+        return None
+    if vectors is None:
+        vectors, cov = generate_stimulus(ins, seed=seed, coverage_goal=coverage_goal)
+    else:
+        cov = {"seed": seed, "vectors": len(vectors), "coverage": 0.0, "bins_hit": 0, "bins_total": 0}
+
+    port_names = {n for n, _ in port_list(inputs) + outs} | {s for s in (clock, reset) if s}
+    checks = []
+    for text in invariants or []:
+        expr = invariant_to_expr(str(text), port_names)
+        if expr:
+            checks.append((str(text).replace('"', "'"), expr))
+
+    def decl(kind: str, n: str, w: int) -> str:
+        return f"  {kind} [{w - 1}:0] {n};" if w > 1 else f"  {kind} {n};"
+
+    in_cat = "{" + ", ".join(n for n, _ in ins) + "}"
+    out_cat = "{" + ", ".join(n for n, _ in outs) + "}"
+    ctrl = [s for s in (clock, reset) if s]
+    conns = ", ".join(f".{n}({n})" for n in ctrl + [n for n, _ in ins + outs])
+
+    lines = [
+        "`timescale 1ns/1ps",
+        f"// constrained-random: seed={cov['seed']}, {cov['vectors']} vectors, "
+        f"coverage {cov['coverage']:.0%} ({cov['bins_hit']}/{cov['bins_total']} bins)",
+        f"module tb_{module_name};",
+    ]
+    lines += [f"  reg {s};" for s in ctrl]
+    lines += [decl("reg", n, w) for n, w in ins]
+    lines += [decl("wire", n, w) for n, w in outs]
+    lines += ["  integer errors = 0;", f"  {module_name} dut ({conns});"]
+    if clock:
+        lines.append(f"  always #5 {clock} = ~{clock};")
+
+    lines += ["  task check;", "    begin"]
+    lines += [
+        f"      $display(\"in=%b out=%b\", {in_cat}, {out_cat});",
+        f"      if (^{out_cat} === 1'bx) begin",
+        f"        $display(\"MISMATCH: X/Z on outputs in=%b out=%b\", {in_cat}, {out_cat});",
+        "        errors = errors + 1;",
+        "      end",
+    ]
+    for text, expr in checks:
+        lines += [
+            f"      if (!({expr})) begin",
+            f"        $display(\"MISMATCH: invariant '{text}' in=%b out=%b\", {in_cat}, {out_cat});",
+            "        errors = errors + 1;",
+            "      end",
+        ]
+    lines += ["    end", "  endtask", "  initial begin", '    $display("Testing constrained-random stimulus");']
+
+    if clock:
+        lines.append(f"    {clock} = 0;")
+    lines.append("    " + " ".join(f"{n} = 0;" for n, _ in ins))
+    if reset:
+        active, idle = (0, 1) if is_active_low(reset) else (1, 0)
+        lines += [f"    {reset} = {active};", "    #20", f"    {reset} = {idle};"]
+
+    for vec in vectors:
+        assigns = " ".join(f"{n} = {w}'d{vec[n]};" for n, w in ins)
+        if clock:
+            lines.append(f"    @(negedge {clock}) {assigns}")
+            lines.append(f"    @(negedge {clock}) check;")
+        else:
+            lines.append(f"    #1 {assigns}")
+            lines.append("    #1 check;")
+
+    lines += [
+        '    if (errors == 0) $display("PASS");',
+        '    else $display("FAIL: %0d mismatches", errors);',
+        "    $finish;",
+        "  end",
+        "endmodule",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,7 @@
+"""Local stores - offline indexes and run records kept under the work dir."""
+from .design_index import DesignIndex
+from .repair_stats import RepairStats
+from .history import HistoryRecord
+from .broker import JobBroker
+
+__all__ = ["DesignIndex", "RepairStats", "HistoryRecord", "JobBroker"]
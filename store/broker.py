@@ -0,0 +1,197 @@
+"""
+Standalone job broker on a single SQLite file - leases, heartbeats and artifact bundles.
+The file must be on a local filesystem shared by workers on the same host: SQLite file
+locking is unreliable on network filesystems (NFS/SMB) and can corrupt the database.
+Multi-host runs need a server-backed queue instead.
+"""
+import io
+import json
+import sqlite3
+import tarfile
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import BROKER_LEASE_SECONDS, BROKER_MAX_ATTEMPTS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    name          TEXT,
+    spec          TEXT NOT NULL,
+    options       TEXT NOT NULL,
+    status        TEXT NOT NULL,          -- queued | leased | done | failed
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    worker        TEXT,
+    lease_expires REAL,
+    result        TEXT,
+    artifacts     BLOB,
+    error         TEXT,
+    created       REAL NOT NULL,
+    updated       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created);
+"""
+
+BUNDLE_SUFFIXES = (".sv", ".v", ".json", ".svg", ".log", ".txt")
+
+
+def bundle_dir(path: Path, max_file_bytes: int = 4 * 1024 * 1024) -> bytes:
+    """tar.gz of a run's text artifacts (RTL, TBs, reports); large or binary files are skipped."""
+    buf = io.BytesIO()
+    path = Path(path)
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for f in sorted(path.rglob("*")):
+            if f.is_file() and f.suffix in BUNDLE_SUFFIXES and f.stat().st_size <= max_file_bytes:
+                tar.add(f, arcname=str(f.relative_to(path)))
+    return buf.getvalue()
+
+
+def unpack_bundle(blob: bytes, dest: Path) -> Path:
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    with tarfile.open(fileobj=io.BytesIO(blob), mode="r:gz") as tar:
+        tar.extractall(dest, filter="data")
+    return dest
+
+
+class JobBroker:
+    """
+    Queue of Spec IR jobs. A worker lease()s a job, heartbeat()s while running and
+    complete()s or fail()s it. Leases that expire (dead worker) are re-queued on the next
+    lease() until max_attempts is reached.
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: float = BROKER_LEASE_SECONDS):
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived autocommit connection (idle workers hold no open handles)."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(
+        self,
+        spec_ir: dict,
+        name: str | None = None,
+        options: dict | None = None,
+        max_attempts: int = BROKER_MAX_ATTEMPTS,
+    ) -> str:
+        """Queue one spec; options are forwarded to run_pipeline. Returns the job id."""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, spec, options, status, max_attempts, created, updated)"
+                " VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, name or spec_ir.get("module_name"), json.dumps(spec_ir), json.dumps(options or {}),
+                 max_attempts, now, now),
+            )
+        return job_id
+
+    def lease(self, worker_id: str) -> dict | None:
+        """Atomically take the oldest runnable job (queued, or leased with an expired lease)."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Expired leases that used up their attempts are failed, not re-run
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired (worker lost)', worker = NULL,"
+                " updated = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?)"
+                " ORDER BY created LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1,"
+                " updated = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "spec": json.loads(row["spec"]),
+            "options": json.loads(row["options"]),
+            "attempt": row["attempts"] + 1,
+        }
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease. False means the lease was lost (expired and taken by another worker)."""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict, artifacts: bytes | None = None) -> bool:
+        """Store result + artifact bundle. Ignored (False) if this worker no longer holds the lease."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, artifacts = ?, lease_expires = NULL, updated = ?"
+                " WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result, default=str), artifacts, time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Report a crash; the job is re-queued until max_attempts, then marked failed."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,"
+                " worker = NULL, lease_expires = NULL, error = ?, updated = ?"
+                " WHERE id = ? AND worker = ? AND status = 'leased'",
+                (error[-4000:], time.time(), job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def counts(self) -> dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def pending(self) -> int:
+        counts = self.counts()
+        return counts.get("queued", 0) + counts.get("leased", 0)
+
+    def results(self, with_artifacts: bool = False) -> list[dict]:
+        """Finished jobs (done or failed) with their results, oldest first."""
+        cols = "id, name, status, attempts, worker, result, error" + (", artifacts" if with_artifacts else "")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {cols} FROM jobs WHERE status IN ('done', 'failed') ORDER BY created"
+            ).fetchall()
+        out = []
+        for r in rows:
+            job = dict(r)
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            out.append(job)
+        return out
+
+    def wait(self, poll_interval: float = 5.0, timeout: float | None = None) -> bool:
+        """Block until no job is queued or leased. False on timeout."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self.pending():
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
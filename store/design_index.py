@@ -0,0 +1,214 @@
+"""
+Offline index of passing (Spec IR, RTL) pairs - TF-IDF over spec text + MinHash over port signatures
+for few-shot retrieval, and canonical fingerprints for exact reuse of a verified design.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+from config import DESIGN_INDEX_PATH
+from spec.fingerprint import spec_fingerprint
+from spec.hierarchy import spec_hash
+from spec.schema import port_list
+
+NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _words(text: str) -> list[str]:
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    return [w for w in re.split(r"[^a-z0-9]+", text.lower()) if len(w) > 1]
+
+
+def spec_tokens(spec: dict) -> list[str]:
+    """Bag of words: module name, description, port names/widths and structural flags."""
+    tokens = _words(spec.get("module_name", "")) + _words(spec.get("description", ""))
+    for kind in ("inputs", "outputs"):
+        for name, width in port_list(spec.get(kind, [])):
+            tokens += _words(name) + [f"{kind[:-1]}w{width}"]
+    for flag in ("clock", "reset", "truth_table", "fsm_states", "invariants", "latency"):
+        if spec.get(flag):
+            tokens.append(f"has_{flag}")
+    return tokens
+
+
+def port_shingles(spec: dict) -> set[str]:
+    """Port-signature shingles for MinHash (direction, width, and name-bearing variants)."""
+    shingles = set()
+    for kind in ("inputs", "outputs"):
+        for name, width in port_list(spec.get(kind, [])):
+            shingles.add(f"{kind}:{width}")
+            shingles.add(f"{kind}:{name.lower()}:{width}")
+    n_in, n_out = len(spec.get("inputs") or []), len(spec.get("outputs") or [])
+    shingles.add(f"shape:{n_in}x{n_out}")
+    return shingles
+
+
+def minhash(shingles: set[str]) -> list[int]:
+    if not shingles:
+        return [_PRIME] * NUM_PERM
+    hashes = [int.from_bytes(hashlib.md5(s.encode()).digest()[:8], "big") for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def rename_module(rtl_code: str, old: str, new: str) -> str | None:
+    """Rename the declaration (and `endmodule : name` label) of module `old`; None if not declared."""
+    pattern = re.compile(rf"^(\s*module\s+){re.escape(old)}\b", re.MULTILINE)
+    if not pattern.search(rtl_code):
+        return None
+    if old == new:
+        return rtl_code
+    rtl_code = pattern.sub(lambda m: m.group(1) + new, rtl_code, count=1)
+    return re.sub(rf"(endmodule\s*:\s*){re.escape(old)}\b", lambda m: m.group(1) + new, rtl_code)
+
+
+def _jaccard(sig_a: list[int], sig_b: list[int]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+class DesignIndex:
+    """
+    Append-only JSONL index of verified designs under the work dir.
+    score = tfidf_weight * cosine(TF-IDF of spec tokens) + (1 - tfidf_weight) * MinHash Jaccard(ports).
+    """
+
+    def __init__(
+        self,
+        path: Path = DESIGN_INDEX_PATH,
+        tfidf_weight: float = 0.6,
+        exclude_same_spec: bool = False,
+    ):
+        self.path = Path(path)
+        self.tfidf_weight = tfidf_weight
+        self.exclude_same_spec = exclude_same_spec
+        self._lock = threading.RLock()  # _load() re-enters from add()
+        self._entries: list[dict] | None = None
+
+    def _load(self) -> list[dict]:
+        with self._lock:  # one index may be shared by concurrent pipeline runs
+            if self._entries is None:
+                entries = []
+                if self.path.exists():
+                    for line in self.path.read_text().splitlines():
+                        if line.strip():
+                            entries.append(json.loads(line))
+                self._entries = entries
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def add(self, spec_ir: dict, rtl_code: str, meta: dict | None = None) -> bool:
+        """Record a passing design. Returns False if this exact (spec, RTL) is already indexed."""
+        rtl_hash = hashlib.sha256(rtl_code.encode()).hexdigest()[:16]
+        entry = {
+            "spec_hash": spec_hash(spec_ir),
+            "rtl_hash": rtl_hash,
+            "fingerprint": spec_fingerprint(spec_ir),
+            "module_name": spec_ir.get("module_name"),
+            "spec": spec_ir,
+            "rtl_code": rtl_code,
+            "tokens": spec_tokens(spec_ir),
+            "minhash": minhash(port_shingles(spec_ir)),
+            "meta": meta or {},
+        }
+        with self._lock:
+            entries = self._load()
+            if any(e["spec_hash"] == entry["spec_hash"] and e["rtl_hash"] == rtl_hash for e in entries):
+                return False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            entries.append(entry)
+        return True
+
+    def ingest(self, root: Path) -> int:
+        """Index existing verified designs under root (dirs with spec.json + final_dut.sv, e.g. module caches)."""
+        added = 0
+        for spec_file in Path(root).rglob("spec.json"):
+            rtl = spec_file.parent / "final_dut.sv"
+            meta = spec_file.parent / "result.json"
+            if not rtl.exists():
+                continue
+            if meta.exists() and json.loads(meta.read_text()).get("status") != "PASS":
+                continue
+            added += self.add(json.loads(spec_file.read_text()), rtl.read_text(), {"source": str(spec_file.parent)})
+        return added
+
+    def exact(self, spec_ir: dict) -> dict | None:
+        """
+        Latest verified design with the same canonical fingerprint, its top module renamed to
+        spec_ir's module_name: {module_name, rtl_code, fingerprint, source_module, meta} or None.
+        """
+        fingerprint = spec_fingerprint(spec_ir)
+        name = spec_ir.get("module_name", "dut")
+        for e in reversed(self._load()):
+            if (e.get("fingerprint") or spec_fingerprint(e["spec"])) != fingerprint:
+                continue
+            rtl = rename_module(e["rtl_code"], e["module_name"], name)
+            if rtl is not None:
+                return {
+                    "module_name": name,
+                    "rtl_code": rtl,
+                    "fingerprint": fingerprint,
+                    "source_module": e["module_name"],
+                    "meta": e.get("meta", {}),
+                }
+        return None
+
+    def query(self, spec_ir: dict, k: int = 2, min_score: float = 0.15) -> list[dict]:
+        """Top-k most similar verified designs: [{module_name, spec, rtl_code, score}]."""
+        entries = self._load()
+        if not entries:
+            return []
+        own_hash = spec_hash(spec_ir)
+        candidates = [e for e in entries if not (self.exclude_same_spec and e["spec_hash"] == own_hash)]
+        if not candidates:
+            return []
+
+        df = Counter()
+        for e in candidates:
+            df.update(set(e["tokens"]))
+        n_docs = len(candidates)
+
+        def tfidf(tokens: list[str]) -> dict[str, float]:
+            tf = Counter(tokens)
+            return {t: c * (math.log((1 + n_docs) / (1 + df[t])) + 1) for t, c in tf.items()}
+
+        def cosine(a: dict[str, float], b: dict[str, float]) -> float:
+            dot = sum(v * b.get(t, 0.0) for t, v in a.items())
+            norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+            return dot / norm if norm else 0.0
+
+        q_vec = tfidf(spec_tokens(spec_ir))
+        q_sig = minhash(port_shingles(spec_ir))
+        scored = []
+        for e in candidates:
+            score = self.tfidf_weight * cosine(q_vec, tfidf(e["tokens"])) + (1 - self.tfidf_weight) * _jaccard(
+                q_sig, e["minhash"]
+            )
+            if score >= min_score:
+                scored.append((score, e))
+        scored.sort(key=lambda x: -x[0])
+
+        results, seen = [], set()
+        for score, e in scored:
+            if e["rtl_hash"] in seen:
+                continue
+            seen.add(e["rtl_hash"])
+            results.append({
+                "module_name": e["module_name"],
+                "spec": e["spec"],
+                "rtl_code": e["rtl_code"],
+                "score": round(score, 3),
+            })
+            if len(results) == k:
+                break
+        return results
@@ -0,0 +1,138 @@
+"""Compact per-attempt history records - hashes, return codes and log excerpts in memory, full artifacts on disk."""
+import hashlib
+import json
+from pathlib import Path
+
+from config import HISTORY_EXCERPT_CHARS
+
+ARTIFACTS = {"rtl_code": "dut.sv", "tb_code": "tb.sv"}
+RESULTS = (
+    "verilator_result",
+    "compile_result",
+    "run_result",
+    "formal_result",
+    "equiv_result",
+    "minimize_result",
+    "structural_result",
+)
+
+
+def _digest(text: str | None) -> str | None:
+    return hashlib.sha256(text.encode()).hexdigest()[:16] if text is not None else None
+
+
+def excerpt(value, max_chars: int = HISTORY_EXCERPT_CHARS):
+    """Bound a tool result: long strings keep head and tail, long lists keep their first items."""
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        half = max_chars // 2
+        return f"{value[:half]}\n... ({len(value) - max_chars} chars spilled) ...\n{value[-half:]}"
+    if isinstance(value, dict):
+        return {k: excerpt(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [excerpt(v, max_chars) for v in value[:20]]
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class HistoryRecord:
+    """
+    One pipeline attempt. Scalars live in slots; tool results are kept as bounded excerpts.
+    Full RTL/TB and tool results are spilled to spill_dir and loaded on access through
+    the dict-style interface (record["rtl_code"], record.get("run_result")).
+    """
+
+    __slots__ = (
+        "attempt",
+        "status",
+        "action_type",
+        "signature",
+        "repair",
+        "module_name",
+        "rtl_hash",
+        "tb_hash",
+        "excerpts",
+        "spill_dir",
+    )
+
+    def __init__(
+        self,
+        spill_dir: Path,
+        attempt: int,
+        status: str,
+        action_type: str,
+        module_name: str | None,
+        rtl_code: str,
+        tb_code: str | None,
+        signature: str | None = None,
+        repair: dict | None = None,
+        **results,
+    ):
+        self.spill_dir = Path(spill_dir)
+        self.attempt = attempt
+        self.status = status
+        self.action_type = action_type
+        self.signature = signature
+        self.repair = repair
+        self.module_name = module_name
+        self.rtl_hash = _digest(rtl_code)
+        self.tb_hash = _digest(tb_code)
+        self.excerpts = {key: excerpt(results.get(key)) for key in RESULTS}
+
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        (self.spill_dir / ARTIFACTS["rtl_code"]).write_text(rtl_code or "")
+        (self.spill_dir / ARTIFACTS["tb_code"]).write_text(tb_code or "")
+        (self.spill_dir / "results.json").write_text(
+            json.dumps({key: results.get(key) for key in RESULTS}, default=str)
+        )
+
+    def __getitem__(self, key: str):
+        if key in ARTIFACTS:
+            return (self.spill_dir / ARTIFACTS[key]).read_text()
+        if key in RESULTS:
+            return json.loads((self.spill_dir / "results.json").read_text())[key]
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def excerpt(self, key: str) -> dict | None:
+        """In-memory (bounded) view of a tool result, without touching disk."""
+        return self.excerpts.get(key)
+
+    def summary(self) -> dict:
+        """Feedback row for this attempt (in-memory fields only)."""
+        compile_result = self.excerpts["compile_result"] or {}
+        run_result = self.excerpts["run_result"]
+        formal_result = self.excerpts["formal_result"]
+        equiv_result = self.excerpts["equiv_result"]
+        minimized = self.excerpts["minimize_result"]
+        structural = self.excerpts["structural_result"] or {}
+        return {
+            "attempt": self.attempt,
+            "status": self.status,
+            "action_type": self.action_type,
+            "compile_rc": compile_result.get("returncode"),
+            "sim_rc": run_result["returncode"] if run_result else None,
+            "sim_abort": run_result.get("abort_reason") if run_result else None,
+            "sim_mismatches": run_result["check"]["mismatches"] if run_result and run_result.get("check") else None,
+            "formal": formal_result.get("status") if formal_result else None,
+            "equivalent": equiv_result.get("equivalent") if equiv_result else None,
+            "structural": [f"{f['kind']}:{f['net']}" for f in structural.get("findings") or []] or None,
+            "minimized": f"{minimized['size']}/{minimized['total']}" if minimized else None,
+            "signature": self.signature,
+            "repair": self.repair,
+            "rtl_hash": self.rtl_hash,
+            "artifacts": str(self.spill_dir),
+        }
+
+    def __repr__(self) -> str:
+        return f"HistoryRecord(attempt={self.attempt}, status={self.status!r}, rtl={self.rtl_hash})"
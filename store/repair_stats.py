@@ -0,0 +1,59 @@
+"""Repair outcome log - (failure signature, action, mode, outcome, tokens) per repair step."""
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from config import REPAIR_STATS_PATH
+
+MODES = ("repair", "regenerate")
+
+
+class RepairStats:
+    """
+    Append-only JSONL log of repair steps. Each record:
+    {run_id, spec_hash, attempt, signature, rule_action, action, mode, outcome, tokens,
+     run_status, run_iterations}. outcome is the status of the attempt the step produced.
+    """
+
+    def __init__(self, path: Path = REPAIR_STATS_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()  # records re-enters from record_run()
+        self._records: list[dict] | None = None
+
+    @property
+    def records(self) -> list[dict]:
+        with self._lock:  # one log may be shared by concurrent pipeline runs
+            if self._records is None:
+                records = []
+                if self.path.exists():
+                    for line in self.path.read_text().splitlines():
+                        if line.strip():
+                            records.append(json.loads(line))
+                self._records = records
+        return self._records
+
+    def record_run(self, steps: list[dict]) -> None:
+        """Append all repair steps of one pipeline run."""
+        if not steps:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                for step in steps:
+                    f.write(json.dumps(step) + "\n")
+            self.records.extend(steps)
+
+    def table(self, exclude_run: str | None = None) -> dict[str, dict[tuple[str, str], dict]]:
+        """signature -> (action, mode) -> {n, passed, tokens}."""
+        return aggregate(r for r in self.records if r.get("run_id") != exclude_run)
+
+
+def aggregate(records) -> dict[str, dict[tuple[str, str], dict]]:
+    table: dict[str, dict[tuple[str, str], dict]] = defaultdict(dict)
+    for r in records:
+        cell = table[r["signature"]].setdefault((r["action"], r["mode"]), {"n": 0, "passed": 0, "tokens": 0})
+        cell["n"] += 1
+        cell["passed"] += r["outcome"] == "PASS"
+        cell["tokens"] += r.get("tokens") or 0
+    return dict(table)
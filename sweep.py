@@ -0,0 +1,125 @@
+"""
+Parameter sweep mode - one LLM generation for a width-parameterized family, then the
+spec-derived TB and Yosys synthesis at every parameter point in parallel.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import MAX_RETRIES, WORK_DIR
+from pipeline import run_pipeline
+from spec.parameters import instantiate, sweep_points
+from spec.test_generator import generate_spec_tb
+from tools.metrics import parse_yosys_stat
+from tools.sim_parser import SimOutputChecker
+from tools.simulator import run_simulation, write_and_compile
+from tools.synthesis import run_synthesis
+from tools.yosys_worker import yosys_available
+
+
+def _point_tag(values: dict) -> str:
+    return "_".join(f"{k}{v}" for k, v in values.items())
+
+
+def _run_point(
+    family: dict,
+    values: dict,
+    rtl_code: str,
+    module_name: str,
+    work_dir: Path,
+    seed: int,
+) -> dict:
+    """Spec TB + synthesis for one parameter point of the verified RTL."""
+    point = instantiate(family, values)
+    point_dir = work_dir / _point_tag(values)
+    point_dir.mkdir(parents=True, exist_ok=True)
+    row = {"parameters": values, "status": "FAIL", "sim_rc": None, "mismatches": None, "metrics": {}}
+
+    tb = generate_spec_tb(point, module_name, seed=seed, parameters=values)
+    if tb is None:
+        row["status"] = "NO_TB"
+    else:
+        compile_result, sim_out = write_and_compile(rtl_code, tb, module_name, point_dir)
+        row["compile_rc"] = compile_result["returncode"]
+        if compile_result["returncode"] != 0:
+            row["error"] = compile_result["stderr"][:300]
+        else:
+            run_result = run_simulation(sim_out, point_dir, checker=SimOutputChecker(chunk_size=256))
+            check = run_result.get("check") or {}
+            row["sim_rc"] = run_result["returncode"]
+            row["mismatches"] = check.get("mismatches", 0) + check.get("explicit_mismatches", 0)
+            if run_result["returncode"] == 0 and check.get("passed", True):
+                row["status"] = "PASS"
+            elif run_result["abort_reason"]:
+                row["error"] = f"sim aborted: {run_result['abort_reason']}"
+
+    if not yosys_available():
+        return row
+    dut_path = point_dir / f"{module_name}.sv"
+    if not dut_path.exists():
+        dut_path.write_text(rtl_code)
+    syn_result = run_synthesis(dut_path, point_dir, top_module=module_name, parameters=values)
+    if syn_result["returncode"] == 0:
+        row["metrics"] = parse_yosys_stat(syn_result["stdout"])
+    return row
+
+
+def run_sweep(
+    spec_ir: dict,
+    text_model,
+    sweep: dict[str, list[int]],
+    work_dir: Path | None = None,
+    max_workers: int = 4,
+    max_retries: int = MAX_RETRIES,
+    stimulus_seed: int = 0,
+    **pipeline_kwargs,
+) -> dict:
+    """
+    Sweep a parameterized Spec IR (port widths may be expressions such as "WIDTH" or "WIDTH+1").
+    The first point is generated and verified with run_pipeline; its parameterized RTL is then
+    checked and synthesized at every point in `sweep` (e.g. {"WIDTH": [8, 16, 32, 64]}).
+    Returns {status, module_name, rtl_path, points: [{parameters, status, mismatches, metrics}]}.
+    """
+    work_dir = work_dir or WORK_DIR / "sweep"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    points = sweep_points(sweep)
+    base = instantiate(spec_ir, points[0])
+
+    print(f"🧮 Sweep over {len(points)} points: {sweep}")
+    state = run_pipeline(
+        base,
+        text_model,
+        work_dir=work_dir / "base",
+        max_retries=max_retries,
+        run_post_pass=False,
+        stimulus_seed=stimulus_seed,
+        **pipeline_kwargs,
+    )
+    best = state["best_candidate"]
+    if state["status"] != "PASS" or best is None:
+        rows = [{"parameters": p, "status": "BLOCKED", "metrics": {}} for p in points]
+        return {"status": state["status"], "module_name": None, "rtl_path": None, "points": rows}
+
+    rtl_code, module_name = best["rtl_code"], best["module_name"]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rows = list(pool.map(
+            lambda values: _run_point(spec_ir, values, rtl_code, module_name, work_dir, stimulus_seed),
+            points,
+        ))
+
+    print("\n--- Sweep ---")
+    print(f"  {'point':24s} {'status':8s} {'area':>10s} {'cells':>7s} {'wires':>7s}")
+    for row in rows:
+        m = row["metrics"]
+        print(
+            f"  {_point_tag(row['parameters']):24s} {row['status']:8s} "
+            f"{m.get('chip_area', '-'):>10} {m.get('num_cells', '-'):>7} {m.get('num_wires', '-'):>7}"
+        )
+    result = {
+        "status": "PASS" if all(r["status"] == "PASS" for r in rows) else "FAIL",
+        "module_name": module_name,
+        "rtl_path": str(work_dir / "base" / "final_dut.sv"),
+        "points": rows,
+    }
+    (work_dir / "sweep.json").write_text(json.dumps(result, indent=2))
+    return result
@@ -1,10 +1,14 @@
-"""RTL Agent Tools - Verilator, Simulation, Synthesis, Visualization, Metrics, Formal."""
+"""RTL Agent Tools - Verilator, Simulation, Synthesis, Visualization, Metrics, Formal, Yosys workers, Stimulus minimization."""
 from .simulator import run_simulation, write_and_compile
 from .verilator import run_verilator
 from .synthesis import run_synthesis
 from .visualizer import run_visualize
 from .metrics import parse_yosys_stat
-from .formal import run_formal_check
+from .formal import run_formal_check, run_formal_oracle
+from .equivalence import run_design_equivalence, run_equivalence_check
+from .sim_parser import check_sim_output
+from .yosys_worker import YosysPool, YosysWorker, get_yosys_pool
+from .minimizer import ddmin, minimize_failure
 
 __all__ = [
     "run_simulation",
@@ -14,4 +18,13 @@ __all__ = [
     "run_visualize",
     "parse_yosys_stat",
     "run_formal_check",
+    "run_formal_oracle",
+    "run_equivalence_check",
+    "run_design_equivalence",
+    "check_sim_output",
+    "YosysPool",
+    "YosysWorker",
+    "get_yosys_pool",
+    "ddmin",
+    "minimize_failure",
 ]
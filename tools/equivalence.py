@@ -0,0 +1,130 @@
+"""SAT equivalence - prove DUT ≡ truth-table reference, or design ≡ design, with a Yosys miter (open source, free)."""
+import re
+import subprocess
+from pathlib import Path
+
+from spec.reference_netlist import generate_reference_rtl
+from .yosys_worker import get_yosys_pool, yosys_available
+
+# `sat -show-*` model rows; the Time column (step number, `init` or `-`) only appears with -seq
+_SAT_ROW = re.compile(r"^\s*(?:(?:-|\d+|init)\s+)?\\(\S+)\s+(\S+)\s+(\S+)\s+([01xX\-]+)\s*$")
+
+
+def run_equivalence_check(
+    rtl_path: Path,
+    spec_ir: dict,
+    work_dir: Path,
+    top_module: str | None = None,
+    use_worker: bool = True,
+) -> dict:
+    """
+    Build the reference netlist from the Spec IR truth table and prove equivalence
+    in one SAT call (miter -equiv -ignore_gold_x, so don't-cares are free).
+    Returns {available, equivalent, counterexample, returncode, stdout, stderr}.
+    equivalent is None when the check could not be run (no table, Yosys error).
+    """
+    top = top_module or rtl_path.stem
+    ref_code = generate_reference_rtl(spec_ir, top)
+    if ref_code is None:
+        return {"available": yosys_available(), "equivalent": None, "stderr": "No combinational truth table"}
+    if not yosys_available():
+        return {"available": False, "equivalent": None, "stderr": "Yosys not installed"}
+
+    ref_path = work_dir / f"{top}_ref.sv"
+    ref_path.write_text(ref_code)
+    commands = [
+        f"read_verilog -sv {rtl_path.resolve()}",
+        f"read_verilog -sv {ref_path.resolve()}",
+        "proc",
+        f"miter -equiv -flatten -make_outputs -ignore_gold_x {top}_ref {top} equiv_miter",
+        "hierarchy -top equiv_miter",
+        "sat -verify -prove trigger 0 -enable_undef -set-def-inputs -show-inputs -show-outputs equiv_miter",
+    ]
+    return _run_miter(commands, work_dir, use_worker)
+
+
+def run_design_equivalence(
+    gold_path: Path,
+    gold_top: str,
+    gate_path: Path,
+    gate_top: str,
+    work_dir: Path,
+    sequential: bool = False,
+    max_steps: int = 20,
+    use_worker: bool = True,
+) -> dict:
+    """
+    Prove gate ≡ gold (e.g. an optimized rewrite against the verified baseline); both modules
+    need the same ports. Combinational: one SAT call. Sequential: temporal induction from an
+    all-zero initial state (sat -tempinduct), up to max_steps; an unclosed induction is not equivalent.
+    Returns {available, equivalent, counterexample, returncode, stdout, stderr}.
+    """
+    if not yosys_available():
+        return {"available": False, "equivalent": None, "stderr": "Yosys not installed"}
+    commands = [
+        f"read_verilog -sv {gold_path.resolve()}",
+        f"read_verilog -sv {gate_path.resolve()}",
+        "proc",
+        f"miter -equiv -flatten -make_outputs -ignore_gold_x {gold_top} {gate_top} equiv_miter",
+        "hierarchy -top equiv_miter",
+    ]
+    if sequential:
+        commands += [
+            "flatten",
+            "async2sync",
+            f"sat -verify -tempinduct -prove trigger 0 -set-init-zero -seq 1 -maxsteps {max_steps} "
+            "-show-inputs -show-outputs equiv_miter",
+        ]
+    else:
+        commands.append("sat -verify -prove trigger 0 -enable_undef -set-def-inputs -show-inputs -show-outputs equiv_miter")
+    return _run_miter(commands, work_dir, use_worker)
+
+
+def _run_miter(commands: list[str], work_dir: Path, use_worker: bool) -> dict:
+    if use_worker:
+        result = get_yosys_pool().run_script(commands)
+    else:
+        script_path = work_dir / "yosys_equiv.ys"
+        script_path.write_text("\n".join(commands))
+        proc = subprocess.run(
+            ["yosys", "-s", str(script_path)],
+            cwd=str(work_dir),
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=60,
+        )
+        result = {
+            "returncode": proc.returncode,
+            "stdout": proc.stdout.strip() if proc.stdout else "",
+            "stderr": proc.stderr.strip() if proc.stderr else "",
+        }
+
+    stdout = result["stdout"]
+    if "SUCCESS!" in stdout:
+        equivalent = True
+    elif "model found: FAIL!" in stdout or "proof did fail" in stdout:  # cex, or induction did not close
+        equivalent = False
+    else:
+        equivalent = None
+
+    result["available"] = True
+    result["equivalent"] = equivalent
+    result["counterexample"] = _parse_counterexample(stdout) if equivalent is False else None
+    return result
+
+
+def _parse_counterexample(stdout: str) -> dict:
+    """Miter ports in_*/gold_*/gate_* → {inputs, expected, actual} as binary strings."""
+    cex = {"inputs": {}, "expected": {}, "actual": {}}
+    groups = {"in_": "inputs", "gold_": "expected", "gate_": "actual"}
+    for line in stdout.splitlines():
+        m = _SAT_ROW.match(line)
+        if not m:
+            continue
+        signal, bits = m.group(1), m.group(4)
+        for prefix, key in groups.items():
+            if signal.startswith(prefix):
+                cex[key][signal[len(prefix):]] = bits
+                break
+    return cex
@@ -1,8 +1,18 @@
 """Formal verification - SymbiYosys (optional, open source)."""
+import os
+import re
 import shutil
+import signal
 import subprocess
+import threading
+import time
 from pathlib import Path
 
+from spec.formal_props import formal_depth, generate_formal_wrapper
+
+MAX_FORMAL_DEPTH = 64
+FORMAL_STEP_TIMEOUT = 60  # seconds per sby run (one BMC or one induction depth)
+
 
 def _sby_available() -> bool:
     return shutil.which("sby") is not None
@@ -12,44 +22,155 @@ def run_formal_check(
     rtl_path: Path,
     work_dir: Path,
     top_module: str | None = None,
-    properties: list[str] | None = None,
+    wrapper_code: str | None = None,
+    mode: str = "bmc",
+    depth: int = 20,
+    cancel_event: threading.Event | None = None,
+    timeout: float = FORMAL_STEP_TIMEOUT,
 ) -> dict:
     """
     Run SymbiYosys formal check (if available).
-    Returns {available, passed, counterexample, stderr}.
+    wrapper_code: checker module instantiating the DUT (becomes the formal top).
+    mode: "bmc" or "prove" (k-induction).
+    cancel_event: when set, the sby process tree is killed and the result is marked cancelled.
+    Returns {available, passed, status, counterexample, cancelled, stdout, stderr}.
     """
     if not _sby_available():
         return {"available": False, "passed": None, "stderr": "SymbiYosys (sby) not installed"}
 
+    work_dir.mkdir(parents=True, exist_ok=True)
     top = top_module or rtl_path.stem
-    sby_file = work_dir / "formal.sby"
+    files = [str(rtl_path.resolve())]
+    reads = [f"read_verilog -sv -formal {rtl_path.name}"]
+    wrapper_path = None
+    if wrapper_code:
+        wrapper_path = work_dir / f"formal_{top}.sv"
+        wrapper_path.write_text(wrapper_code)
+        files.append(str(wrapper_path.resolve()))
+        reads.append(f"read_verilog -sv -formal {wrapper_path.name}")
+        top = f"formal_{top}"
+
+    task = f"formal_{mode}"
+    newline = "\n"
     sby_content = f"""
 [options]
-mode bmc
-depth 20
+mode {mode}
+depth {depth}
 
 [engines]
 smtbmc
 
 [script]
-read_verilog -sv {rtl_path.name}
+{newline.join(reads)}
 prep -top {top}
 
 [files]
-{rtl_path.name}
+{newline.join(files)}
 """
-    sby_file.write_text(sby_content.strip())
+    (work_dir / f"{task}.sby").write_text(sby_content.strip())
 
-    result = subprocess.run(
-        ["sby", "-f", "formal.sby"],
+    proc = subprocess.Popen(
+        ["sby", "-f", f"{task}.sby"],
         cwd=work_dir,
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         text=True,
-        timeout=60,
+        start_new_session=True,
     )
+    cancelled = timed_out = False
+    deadline = time.monotonic() + timeout
+    while proc.poll() is None:
+        if cancel_event is not None and cancel_event.is_set():
+            cancelled = True
+        elif time.monotonic() > deadline:
+            timed_out = True
+        if cancelled or timed_out:
+            os.killpg(proc.pid, signal.SIGKILL)
+            break
+        time.sleep(0.1)
+    stdout, stderr = proc.communicate()
+
+    status = "CANCELLED" if cancelled else "TIMEOUT" if timed_out else _parse_status(stdout)
     return {
         "available": True,
-        "passed": result.returncode == 0,
-        "stderr": result.stderr or "",
-        "stdout": result.stdout or "",
+        "passed": {"PASS": True, "FAIL": False}.get(status),
+        "status": status,
+        "mode": mode,
+        "depth": depth,
+        "cancelled": cancelled,
+        "counterexample": _parse_counterexample(stdout, work_dir / task, wrapper_path) if status == "FAIL" else None,
+        "stderr": stderr or "",
+        "stdout": stdout or "",
     }
+
+
+def run_formal_oracle(
+    rtl_path: Path,
+    spec_ir: dict,
+    work_dir: Path,
+    module_name: str | None = None,
+    cancel_event: threading.Event | None = None,
+    max_depth: int = MAX_FORMAL_DEPTH,
+    timeout: float = FORMAL_STEP_TIMEOUT,
+    deadline: float | None = None,
+) -> dict:
+    """
+    Third oracle: Spec IR invariants/latency → checker wrapper → BMC + k-induction.
+    Induction depth doubles while the proof is inconclusive, up to max_depth.
+    timeout caps each sby run; deadline (time.monotonic()) caps the whole oracle - no new run
+    starts past it and each run's timeout is clamped to it.
+    Returns the last run_formal_check result (passed=None when nothing is checkable).
+    """
+    wrapper = generate_formal_wrapper(spec_ir, module_name)
+    if wrapper is None:
+        return {"available": _sby_available(), "passed": None, "status": "NO_PROPERTIES"}
+
+    def step_timeout() -> float:
+        return timeout if deadline is None else min(timeout, deadline - time.monotonic())
+
+    depth = formal_depth(spec_ir)
+    if step_timeout() <= 0:
+        return {"available": True, "passed": None, "status": "TIMEOUT", "cancelled": False}
+    result = run_formal_check(
+        rtl_path, work_dir, module_name, wrapper, mode="bmc", depth=depth, cancel_event=cancel_event,
+        timeout=step_timeout(),
+    )
+    if result.get("status") != "PASS":
+        return result
+
+    while depth <= max_depth and step_timeout() > 0:
+        proof = run_formal_check(
+            rtl_path, work_dir, module_name, wrapper, mode="prove", depth=depth, cancel_event=cancel_event,
+            timeout=step_timeout(),
+        )
+        if proof["status"] != "UNKNOWN":
+            return proof
+        depth *= 2
+    # Induction never closed (or out of time): report bounded result only
+    result["status"] = "BMC_PASS"
+    return result
+
+
+def _parse_status(stdout: str) -> str:
+    m = re.search(r"DONE \((\w+)", stdout or "")
+    return m.group(1).upper() if m else "ERROR"
+
+
+def _parse_counterexample(stdout: str, task_dir: Path, wrapper_path: Path | None) -> dict:
+    """Failing assertions (with checker source line) and the trace VCD path."""
+    wrapper_lines = wrapper_path.read_text().splitlines() if wrapper_path else []
+    assertions = []
+    for m in re.finditer(r"Assert(?:ion)? failed in \S+: (\S+?):(\d+)", stdout):
+        fname, line = m.group(1), int(m.group(2))
+        entry = f"{fname}:{line}"
+        if wrapper_path and Path(fname).name == wrapper_path.name and 0 < line <= len(wrapper_lines):
+            src = wrapper_lines[line - 1].strip()
+            prev = wrapper_lines[line - 2].strip() if line > 1 else ""
+            entry = f"{prev} :: {src}" if prev.startswith("//") else src
+        if entry not in assertions:
+            assertions.append(entry)
+
+    m = re.search(r"Writing trace to VCD file: (\S+)", stdout)
+    trace = str(task_dir / m.group(1)) if m else None
+    steps = re.findall(r"Checking assertions in step (\d+)", stdout)
+    return {"assertions": assertions, "trace": trace, "step": int(steps[-1]) if steps else None}
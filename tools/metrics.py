@@ -5,7 +5,7 @@ import re
 def parse_yosys_stat(stdout: str) -> dict:
     """
     Parse Yosys 'stat' output.
-    Returns dict with chip_area, num_cells, num_wires, etc. if found.
+    Returns dict with chip_area, num_cells, num_wires, transistors, logic_depth (if ltp ran) when found.
     """
     metrics = {}
     # Example stat output:
@@ -24,6 +24,15 @@ def parse_yosys_stat(stdout: str) -> dict:
         metrics["num_wires"] = int(wires_match.group(1))
 
     # Yosys stat -tech cmos gives transistor count
+    transistors_match = re.search(r"Estimated number of transistors:\s*(\d+)", stdout)
+    if transistors_match:
+        metrics["transistors"] = int(transistors_match.group(1))
+
+    # ltp -noff: longest combinational path in cells (logic depth)
+    depth_match = re.search(r"Longest topological path in \S+ \(length=(\d+)\)", stdout)
+    if depth_match:
+        metrics["logic_depth"] = int(depth_match.group(1))
+
     # Also look for "cells" in generic stat
     cells_alt = re.search(r"(\d+)\s+cells?\s+", stdout, re.IGNORECASE)
     if cells_alt and "num_cells" not in metrics:
@@ -0,0 +1,137 @@
+"""
+Delta debugging (ddmin) for failing spec TB stimulus - the smallest subset of truth-table rows
+or constrained-random vectors that still fails. The subset is a focused counterexample for the
+Reviewer and a fast smoke test for the next candidate.
+"""
+import time
+from pathlib import Path
+from typing import Callable
+
+from config import MINIMIZE_MAX_TESTS, SIM_TIMEOUT
+from spec.test_generator import generate_spec_tb, spec_stimulus
+from .sim_parser import SimOutputChecker
+from .simulator import run_simulation, write_and_compile
+
+
+def ddmin(
+    items: list,
+    fails: Callable[[list], bool],
+    max_tests: int = MINIMIZE_MAX_TESTS,
+    stop: Callable[[], bool] | None = None,
+) -> tuple[list, int, bool]:
+    """
+    Zeller's ddmin. fails(subset) must hold for `items`; order is preserved in every subset.
+    Returns (subset, tests run, complete) - complete is False if max_tests ran out (or stop()
+    turned true) before the subset was 1-minimal (removing any single item makes it pass).
+    """
+    tests = 0
+    n = 2
+    while len(items) >= 2:
+        bounds = [round(i * len(items) / n) for i in range(n + 1)]
+        chunks = [items[bounds[i]:bounds[i + 1]] for i in range(n)]
+        candidates = [(c, 2) for c in chunks]
+        if n > 2:
+            candidates += [
+                ([x for j, c in enumerate(chunks) if j != i for x in c], max(n - 1, 2))
+                for i in range(n)
+            ]
+        for subset, next_n in candidates:
+            if tests >= max_tests or (stop is not None and stop()):
+                return items, tests, False
+            tests += 1
+            if fails(subset):
+                items, n = subset, next_n
+                break
+        else:
+            if n >= len(items):
+                break
+            n = min(len(items), 2 * n)
+    return items, tests, True
+
+
+def run_stimulus(
+    rtl_code: str,
+    spec_ir: dict,
+    stimulus: list,
+    work_dir: Path,
+    module_name: str | None = None,
+    seed: int = 0,
+    timeout: float = SIM_TIMEOUT,
+) -> dict:
+    """Compile and run the spec TB restricted to `stimulus`. Returns the run_simulation result
+    (with check), or the compile result if iverilog failed."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    name = module_name or spec_ir.get("module_name", "dut")
+    tb = generate_spec_tb(spec_ir, name, seed=seed, stimulus=stimulus)
+    compile_result, sim_out = write_and_compile(rtl_code, tb, name, work_dir)
+    if compile_result["returncode"] != 0:
+        return {**compile_result, "compile_failed": True}
+    return run_simulation(sim_out, work_dir, timeout=timeout, checker=SimOutputChecker(chunk_size=256))
+
+
+def stimulus_failed(result: dict) -> bool:
+    """A reproduced failure: the subset ran and its check reported mismatches."""
+    check = result.get("check")
+    return not result.get("compile_failed") and check is not None and not check["passed"]
+
+
+def minimize_failure(
+    rtl_code: str,
+    spec_ir: dict,
+    work_dir: Path,
+    module_name: str | None = None,
+    seed: int = 0,
+    hint: list[int] | None = None,
+    max_tests: int = MINIMIZE_MAX_TESTS,
+    timeout: float = SIM_TIMEOUT,
+    deadline: float | None = None,
+) -> dict | None:
+    """
+    Shrink the spec TB stimulus of a failing DUT to a minimal failing subset.
+    hint: stimulus indices seen failing (checker first_failures) - tried alone first, which
+    settles most combinational failures in one run. At most max_tests simulations in total
+    (including the confirmation run); none starts past deadline (time.monotonic()), and each
+    run's timeout is clamped to it. Returns {kind, total, size, indices, stimulus, tests,
+    complete, check, stdout}, or None if the spec has no vector stimulus (FSM walk), the
+    failure does not reproduce, or there was no time/tests left to confirm it.
+    """
+    stim = spec_stimulus(spec_ir, seed=seed)
+    if stim is None:
+        return None
+    kind, items = stim
+    runs: dict[tuple, dict] = {}
+
+    def out_of_time() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    def fails(indices: list[int]) -> bool:
+        key = tuple(indices)
+        if key not in runs:
+            run_timeout = timeout if deadline is None else max(1.0, min(timeout, deadline - time.monotonic()))
+            runs[key] = run_stimulus(
+                rtl_code, spec_ir, [items[i] for i in indices], work_dir, module_name, seed, run_timeout
+            )
+        return stimulus_failed(runs[key])
+
+    reserve = 1  # the confirmation run, if ddmin never simulated its result
+    indices = list(range(len(items)))
+    hint = sorted({i for i in hint or [] if 0 <= i < len(items)})
+    if hint and len(hint) < len(indices) and max_tests - reserve > 0 and not out_of_time() and fails(hint):
+        indices = hint
+    minimal, _, complete = ddmin(indices, fails, max(0, max_tests - reserve - len(runs)), stop=out_of_time)
+    if tuple(minimal) not in runs and (len(runs) >= max_tests or out_of_time()):
+        return None
+    if not fails(minimal):
+        return None
+    final = runs[tuple(minimal)]
+    return {
+        "kind": kind,
+        "total": len(items),
+        "size": len(minimal),
+        "indices": minimal,
+        "stimulus": [items[i] for i in minimal],
+        "tests": len(runs),
+        "complete": complete,
+        "check": final.get("check"),
+        "stdout": final.get("stdout", ""),
+    }
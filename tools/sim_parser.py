@@ -0,0 +1,115 @@
+"""Streaming simulation-output parsing with vectorized expected-vs-actual checks (NumPy)."""
+import re
+from typing import Iterable
+
+import numpy as np
+
+_TB_LINE = re.compile(r"in=([01xXzZ]+)\s+out=([01xXzZ]+)(?:\s+exp=([01xXzZ]+))?")
+_MISMATCH_LINE = re.compile(r"^\s*(MISMATCH|ERROR|FAIL)\b", re.IGNORECASE)
+_SUMMARY_LINE = re.compile(r"^\s*FAIL:\s*(\d+) mismatches\s*$", re.IGNORECASE)  # spec TB end-of-run total
+_WORD = 64
+
+
+def _words(bits: str, n_words: int) -> tuple[list[int], list[int]]:
+    """Bit string → (value words, x/z mask words), LSB word first."""
+    bits = bits.lower()
+    value = int(bits.replace("x", "0").replace("z", "0") or "0", 2)
+    xmask = int(re.sub(r"[01]", "0", bits).replace("x", "1").replace("z", "1") or "0", 2)
+    full = (1 << _WORD) - 1
+    return (
+        [(value >> (_WORD * i)) & full for i in range(n_words)],
+        [(xmask >> (_WORD * i)) & full for i in range(n_words)],
+    )
+
+
+class SimOutputChecker:
+    """
+    Streaming checker for spec TB lines (`in=%b out=%b exp=%b`).
+    Samples are buffered in fixed-size chunks and compared in bulk; memory stays
+    bounded by chunk_size regardless of log length. x/z in exp are don't-cares,
+    x/z in out are mismatches. Explicit MISMATCH/ERROR/FAIL lines are also counted, except the
+    TB's own `FAIL: <n> mismatches` total, which is kept as reported_mismatches (it still fails
+    the check, without double-counting the lines it sums up).
+    """
+
+    def __init__(self, chunk_size: int = 4096, max_failures: int = 10):
+        self.chunk_size = chunk_size
+        self.max_failures = max_failures
+        self.samples = 0
+        self.mismatches = 0
+        self.explicit_mismatches = 0
+        self.reported_mismatches = 0
+        self.first_failures: list[dict] = []
+        self._buf: list[tuple[str, str, str]] = []
+
+    def feed(self, line: str) -> bool:
+        """
+        Consume one output line. Returns True once any mismatch has been seen - in/out/exp
+        samples only count after flush(), so call it per line to stop at the first mismatch.
+        """
+        if m := _SUMMARY_LINE.match(line):
+            self.reported_mismatches = int(m.group(1))
+        elif _MISMATCH_LINE.match(line):
+            self.explicit_mismatches += 1
+            if len(self.first_failures) < self.max_failures:
+                self.first_failures.append({"line": line.strip()})
+        else:
+            m = _TB_LINE.search(line)
+            if m and m.group(3):
+                self._buf.append(m.groups())
+                if len(self._buf) >= self.chunk_size:
+                    self.flush()
+        return self.failed
+
+    def feed_lines(self, lines: Iterable[str]) -> "SimOutputChecker":
+        for line in lines:
+            self.feed(line)
+        self.flush()
+        return self
+
+    def flush(self) -> int:
+        """Compare buffered samples; returns number of new mismatches."""
+        if not self._buf:
+            return 0
+        width = max(max(len(o), len(e)) for _, o, e in self._buf)
+        n_words = (width + _WORD - 1) // _WORD
+        out_v = np.zeros((len(self._buf), n_words), dtype=np.uint64)
+        out_x = np.zeros_like(out_v)
+        exp_v = np.zeros_like(out_v)
+        exp_x = np.zeros_like(out_v)
+        for i, (_, out, exp) in enumerate(self._buf):
+            out_v[i], out_x[i] = _words(out, n_words)
+            exp_v[i], exp_x[i] = _words(exp, n_words)
+
+        care = ~exp_x
+        bad = np.any((((out_v ^ exp_v) | out_x) & care) != 0, axis=1)
+        idx = np.flatnonzero(bad)
+        for i in idx[: max(0, self.max_failures - len(self.first_failures))]:
+            ins, out, exp = self._buf[i]
+            self.first_failures.append({"index": self.samples + int(i), "in": ins, "out": out, "exp": exp})
+
+        self.samples += len(self._buf)
+        self.mismatches += len(idx)
+        self._buf.clear()
+        return len(idx)
+
+    @property
+    def failed(self) -> bool:
+        return self.mismatches > 0 or self.explicit_mismatches > 0 or self.reported_mismatches > 0
+
+    def summary(self) -> dict:
+        self.flush()
+        return {
+            "samples": self.samples,
+            "mismatches": self.mismatches,
+            "explicit_mismatches": self.explicit_mismatches,
+            "reported_mismatches": self.reported_mismatches,
+            "first_failures": self.first_failures,
+            "passed": not self.failed,
+        }
+
+
+def check_sim_output(lines: Iterable[str], max_failures: int = 10) -> dict:
+    """Check TB output lines (any iterable, e.g. a file or stdout.splitlines())."""
+    return SimOutputChecker(max_failures=max_failures).feed_lines(lines).summary()
+
@@ -1,7 +1,17 @@
 """Icarus Verilog simulation - iverilog + vvp (open source, free)."""
+import codecs
+import queue
 import subprocess
+import threading
+import time
+from collections import deque
 from pathlib import Path
 
+from config import SIM_MAX_OUTPUT_BYTES, SIM_STALL_TIMEOUT, SIM_TIMEOUT
+
+_READ_CHUNK = 64 * 1024  # bytes per read; also the longest line kept whole
+_QUEUE_LINES = 256  # lines buffered between the reader threads and the consumer
+
 
 def run_cmd(cmd: list, cwd: Path | None = None, timeout: int = 60) -> dict:
     """Run shell command, return structured result."""
@@ -39,6 +49,134 @@ def write_and_compile(
     return compile_result, sim_out
 
 
-def run_simulation(sim_out: Path, work_dir: Path) -> dict:
-    """Run compiled simulation binary (vvp)."""
-    return run_cmd(["vvp", sim_out.name], cwd=work_dir)
+def run_simulation(
+    sim_out: Path,
+    work_dir: Path,
+    timeout: float = SIM_TIMEOUT,
+    stall_timeout: float | None = SIM_STALL_TIMEOUT,
+    max_output_bytes: int = SIM_MAX_OUTPUT_BYTES,
+    checker=None,
+    stop_on_mismatch: bool = False,
+    keep_lines: int = 200,
+) -> dict:
+    """
+    Run compiled simulation binary (vvp), streaming its output line by line.
+    The process is killed on timeout, on a stall (no output for stall_timeout s),
+    when output exceeds max_output_bytes, or (stop_on_mismatch) when checker.feed()
+    reports a mismatch. Only a head/tail of keep_lines lines is kept in memory; output is read
+    in fixed-size chunks through a bounded queue, so a newline-free runaway $display or a slow
+    consumer cannot buffer past the cap (lines longer than _READ_CHUNK arrive in pieces).
+    Returns {cmd, returncode, stdout, stderr, abort_reason, output_bytes, lines[, check]}.
+    """
+    cmd = ["vvp", sim_out.name]
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(work_dir),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    lines = queue.Queue(maxsize=_QUEUE_LINES)
+    stop = threading.Event()
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, "stdout", lines, stop), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, "stderr", lines, stop), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    head, tail = [], deque(maxlen=keep_lines)
+    stderr = deque(maxlen=keep_lines)
+    n_lines = out_bytes = 0
+    abort_reason = None
+    start = last_output = time.monotonic()
+    open_streams = 2
+    while open_streams:
+        now = time.monotonic()
+        if now - start > timeout:
+            abort_reason = "timeout"
+        elif stall_timeout and now - last_output > stall_timeout:
+            abort_reason = "stall"
+        if abort_reason:
+            break
+        try:
+            stream, line = lines.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if line is None:
+            open_streams -= 1
+            continue
+        last_output = time.monotonic()
+        out_bytes += len(line)
+        line = line.rstrip("\n")
+        if stream == "stderr":
+            stderr.append(line)
+        else:
+            n_lines += 1
+            (head if len(head) < keep_lines else tail).append(line)
+            if checker is not None:
+                checker.feed(line)
+                if stop_on_mismatch:
+                    checker.flush()  # compare now, not at the next chunk boundary
+                    if checker.failed:
+                        abort_reason = "mismatch"
+                        break
+        if out_bytes > max_output_bytes:
+            abort_reason = "output_cap"
+            break
+
+    stop.set()
+    if abort_reason:
+        proc.kill()
+    returncode = proc.wait()
+
+    stdout = head
+    if tail:
+        omitted = n_lines - len(head) - len(tail)
+        stdout = head + ([f"... [{omitted} lines omitted] ..."] if omitted else []) + list(tail)
+    if abort_reason:
+        stderr.append(f"Simulation aborted: {abort_reason}")
+    result = {
+        "cmd": " ".join(cmd),
+        "returncode": returncode,
+        "stdout": "\n".join(stdout).strip(),
+        "stderr": "\n".join(stderr).strip(),
+        "abort_reason": abort_reason,
+        "output_bytes": out_bytes,
+        "lines": n_lines,
+    }
+    if checker is not None:
+        result["check"] = checker.summary()
+    return result
+
+
+def _pump(stream, name: str, lines: queue.Queue, stop: threading.Event) -> None:
+    """Read `stream` in _READ_CHUNK pieces and queue (name, line) until EOF, then (name, None)."""
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                lines.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    while True:
+        chunk = stream.read1(_READ_CHUNK)
+        if not chunk:
+            break
+        partial += decoder.decode(chunk)
+        *complete, partial = partial.split("\n")
+        for line in complete:
+            if not put((name, line + "\n")):
+                return
+        while len(partial) >= _READ_CHUNK:  # no newline in sight: hand it over in pieces
+            piece, partial = partial[:_READ_CHUNK], partial[_READ_CHUNK:]
+            if not put((name, piece)):
+                return
+    partial += decoder.decode(b"", final=True)
+    if partial:
+        put((name, partial))
+    put((name, None))
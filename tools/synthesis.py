@@ -2,6 +2,8 @@
 import subprocess
 from pathlib import Path
 
+from .yosys_worker import get_yosys_pool, yosys_available
+
 
 def run_cmd(cmd: list, cwd: Path | None = None, timeout: int = 60) -> dict:
     """Run shell command, return structured result."""
@@ -20,17 +22,40 @@ def run_cmd(cmd: list, cwd: Path | None = None, timeout: int = 60) -> dict:
     }
 
 
-def run_synthesis(rtl_path: Path, work_dir: Path, top_module: str | None = None) -> dict:
+def run_synthesis(
+    rtl_path: Path,
+    work_dir: Path,
+    top_module: str | None = None,
+    use_worker: bool = True,
+    parameters: dict | None = None,
+    logic_depth: bool = False,
+) -> dict:
     """
     Run Yosys: read_verilog, synth, stat.
     top_module: name of top module (default: filename stem).
+    parameters: top-level parameter values applied with chparam before synthesis.
+    use_worker: run on the persistent Yosys pool instead of a fresh process.
+    logic_depth: also report the longest combinational path, in cells, of the flattened netlist (`ltp -noff`).
     """
     rtl_name = rtl_path.name
     top = top_module or rtl_path.stem
+    chparam = [f"chparam -set {k} {v} {top}" for k, v in (parameters or {}).items()]
+    ltp = ["flatten", "ltp -noff"] if logic_depth else []
+    if use_worker and yosys_available():
+        return get_yosys_pool().run_script([
+            f"read_verilog -sv {rtl_path.resolve()}",
+            *chparam,
+            f"synth -top {top}",
+            "stat -tech cmos",
+            *ltp,
+        ])
+
+    chparam_lines = "".join(f"\n    {c}" for c in chparam)
+    ltp_lines = "".join(f"\n    {c}" for c in ltp)
     script = f"""
-    read_verilog -sv {rtl_name}
+    read_verilog -sv {rtl_name}{chparam_lines}
     synth -top {top}
-    stat -tech cmos
+    stat -tech cmos{ltp_lines}
     """
     script_path = work_dir / "yosys_script.ys"
     script_path.write_text(script.strip())
@@ -1,18 +1,31 @@
-"""RTL visualization - Yosys 'show' generates SVG (open source, free)."""
+"""
+RTL visualization - Yosys 'show' → DOT → SVG, on request and size-capped (open source, free).
+Designs above max_cells are drawn per submodule, with a cell-type summary for modules that are
+still too large, so graphviz never lays out a multi-thousand-cell netlist.
+"""
+import re
+import shutil
 import subprocess
 from pathlib import Path
 
+from config import DIAGRAM_DOT_TIMEOUT, DIAGRAM_MAX_CELLS
+from .metrics import parse_yosys_stat
+from .yosys_worker import get_yosys_pool, yosys_available
+
 
 def run_cmd(cmd: list, cwd: Path | None = None, timeout: int = 60) -> dict:
     """Run shell command, return structured result."""
-    result = subprocess.run(
-        cmd,
-        cwd=str(cwd) if cwd else None,
-        text=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        timeout=timeout,
-    )
+    try:
+        result = subprocess.run(
+            cmd,
+            cwd=str(cwd) if cwd else None,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {"returncode": -1, "stdout": "", "stderr": f"Timeout after {timeout}s", "timeout": True}
     return {
         "returncode": result.returncode,
         "stdout": result.stdout.strip() if result.stdout else "",
@@ -20,30 +33,136 @@ def run_cmd(cmd: list, cwd: Path | None = None, timeout: int = 60) -> dict:
     }
 
 
-def run_visualize(rtl_path: Path, work_dir: Path, top_module: str | None = None) -> dict:
+def _yosys(commands: list[str], work_dir: Path, script_name: str, use_worker: bool) -> dict:
+    if use_worker and yosys_available():
+        return get_yosys_pool().run_script(commands)
+    script_path = work_dir / script_name
+    script_path.write_text("\n".join(commands))
+    return run_cmd(["yosys", "-q", "-s", str(script_path)], cwd=work_dir)
+
+
+def _safe_name(module: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]+", "_", module).strip("_") or "module"
+
+
+def parse_module_stats(stat_text: str) -> dict[str, dict]:
+    """Per-module {num_cells, cell_types} from Yosys `stat` output (one `=== name ===` section each)."""
+    modules = {}
+    sections = re.split(r"^=== (\S+) ===\s*$", stat_text, flags=re.MULTILINE)
+    for name, body in zip(sections[1::2], sections[2::2]):
+        body = body.split("=== design hierarchy ===")[0]
+        types = {}
+        for line in body.splitlines():
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            a, b = parts
+            if b.isdigit() and not a.endswith(":"):
+                types[a] = int(b)
+            elif a.isdigit() and (b.startswith("$") or b.startswith("\\")):
+                types[b] = int(a)
+        types = {t: n for t, n in types.items() if t.startswith(("$", "\\")) or t in sections[1::2]}
+        modules[name.lstrip("\\")] = {
+            "num_cells": parse_yosys_stat(body).get("num_cells", sum(types.values())),
+            "cell_types": types,
+        }
+    return modules
+
+
+def summary_dot(module: str, cell_types: dict[str, int]) -> str:
+    """Tiny DOT graph: one node per cell type with its count (for modules too large to draw)."""
+    lines = [f'digraph "{module}" {{', "  rankdir=LR;", f'  label="{module} (summary)";', "  node [shape=box];"]
+    lines.append(f'  top [label="{module}\\n{sum(cell_types.values())} cells", shape=ellipse];')
+    for i, (cell, n) in enumerate(sorted(cell_types.items(), key=lambda x: -x[1])):
+        label = cell.replace("\\", "").replace('"', "'")
+        lines.append(f'  c{i} [label="{label}\\nx{n}"];')
+        lines.append(f"  top -> c{i};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def render_dot(dot_path: Path, timeout: float = DIAGRAM_DOT_TIMEOUT) -> dict:
+    """Graphviz layout with a hard timeout. Returns {svg_path|None, error|None}."""
+    if shutil.which("dot") is None:
+        return {"svg_path": None, "error": "graphviz not installed"}
+    svg_path = dot_path.with_suffix(".svg")
+    result = run_cmd(["dot", "-Tsvg", str(dot_path), "-o", str(svg_path)], timeout=timeout)
+    if result.get("timeout"):
+        svg_path.unlink(missing_ok=True)
+        return {"svg_path": None, "error": f"graphviz timeout ({timeout}s)"}
+    if result["returncode"] != 0 or not svg_path.exists():
+        return {"svg_path": None, "error": result["stderr"][:300] or "graphviz failed"}
+    return {"svg_path": str(svg_path), "error": None}
+
+
+def run_visualize(
+    rtl_path: Path,
+    work_dir: Path,
+    top_module: str | None = None,
+    use_worker: bool = True,
+    max_cells: int = DIAGRAM_MAX_CELLS,
+    dot_timeout: float = DIAGRAM_DOT_TIMEOUT,
+) -> dict:
     """
-    Run Yosys 'show' to generate SVG circuit diagram.
-    top_module: name of top module (default: filename stem).
+    Draw the synthesized design. Up to max_cells the whole (flattened) design is one diagram;
+    above that each module gets its own diagram, or a cell-type summary if it alone is too large.
+    use_worker: run Yosys on the persistent pool instead of a fresh process.
+    Returns {returncode, stderr, mode, num_cells, diagrams: [{module, kind, dot_path, svg_path, error}],
+    svg_path} - files only; SVGs are never read into memory.
     """
-    rtl_name = rtl_path.name
     top = top_module or rtl_path.stem
-    script = f"""
-    read_verilog -sv {rtl_name}
-    synth -top {top}
-    show -format svg -prefix circuit
-    """
-    script_path = work_dir / "yosys_show.ys"
-    script_path.write_text(script.strip())
-
-    result = run_cmd(
-        ["yosys", "-q", "-s", str(script_path)],
-        cwd=work_dir,
-    )
-
-    # Yosys show creates circuit.svg (or circuit_0.svg with -prefix circuit)
-    for candidate in [svg_path, work_dir / "circuit_0.svg", work_dir / "show.svg"]:
-        if candidate.exists():
-            result["svg_path"] = str(candidate)
-            result["svg_content"] = candidate.read_text()
-            break
-    return result
+    out_dir = (work_dir / "diagrams").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stat_path = out_dir / "stat.txt"
+    il_path = out_dir / "design.il"
+    for stale in out_dir.glob("circuit*"):
+        stale.unlink()
+
+    result = _yosys([
+        f"read_verilog -sv {rtl_path.resolve()}",
+        f"synth -top {top}",
+        f"tee -q -o {stat_path} stat",
+        f"write_rtlil {il_path}",
+    ], work_dir, "yosys_show_stat.ys", use_worker)
+    if result["returncode"] != 0 or not stat_path.exists():
+        return {"returncode": result["returncode"] or 1, "stderr": result["stderr"], "diagrams": [], "svg_path": None}
+
+    stat_text = stat_path.read_text()
+    modules = parse_module_stats(stat_text)
+    # Flattened size: the hierarchy total counts every instance of each submodule
+    _, _, hierarchy = stat_text.partition("=== design hierarchy ===")
+    total = parse_yosys_stat(hierarchy).get("num_cells") or sum(m["num_cells"] for m in modules.values())
+    if total <= max_cells:
+        mode = "full"
+        jobs = [(top, "full")]
+        commands = [f"read_rtlil {il_path}", "flatten", f"show -format dot -prefix {out_dir / 'circuit'} {top}"]
+    else:
+        mode = "per_module"
+        jobs = [(m, "module" if s["num_cells"] <= max_cells else "summary") for m, s in modules.items()]
+        commands = [f"read_rtlil {il_path}"] + [
+            f"show -format dot -prefix {out_dir / ('circuit_' + _safe_name(m))} {m}"
+            for m, kind in jobs if kind == "module"
+        ]
+
+    show = _yosys(commands, work_dir, "yosys_show.ys", use_worker) if len(commands) > 1 else result
+    diagrams = []
+    for module, kind in jobs:
+        dot_path = out_dir / ("circuit.dot" if kind == "full" else f"circuit_{_safe_name(module)}.dot")
+        if kind == "summary":
+            dot_path.write_text(summary_dot(module, modules[module]["cell_types"]))
+        if not dot_path.exists():
+            diagrams.append({"module": module, "kind": kind, "dot_path": None, "svg_path": None,
+                             "error": show["stderr"][:300] or "yosys show produced no output"})
+            continue
+        diagrams.append({"module": module, "kind": kind, "dot_path": str(dot_path), **render_dot(dot_path, dot_timeout)})
+
+    main = next((d for d in diagrams if d["module"] == top and d["svg_path"]), None)
+    main = main or next((d for d in diagrams if d["svg_path"]), None)
+    return {
+        "returncode": show["returncode"],
+        "stderr": show["stderr"],
+        "mode": mode,
+        "num_cells": total,
+        "diagrams": diagrams,
+        "svg_path": main["svg_path"] if main else None,
+    }
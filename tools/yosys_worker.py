@@ -0,0 +1,166 @@
+"""Persistent Yosys workers - reuse one interactive Yosys process across many designs."""
+import atexit
+import itertools
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from config import YOSYS_POOL_SIZE, YOSYS_TIMEOUT
+
+_DONE_TAG = "__RTL_AGENT_DONE__"
+
+
+def yosys_available() -> bool:
+    return shutil.which("yosys") is not None
+
+
+class YosysWorker:
+    """
+    One long-lived `yosys` shell driven over stdin.
+    Each job starts with `design -reset` and ends with a `log <tag>` marker.
+    The process is restarted on crash, broken pipe or timeout.
+    """
+
+    def __init__(self, timeout: int = YOSYS_TIMEOUT):
+        self.timeout = timeout
+        self.jobs_run = 0
+        self.restarts = 0
+        self._proc = None
+        self._lines = None
+        self._seq = itertools.count()
+
+    def start(self) -> None:
+        self._proc = subprocess.Popen(
+            ["yosys", "-Q", "-T"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=_pump, args=(self._proc, self._lines), daemon=True).start()
+
+    def stop(self) -> None:
+        if self._proc is None:
+            return
+        if self._proc.poll() is None:
+            try:
+                self._proc.stdin.write("exit\n")
+                self._proc.stdin.flush()
+                self._proc.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+                self._proc.wait()
+        self._proc = None
+
+    def restart(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+        self.restarts += 1
+        self.start()
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def run_script(self, commands: list[str], timeout: int | None = None) -> dict:
+        """
+        Run Yosys commands on a fresh design.
+        Returns {returncode, stdout, stderr} like the one-shot subprocess helpers.
+        """
+        if self._proc is None:
+            self.start()
+        elif not self.alive():
+            self.restart()
+
+        tag = f"{_DONE_TAG}{next(self._seq)}"
+        payload = ["design -reset", *commands, f"log {tag}"]
+        try:
+            self._proc.stdin.write("\n".join(payload) + "\n")
+            self._proc.stdin.flush()
+        except OSError as e:
+            self.restart()
+            return _result(-1, [], f"Yosys worker pipe error: {e}")
+
+        self.jobs_run += 1
+        deadline = time.monotonic() + (timeout or self.timeout)
+        out = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.restart()
+                return _result(-1, out, f"Yosys worker timed out after {timeout or self.timeout}s")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                self.restart()
+                return _result(-1, out, "Yosys worker exited unexpectedly")
+            line = line.replace("yosys> ", "").rstrip("\n")
+            if line.strip() == tag:
+                break
+            out.append(line)
+
+        errors = [l for l in out if l.lstrip().startswith("ERROR:")]
+        return _result(1 if errors else 0, out, "\n".join(errors))
+
+
+class YosysPool:
+    """Fixed-size pool of YosysWorker processes for parallel callers."""
+
+    def __init__(self, size: int = YOSYS_POOL_SIZE, timeout: int = YOSYS_TIMEOUT):
+        self.size = size
+        self._idle = queue.Queue()
+        self._workers = [YosysWorker(timeout) for _ in range(size)]
+        for w in self._workers:
+            self._idle.put(w)
+
+    @contextmanager
+    def worker(self):
+        w = self._idle.get()
+        try:
+            yield w
+        finally:
+            self._idle.put(w)
+
+    def run_script(self, commands: list[str], timeout: int | None = None) -> dict:
+        with self.worker() as w:
+            return w.run_script(commands, timeout)
+
+    def close(self) -> None:
+        for w in self._workers:
+            w.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_yosys_pool() -> YosysPool:
+    """Shared process-wide pool (created on first use, closed at exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = YosysPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def _pump(proc: subprocess.Popen, lines: queue.Queue) -> None:
+    for line in proc.stdout:
+        lines.put(line)
+    lines.put(None)
+
+
+def _result(returncode: int, out: list[str], stderr: str) -> dict:
+    return {
+        "returncode": returncode,
+        "stdout": "\n".join(out).strip(),
+        "stderr": stderr.strip(),
+    }
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Queue worker - pull Spec IR jobs from a shared broker, run the pipeline, push results back.
+Start any number of these on the host that holds the broker file (a local filesystem -
+SQLite locking is not safe over NFS/SMB).
+
+Usage:
+  export GOOGLE_API_KEY=your_key
+  python worker.py --db work/queue.sqlite --work-dir ./work/worker_a
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import API_KEY, BROKER_DB_PATH, TEXT_MODEL, WORK_DIR
+from store.broker import JobBroker, bundle_dir
+
+
+def _heartbeat(broker: JobBroker, job_id: str, worker_id: str, stop: threading.Event) -> None:
+    interval = max(broker.lease_seconds / 3, 1)
+    while not stop.wait(interval):
+        if not broker.heartbeat(job_id, worker_id):
+            print(f"⚠️  Lost lease on {job_id}; result will be discarded")
+            return
+
+
+def run_worker(
+    broker: JobBroker,
+    text_model,
+    work_dir: Path,
+    worker_id: str | None = None,
+    poll_interval: float = 5.0,
+    exit_when_idle: bool = False,
+    runner=None,
+) -> int:
+    """
+    Lease → run_pipeline → complete/fail until the queue is empty (exit_when_idle) or forever.
+    runner: callable(spec, text_model, work_dir=..., **options) -> state (default run_pipeline).
+    Returns the number of jobs completed by this worker.
+    """
+    if runner is None:
+        from pipeline import run_pipeline as runner
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while True:
+        job = broker.lease(worker_id)
+        if job is None:
+            if exit_when_idle and not broker.pending():
+                return done
+            time.sleep(poll_interval)
+            continue
+
+        print(f"📥 [{worker_id}] {job['name']} ({job['id']}, attempt {job['attempt']})")
+        job_dir = Path(work_dir) / job["id"]
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(broker, job["id"], worker_id, stop), daemon=True)
+        beat.start()
+        try:
+            state = runner(job["spec"], text_model, work_dir=job_dir, **job["options"])
+            result = {
+                "status": state["status"],
+                "iterations": state["iteration"],
+                "metrics": state["metrics"],
+                "tokens": state.get("tokens", {}),
+                "worker": worker_id,
+            }
+            stop.set()
+            if broker.complete(job["id"], worker_id, result, bundle_dir(job_dir) if job_dir.exists() else None):
+                done += 1
+            print(f"📤 [{worker_id}] {job['name']}: {result['status']}")
+        except Exception:
+            stop.set()
+            broker.fail(job["id"], worker_id, traceback.format_exc())
+            print(f"❌ [{worker_id}] {job['name']} crashed; returned to queue")
+        finally:
+            beat.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTL Agent queue worker")
+    parser.add_argument("--db", type=Path, default=BROKER_DB_PATH, help="broker SQLite file (local filesystem)")
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR / "worker", help="local scratch dir")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--poll", type=float, default=5.0, help="seconds between polls when idle")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop once the queue is drained")
+    args = parser.parse_args()
+
+    api_key = API_KEY or os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print("Error: Set GOOGLE_API_KEY or GEMINI_API_KEY in environment.")
+        sys.exit(1)
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    text_model = genai.GenerativeModel(TEXT_MODEL)
+    n = run_worker(
+        JobBroker(args.db),
+        text_model,
+        args.work_dir,
+        worker_id=args.worker_id,
+        poll_interval=args.poll,
+        exit_when_idle=args.exit_when_idle,
+    )
+    print(f"Worker finished: {n} jobs completed")
+
+
+if __name__ == "__main__":
+    main()